@@ -0,0 +1,30 @@
+"""add completed task counter to users
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-11-12
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Add tasksCompletedCount to users and backfill it from completed tasks"""
+    op.add_column('users', sa.Column('tasksCompletedCount', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from existing completions so milestone checks stay correct
+    op.execute(
+        'UPDATE users SET "tasksCompletedCount" = ('
+        'SELECT COUNT(*) FROM tasks '
+        'WHERE tasks."completedBy" = users.id AND tasks.status = \'done\')'
+    )
+
+def downgrade():
+    """Remove tasksCompletedCount"""
+    op.drop_column('users', 'tasksCompletedCount')
@@ -0,0 +1,23 @@
+"""add (userId, endpoint) index to webpush_subs
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-11-13
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Index webpush_subs for the device token join in push delivery"""
+    op.create_index('idx_webpush_user_endpoint', 'webpush_subs', ['userId', 'endpoint'])
+
+def downgrade():
+    """Remove webpush_subs (userId, endpoint) index"""
+    op.drop_index('idx_webpush_user_endpoint', table_name='webpush_subs')
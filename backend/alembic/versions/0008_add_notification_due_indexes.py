@@ -0,0 +1,32 @@
+"""add pending-due and user feed indexes to notifications
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-11-13
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Index pending scheduled notifications and the per-user feed"""
+    # Partial index: the scheduler only ever scans pending rows
+    op.create_index(
+        'idx_notification_pending_due', 'notifications', ['scheduledFor'],
+        postgresql_where=sa.text("status = 'pending'")
+    )
+    op.create_index(
+        'idx_notification_user_type_created', 'notifications',
+        ['userId', 'type', 'createdAt']
+    )
+
+def downgrade():
+    """Remove notification indexes"""
+    op.drop_index('idx_notification_user_type_created', table_name='notifications')
+    op.drop_index('idx_notification_pending_due', table_name='notifications')
@@ -0,0 +1,29 @@
+"""add materialized points balance to users
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-11-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Add pointsBalance to users and backfill it from the points ledger"""
+    op.add_column('users', sa.Column('pointsBalance', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        'UPDATE users SET "pointsBalance" = COALESCE(('
+        'SELECT SUM(points_ledger.delta) FROM points_ledger '
+        'WHERE points_ledger."userId" = users.id), 0)'
+    )
+
+def downgrade():
+    """Remove pointsBalance"""
+    op.drop_column('users', 'pointsBalance')
@@ -0,0 +1,25 @@
+"""add family/updatedAt indexes for delta sync
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2025-11-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Index tasks and events by family and last update for sync deltas"""
+    op.create_index('idx_task_family_updated', 'tasks', ['familyId', 'updatedAt'])
+    op.create_index('idx_event_family_updated', 'events', ['familyId', 'updatedAt'])
+
+def downgrade():
+    """Remove delta sync indexes"""
+    op.drop_index('idx_event_family_updated', table_name='events')
+    op.drop_index('idx_task_family_updated', table_name='tasks')
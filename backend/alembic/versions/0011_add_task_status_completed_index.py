@@ -0,0 +1,23 @@
+"""add status/completedAt index for sync data cleanup
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2025-11-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Index completed tasks by completion time for old-data cleanup"""
+    op.create_index('idx_task_status_completed', 'tasks', ['status', 'completedAt'])
+
+def downgrade():
+    """Remove cleanup index"""
+    op.drop_index('idx_task_status_completed', table_name='tasks')
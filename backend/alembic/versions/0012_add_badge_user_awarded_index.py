@@ -0,0 +1,23 @@
+"""add userId/awardedAt index to badges for delta sync
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2025-11-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Index badges by user and award time for sync deltas"""
+    op.create_index('idx_badge_user_awarded', 'badges', ['userId', 'awardedAt'])
+
+def downgrade():
+    """Remove badge sync index"""
+    op.drop_index('idx_badge_user_awarded', table_name='badges')
@@ -0,0 +1,31 @@
+"""add taskId/action/occurrence_date expression index to task_logs
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2025-11-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Index recurring task occurrence markers (Postgres only)"""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.create_index(
+        'idx_tasklog_occurrence',
+        'task_logs',
+        ['taskId', 'action', sa.text("(metadata->>'occurrence_date')")]
+    )
+
+def downgrade():
+    """Remove occurrence marker index"""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('idx_tasklog_occurrence', table_name='task_logs')
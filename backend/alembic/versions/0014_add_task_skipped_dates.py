@@ -0,0 +1,26 @@
+"""add skippedDates to tasks for RRULE exclusions
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2025-11-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Add skippedDates (ISO dates excluded from a recurring task's RRULE)"""
+    bind = op.get_bind()
+    column_type = sa.JSON() if bind.dialect.name == 'sqlite' else postgresql.ARRAY(sa.String())
+    op.add_column('tasks', sa.Column('skippedDates', column_type, nullable=False, server_default='{}'))
+
+def downgrade():
+    """Remove skippedDates"""
+    op.drop_column('tasks', 'skippedDates')
@@ -6,12 +6,14 @@ import os
 import json
 import hashlib
 from typing import Optional, Dict, Any
+import redis as sync_redis
 from redis.asyncio import Redis, from_url
 from redis.exceptions import RedisError
 
 # Redis connection
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 _redis_client: Optional[Redis] = None
+_sync_redis_client: Optional[sync_redis.Redis] = None
 
 async def get_redis() -> Redis:
     """Get or create Redis connection"""
@@ -20,6 +22,24 @@ async def get_redis() -> Redis:
         _redis_client = from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
     return _redis_client
 
+def get_sync_redis() -> sync_redis.Redis:
+    """
+    Get or create a blocking Redis connection for synchronous services.
+
+    Uses short timeouts so an unreachable Redis degrades to the caller's
+    fallback path instead of stalling the request.
+    """
+    global _sync_redis_client
+    if _sync_redis_client is None:
+        _sync_redis_client = sync_redis.Redis.from_url(
+            REDIS_URL,
+            encoding="utf-8",
+            decode_responses=True,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+    return _sync_redis_client
+
 def cache_key(prompt: str, model: str, temperature: float) -> str:
     """Generate cache key from prompt + model + temperature"""
     key_str = f"{prompt}|{model}|{temperature}"
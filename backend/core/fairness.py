@@ -201,7 +201,8 @@ class FairnessEngine:
         self,
         task: models.Task,
         eligible_users: List[models.User],
-        occurrence_date: Optional[date] = None
+        occurrence_date: Optional[date] = None,
+        workloads: Optional[Dict[Tuple[str, date], float]] = None
     ) -> Optional[str]:
         """
         Suggest best assignee based on fairness and availability.
@@ -216,6 +217,8 @@ class FairnessEngine:
             task: Task to assign
             eligible_users: List of users who can be assigned
             occurrence_date: Specific occurrence date (for recurring tasks)
+            workloads: Optional (user_id, week_start) -> workload cache, filled
+                on first use so batch callers only query each week once
 
         Returns:
             User ID of suggested assignee, or None if no suitable user
@@ -241,7 +244,13 @@ class FairnessEngine:
             if user.role == "helper":
                 continue
 
-            workload = self.calculate_workload(user.id, week_start)
+            if workloads is None:
+                workload = self.calculate_workload(user.id, week_start)
+            else:
+                key = (user.id, week_start)
+                if key not in workloads:
+                    workloads[key] = self.calculate_workload(user.id, week_start)
+                workload = workloads[key]
             capacity = self.get_user_capacity(user)
 
             # Check if user is at capacity (>90% loaded)
@@ -331,7 +340,8 @@ class FairnessEngine:
     def rotate_assignee(
         self,
         task_template: models.Task,
-        occurrence_date: date
+        occurrence_date: date,
+        persist: bool = True
     ) -> Optional[str]:
         """
         Get next assignee for recurring task based on rotation strategy.
@@ -339,6 +349,8 @@ class FairnessEngine:
         Args:
             task_template: Recurring task template
             occurrence_date: Date of specific occurrence
+            persist: Commit round-robin state immediately; batch callers
+                pass False and commit once themselves
 
         Returns:
             User ID of assigned user, or None for manual assignment
@@ -349,7 +361,7 @@ class FairnessEngine:
         rotation_strategy = getattr(task_template, "rotationStrategy", "manual")
 
         if rotation_strategy == "round_robin":
-            return self._rotate_round_robin(task_template, occurrence_date)
+            return self._rotate_round_robin(task_template, occurrence_date, persist)
 
         elif rotation_strategy == "fairness":
             # Use fairness-based suggestion
@@ -367,7 +379,90 @@ class FairnessEngine:
             # Return None - parent must assign manually
             return None
 
-    def _rotate_round_robin(self, task_template: models.Task, occurrence_date: date) -> str:
+    def rotate_assignees(
+        self,
+        task_template: models.Task,
+        occurrence_dates: List[date],
+        persist: bool = True
+    ) -> List[Optional[str]]:
+        """
+        Get assignees for many occurrences of a recurring task at once.
+
+        Same rules as rotate_assignee, but eligible users are loaded once and
+        fairness workloads are computed once per user and week, then updated
+        in memory as occurrences are assigned.
+
+        Args:
+            task_template: Recurring task template
+            occurrence_dates: Occurrence dates, in order
+            persist: Commit round-robin state immediately
+
+        Returns:
+            Assignee user ID (or None) for each occurrence date
+        """
+        if not task_template.assignees or not occurrence_dates:
+            return [None] * len(occurrence_dates)
+
+        rotation_strategy = getattr(task_template, "rotationStrategy", "manual")
+        assignees = task_template.assignees
+
+        if rotation_strategy == "round_robin":
+            rotation_state = getattr(task_template, "rotationState", None) or {}
+            index = rotation_state.get("index", 0)
+
+            result = []
+            for _ in occurrence_dates:
+                result.append(assignees[index % len(assignees)])
+                index = (index + 1) % len(assignees)
+
+            task_template.rotationState = {
+                **rotation_state,
+                "index": index,
+                "lastRotationDate": occurrence_dates[-1].isoformat()
+            }
+            if persist:
+                self.db.commit()
+
+            return result
+
+        elif rotation_strategy == "fairness":
+            eligible_users = self.db.query(models.User).filter(
+                models.User.id.in_(assignees)
+            ).all()
+            users_by_id = {user.id: user for user in eligible_users}
+            workloads: Dict[Tuple[str, date], float] = {}
+
+            result = []
+            for occurrence_date in occurrence_dates:
+                assignee = self.suggest_assignee(
+                    task_template, eligible_users, occurrence_date, workloads
+                )
+                result.append(assignee)
+
+                # Count the new occurrence against the assignee's week
+                capacity = self.get_user_capacity(users_by_id[assignee]) if assignee in users_by_id else 0
+                if capacity:
+                    week_start = occurrence_date - timedelta(days=occurrence_date.weekday())
+                    key = (assignee, week_start)
+                    if key not in workloads:
+                        workloads[key] = self.calculate_workload(assignee, week_start)
+                    workloads[key] += (task_template.estDuration or 0) / capacity
+
+            return result
+
+        elif rotation_strategy == "random":
+            import random
+            return [random.choice(assignees) for _ in occurrence_dates]
+
+        else:  # manual
+            return [None] * len(occurrence_dates)
+
+    def _rotate_round_robin(
+        self,
+        task_template: models.Task,
+        occurrence_date: date,
+        persist: bool = True
+    ) -> str:
         """
         Round-robin rotation through assignees list.
 
@@ -376,6 +471,7 @@ class FairnessEngine:
         Args:
             task_template: Task template with assignees
             occurrence_date: Date of occurrence
+            persist: Commit the updated rotation state
 
         Returns:
             User ID of next assignee in rotation
@@ -393,12 +489,15 @@ class FairnessEngine:
 
         # Update rotation state (will be saved when task instance is created)
         next_index = (current_index + 1) % len(assignees)
-        rotation_state["index"] = next_index
-        rotation_state["lastRotationDate"] = occurrence_date.isoformat()
 
-        # Update task template rotation state in database
-        task_template.rotationState = rotation_state
-        self.db.commit()
+        # Assign a new dict so the JSON column change is detected on flush
+        task_template.rotationState = {
+            **rotation_state,
+            "index": next_index,
+            "lastRotationDate": occurrence_date.isoformat()
+        }
+        if persist:
+            self.db.commit()
 
         return assignee
 
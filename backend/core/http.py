@@ -0,0 +1,60 @@
+"""
+Shared outbound HTTP clients
+Pooled httpx clients reused across requests (keep-alive, HTTP/2 when available)
+"""
+import importlib.util
+from typing import Dict, Union
+
+import httpx
+
+# Multiplex concurrent calls over one connection when h2 is installed
+# (httpx[http2]); otherwise fall back to HTTP/1.1 pooling
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_http_client(
+    name: str,
+    timeout: Union[float, httpx.Timeout],
+    max_keepalive_connections: int = 20,
+    max_connections: int = 100,
+    keepalive_expiry: float = 5.0
+) -> httpx.AsyncClient:
+    """
+    Get or create the shared HTTP client registered under `name`.
+
+    Each caller uses its own name so pool sizes and timeouts stay separate;
+    the settings only apply when the client is (re)created.
+
+    Args:
+        name: Client name (one per outbound integration)
+        timeout: Default request timeout (seconds or httpx.Timeout)
+        max_keepalive_connections: Idle connections kept in the pool
+        max_connections: Maximum concurrent connections
+        keepalive_expiry: Seconds an idle connection is kept open
+
+    Returns:
+        Pooled httpx.AsyncClient
+    """
+    client = _http_clients.get(name)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_keepalive_connections=max_keepalive_connections,
+                max_connections=max_connections,
+                keepalive_expiry=keepalive_expiry
+            )
+        )
+        _http_clients[name] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close every shared HTTP client (called on app shutdown)"""
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Optional, List
 import uuid
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Text, JSON, Index
+from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Text, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB as PGJSONB, ARRAY as PGARRAY
 from core.db import Base
 
@@ -80,6 +80,11 @@ class User(Base):
     helperStartDate: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     helperEndDate: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
+    # Gamification counters (denormalized, updated on task completion)
+    tasksCompletedCount: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    # Current points balance (sum of points_ledger deltas, updated by award_points)
+    pointsBalance: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+
     createdAt: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
     updatedAt: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -134,6 +139,7 @@ class Event(Base):
     __table_args__ = (
         Index('idx_event_family_start', 'familyId', 'start'),
         Index('idx_event_family_category', 'familyId', 'category'),
+        Index('idx_event_family_updated', 'familyId', 'updatedAt'),
     )
 
     def __repr__(self):
@@ -158,6 +164,7 @@ class Task(Base):
     # Rotation for recurring tasks
     rotationStrategy: Mapped[str] = mapped_column(String, default="manual")  # round_robin|fairness|manual|random
     rotationState: Mapped[dict] = mapped_column(JSONB, default=dict, server_default='{}')  # Tracks rotation index, last rotation date
+    skippedDates: Mapped[List[str]] = mapped_column(ARRAY(String), default=list, server_default='{}')  # ISO dates excluded from rrule (EXDATE)
 
     # Assignment
     assignees: Mapped[List[str]] = mapped_column(ARRAY(String), default=list, server_default='{}')
@@ -200,6 +207,8 @@ class Task(Base):
         Index('idx_task_family_status', 'familyId', 'status'),
         Index('idx_task_family_due', 'familyId', 'due'),
         Index('idx_task_claimable', 'familyId', 'claimable', 'status'),
+        Index('idx_task_family_updated', 'familyId', 'updatedAt'),
+        Index('idx_task_status_completed', 'status', 'completedAt'),
     )
 
     def __repr__(self):
@@ -223,6 +232,13 @@ class TaskLog(Base):
     # Relationships
     task = relationship("Task", back_populates="task_logs")
 
+    # Indexes
+    __table_args__ = (
+        # Occurrence markers (generated/skipped) looked up by JSON key; Postgres only
+        Index('idx_tasklog_occurrence', 'taskId', 'action',
+              text("(metadata->>'occurrence_date')")).ddl_if(dialect='postgresql'),
+    )
+
     def __repr__(self):
         return f"<TaskLog(id={self.id}, taskId={self.taskId}, action={self.action})>"
 
@@ -265,6 +281,7 @@ class Badge(Base):
     # Index for user badges
     __table_args__ = (
         Index('idx_badge_user_code', 'userId', 'code'),
+        Index('idx_badge_user_awarded', 'userId', 'awardedAt'),
     )
 
     def __repr__(self):
@@ -426,6 +443,9 @@ class Notification(Base):
     __table_args__ = (
         Index('idx_notification_user_status', 'userId', 'status'),
         Index('idx_notification_scheduled', 'scheduledFor', 'status'),
+        Index('idx_notification_pending_due', 'scheduledFor',
+              postgresql_where=text("status = 'pending'")),
+        Index('idx_notification_user_type_created', 'userId', 'type', 'createdAt'),
     )
 
     def __repr__(self):
@@ -453,6 +473,10 @@ class WebPushSub(Base):
     auth: Mapped[str] = mapped_column(String, nullable=False)
     createdAt: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index('idx_webpush_user_endpoint', 'userId', 'endpoint'),
+    )
+
     def __repr__(self):
         return f"<WebPushSub(id={self.id}, userId={self.userId})>"
 
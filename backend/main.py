@@ -5,6 +5,8 @@ from routers import (
     auth, users, tasks, calendar, rewards, ai, gamification, notify, media, ws,
     notifications, fairness, helpers, translations, premium, kiosk, voice, study, gdpr
 )
+from core.http import close_http_clients
+from services import notification_service, premium_service
 
 app = FastAPI(
     title="FamQuest API",
@@ -61,5 +63,31 @@ app.include_router(kiosk.router, prefix="/kiosk", tags=["kiosk"])
 # Real-time
 app.include_router(ws.router, tags=["realtime"])
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+
+
+@app.on_event("startup")
+async def init_push_backends():
+    """Initialize push notification backends (Firebase) once per process."""
+    notification_service.init_push_backends()
+
+
+@app.on_event("startup")
+async def start_background_writers():
+    """Start buffered writers for high-volume audit logs."""
+    premium_service.start_usage_writer()
+
+
+@app.on_event("shutdown")
+async def flush_background_writers():
+    """Flush buffered audit log rows before the process exits."""
+    await premium_service.stop_usage_writer()
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Release pooled outbound HTTP connections."""
+    await close_http_clients()
+
+
 @app.get("/health")
 def health(): return {"status":"ok"}
@@ -5,7 +5,7 @@ Endpoints for points, badges, streaks, leaderboards, and rewards.
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -63,6 +63,29 @@ async def get_gamification_profile(
     return profile
 
 
+@router.get("/extras")
+async def get_post_completion_extras(
+    d: Session = Depends(db),
+    payload=Depends(get_current_user)
+):
+    """
+    Get follow-up data for the completion screen.
+
+    Fetched by the client after POST /tasks/{id}/complete returns, so the
+    completion response itself stays fast.
+
+    Returns:
+        - close_to_unlock: Badges above 75% progress
+        - leaderboard_position: Weekly family rank (None if unranked)
+    """
+    extras = gamification_service.get_post_completion_extras(payload["sub"], d)
+
+    if "error" in extras:
+        raise HTTPException(404, extras["error"])
+
+    return extras
+
+
 @router.get("/leaderboard")
 async def get_family_leaderboard(
     family_id: str = Query(...),
@@ -82,7 +105,7 @@ async def get_family_leaderboard(
     Returns:
         List of top users by points with rankings
     """
-    leaderboard = gamification_service.points_service.get_leaderboard(
+    leaderboard = await gamification_service.points_service.get_leaderboard_cached(
         family_id=family_id,
         db=d,
         period=period,
@@ -130,6 +153,7 @@ async def redeem_reward(
             db=d,
             require_approval=body.require_approval
         )
+        await gamification_service.points_service.invalidate_leaderboard_cache(reward.familyId)
 
         return result
 
@@ -263,9 +287,15 @@ async def get_affordable_rewards(
     }
 
 
+def preview_cache() -> dict:
+    """Request-scoped memo for streak/badge lookups shared by task previews"""
+    return {}
+
+
 @router.get("/task/{task_id}/preview")
 async def preview_task_rewards(
     task_id: str,
+    cache: dict = Depends(preview_cache),
     d: Session = Depends(db),
     payload=Depends(get_current_user)
 ):
@@ -297,7 +327,8 @@ async def preview_task_rewards(
     preview = gamification_service.preview_task_rewards(
         task=task,
         user=user,
-        db=d
+        db=d,
+        cache=cache
     )
 
     return {
@@ -307,9 +338,57 @@ async def preview_task_rewards(
     }
 
 
+@router.get("/tasks/preview")
+async def preview_tasks_rewards(
+    task_ids: List[str] = Query(..., max_length=100),
+    cache: dict = Depends(preview_cache),
+    d: Session = Depends(db),
+    payload=Depends(get_current_user)
+):
+    """
+    Preview points and potential badges for a list of tasks.
+
+    Streak stats and badge progress are loaded once for the whole list.
+
+    Args:
+        task_ids: Task IDs (unknown IDs are skipped)
+
+    Returns:
+        - previews: One preview per task, in request order
+    """
+    from core.models import Task, User
+
+    user_id = payload["sub"]
+
+    user = d.query(User).filter_by(id=user_id).first()
+    if not user:
+        raise HTTPException(404, "User not found")
+
+    tasks = {task.id: task for task in d.query(Task).filter(Task.id.in_(task_ids)).all()}
+
+    previews = [
+        {
+            "task_id": task_id,
+            **gamification_service.preview_task_rewards(
+                task=tasks[task_id],
+                user=user,
+                db=d,
+                cache=cache
+            )
+        }
+        for task_id in task_ids
+        if task_id in tasks
+    ]
+
+    return {
+        "user_id": user_id,
+        "previews": previews
+    }
+
+
 # Legacy endpoints (kept for backward compatibility)
 @router.post("/award_points", dependencies=[Depends(require_role(["parent"]))])
-def award_points_legacy(
+async def award_points_legacy(
     userId: str,
     delta: int,
     reason: str = "",
@@ -321,7 +400,7 @@ def award_points_legacy(
 
     Use new gamification service for automatic point awards.
     """
-    gamification_service.points_service.award_points(
+    new_balance = gamification_service.points_service.award_points(
         user_id=userId,
         task_id=None,
         points=delta,
@@ -331,11 +410,16 @@ def award_points_legacy(
 
     d.commit()
 
+    from core.models import User
+    user = d.query(User).filter_by(id=userId).first()
+    if user:
+        await gamification_service.points_service.invalidate_leaderboard_cache(user.familyId)
+
     return {
         "ok": True,
         "user_id": userId,
         "delta": delta,
-        "new_balance": gamification_service.points_service.get_user_points(userId, d)
+        "new_balance": new_balance
     }
 
 
@@ -3,7 +3,7 @@ Premium Router
 Stripe integration + In-App Purchase verification for FamQuest monetization
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from core.db import SessionLocal
 from core.models import User
@@ -120,6 +120,22 @@ async def get_pricing():
     return service.get_pricing()
 
 
+@router.get("/products")
+async def get_products():
+    """
+    Get in-app purchase product catalog.
+
+    Returns:
+    [
+        {"id": "app.famquest.family_unlock", "name": "Family Unlock", "price": 9.99, ...},
+        ...
+    ]
+    """
+
+    iap_service = IAPVerificationService()
+    return Response(content=iap_service.get_all_products_json(), media_type="application/json")
+
+
 @router.post("/checkout")
 async def create_checkout_session(
     req: CheckoutRequest,
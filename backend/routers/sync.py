@@ -11,14 +11,17 @@ Features:
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from pydantic import BaseModel, Field
 from core.db import SessionLocal
 from core.deps import get_current_user
 from core import models
+from services.sync_service import SyncService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -172,11 +175,17 @@ def fetch_server_changes(
             client_timestamp=event.updatedAt
         ))
 
+    # Resolve family members once; the per-user tables are then filtered
+    # on their (userId, ...) indexes instead of each joining users
+    member_ids = [
+        user_id for (user_id,) in db.query(models.User.id).filter(
+            models.User.familyId == family_id
+        ).all()
+    ]
+
     # PointsLedger entries (new awards since last sync)
-    points = db.query(models.PointsLedger).join(
-        models.User, models.PointsLedger.userId == models.User.id
-    ).filter(
-        models.User.familyId == family_id,
+    points = db.query(models.PointsLedger).filter(
+        models.PointsLedger.userId.in_(member_ids),
         models.PointsLedger.createdAt > since
     ).all()
 
@@ -199,10 +208,8 @@ def fetch_server_changes(
         ))
 
     # UserStreak updates
-    streaks = db.query(models.UserStreak).join(
-        models.User, models.UserStreak.userId == models.User.id
-    ).filter(
-        models.User.familyId == family_id,
+    streaks = db.query(models.UserStreak).filter(
+        models.UserStreak.userId.in_(member_ids),
         models.UserStreak.updatedAt > since
     ).all()
 
@@ -224,10 +231,8 @@ def fetch_server_changes(
         ))
 
     # Badge unlocks
-    badges = db.query(models.Badge).join(
-        models.User, models.Badge.userId == models.User.id
-    ).filter(
-        models.User.familyId == family_id,
+    badges = db.query(models.Badge).filter(
+        models.Badge.userId.in_(member_ids),
         models.Badge.awardedAt > since
     ).all()
 
@@ -262,7 +267,7 @@ def apply_task_change(
     2. Delete always wins
     3. Version mismatch: Check timestamps for Last-Writer-Wins
     """
-    task = db.query(models.Task).filter(models.Task.id == change.entity_id).first()
+    task = db.get(models.Task, change.entity_id)
 
     # Handle DELETE action
     if change.action == "delete":
@@ -425,7 +430,7 @@ def apply_event_change(
     current_user: Dict[str, Any]
 ) -> Dict[str, Any]:
     """Apply event change (simplified - events don't have version field yet)"""
-    event = db.query(models.Event).filter(models.Event.id == change.entity_id).first()
+    event = db.get(models.Event, change.entity_id)
 
     if change.action == "delete":
         if event:
@@ -493,6 +498,36 @@ def _event_to_dict(event: models.Event) -> Dict[str, Any]:
     }
 
 
+_SYNC_MODELS = {"task": models.Task, "event": models.Event}
+
+
+def prefetch_sync_entities(
+    db: Session,
+    refs: Iterable[Tuple[str, str]]
+) -> List[Any]:
+    """
+    Load every task/event referenced by a batch with one query per type.
+
+    The rows land in the session's identity map, so the db.get() lookups in
+    apply_task_change / apply_event_change don't query per change. The
+    identity map holds rows weakly: keep the returned list alive while the
+    batch is applied.
+
+    Args:
+        refs: (entity_type, entity_id) pairs from the batch
+    """
+    ids_by_type = defaultdict(set)
+    for entity_type, entity_id in refs:
+        if entity_type in _SYNC_MODELS and entity_id:
+            ids_by_type[entity_type].add(entity_id)
+
+    loaded = []
+    for entity_type, ids in ids_by_type.items():
+        model = _SYNC_MODELS[entity_type]
+        loaded.extend(db.query(model).filter(model.id.in_(ids)).all())
+    return loaded
+
+
 def apply_client_change(
     db: Session,
     change: SyncEntity,
@@ -559,7 +594,11 @@ async def delta_sync(
         # 1. Fetch all server changes since last_sync_at
         server_changes = fetch_server_changes(db, family_id, request.last_sync_at)
 
-        # 2. Apply client changes to server (in transaction)
+        # 2. Apply client changes to server (in transaction); prefetched
+        # holds the referenced rows so per-change lookups skip the database
+        prefetched = prefetch_sync_entities(
+            db, ((change.entity_type, change.entity_id) for change in request.changes)
+        )
         for change in request.changes:
             try:
                 result = apply_client_change(db, change, current_user)
@@ -611,3 +650,32 @@ async def delta_sync(
         db.rollback()
         logger.error(f"Sync failed for user {user_id}: {e}")
         raise HTTPException(500, f"Sync failed: {str(e)}")
+
+
+@router.get("/changes")
+def stream_family_changes(
+    since: datetime,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Stream all family changes since a timestamp as JSON.
+
+    Meant for devices reconnecting after a long time offline: rows are
+    fetched and written in batches instead of building the whole delta in
+    memory. The body has the same shape as
+    SyncService.get_family_changes_since().
+    """
+    family_id = current_user.get("familyId")
+
+    if not family_id:
+        raise HTTPException(400, "User family not found")
+
+    def body():
+        # Own session: the stream outlives the request's dependencies
+        db = SessionLocal()
+        try:
+            yield from SyncService.iter_family_changes_json(db, family_id, since)
+        finally:
+            db.close()
+
+    return StreamingResponse(body(), media_type="application/json")
@@ -342,22 +342,36 @@ async def complete_task(
         taskId=task_id,
         userId=user.id,
         action="completed",
-        metadata={},
+        meta={},
         createdAt=completion_time
     )
     d.add(task_log)
     d.flush()
 
-    # Trigger gamification system
-    gamification_result = gamification_service.on_task_completed(
-        task=task,
-        user=user,
-        completion_time=completion_time,
-        db=d,
-        approval_rating=None  # Will be updated on parent approval
-    )
+    # Trigger gamification system; task update, gamification writes and
+    # audit entry share one transaction
+    try:
+        gamification_result = gamification_service.on_task_completed(
+            task=task,
+            user=user,
+            completion_time=completion_time,
+            db=d,
+            approval_rating=None  # Will be updated on parent approval
+        )
+
+        # Audit log
+        audit(d, actorUserId=user.id, familyId=user.familyId,
+              action="task.complete", meta=task.title)
+
+        d.commit()
+
+    except Exception as e:
+        d.rollback()
+        raise HTTPException(500, f"Failed to complete task: {str(e)}")
 
-    # Send notifications
+    await gamification_service.points_service.invalidate_leaderboard_cache(user.familyId)
+
+    # Queue parent notifications (delivered by the notification worker)
     notification_service = NotificationService(d)
 
     if task.parentApproval:
@@ -368,7 +382,7 @@ async def complete_task(
         ).first()
 
         if parent:
-            await notification_service.send_notification(
+            await notification_service.enqueue(
                 user_id=parent.id,
                 notification_type='task_approval_requested',
                 title=f'{user.displayName} completed a task',
@@ -384,7 +398,7 @@ async def complete_task(
         ).first()
 
         if parent:
-            await notification_service.send_notification(
+            await notification_service.enqueue(
                 user_id=parent.id,
                 notification_type='task_completed',
                 title=f'{user.displayName} completed a task',
@@ -392,11 +406,6 @@ async def complete_task(
                 data={'task_id': task_id, 'completed_by': user.id}
             )
 
-    # Audit log
-    audit(d, actorUserId=user.id, familyId=user.familyId,
-          action="task.complete", meta=task.title)
-
-    d.commit()
     d.refresh(task)
 
     return {
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Notification queue worker
+Delivers notifications queued with NotificationService.enqueue()
+
+Usage: python scripts/notification_worker.py [consumer-name]
+"""
+
+import asyncio
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.notification_service import run_worker
+
+
+if __name__ == "__main__":
+    consumer = sys.argv[1] if len(sys.argv) > 1 else f"{socket.gethostname()}-{os.getpid()}"
+    asyncio.run(run_worker(consumer))
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Points balance reconciliation
+Rebuilds users.pointsBalance from the points ledger
+
+Usage: python scripts/reconcile_points_balances.py [user-id ...]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from core.db import SessionLocal
+from services.points_service import PointsService
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        updated = PointsService().reconcile_points_balances(db, sys.argv[1:] or None)
+        print(f"Reconciled points balance for {updated} users")
+    finally:
+        db.close()
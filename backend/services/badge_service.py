@@ -6,7 +6,7 @@ Manages badge definitions and awarding logic with persona-specific motivations.
 from typing import List, Dict, Optional, Callable
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, exists, or_
 from core.models import Badge, User, Task, TaskLog, PointsLedger, UserStreak, AuditLog
 from uuid import uuid4
 
@@ -350,7 +350,18 @@ class BadgeService:
             List of badge dictionaries with details
         """
         badges = db.query(Badge).filter_by(userId=user_id).order_by(Badge.awardedAt.desc()).all()
+        return self.format_user_badges(badges)
 
+    def format_user_badges(self, badges: List[Badge]) -> List[Dict]:
+        """
+        Format already loaded badges with definition metadata.
+
+        Args:
+            badges: Badge records, newest first
+
+        Returns:
+            List of badge dictionaries with details
+        """
         result = []
         for badge in badges:
             badge_def = self.badges.get(badge.code)
@@ -472,6 +483,72 @@ class BadgeService:
 
         return progress
 
+    def get_close_to_unlock(
+        self,
+        user_id: str,
+        threshold: float,
+        db: Session,
+        limit: int = 10
+    ) -> Dict[str, Dict]:
+        """
+        Return unearned badges whose progress is at or above threshold.
+
+        Args:
+            user_id: User ID
+            threshold: Minimum progress ratio (0.0-1.0)
+            db: Database session
+            limit: Maximum number of badges to return
+
+        Returns:
+            Dict mapping badge code to progress info, closest first
+        """
+        progress = self.get_badge_progress(user_id, db)
+
+        close = sorted(
+            (item for item in progress.items() if item[1]["progress"] >= threshold),
+            key=lambda item: item[1]["progress"],
+            reverse=True
+        )
+
+        return dict(close[:limit])
+
+    def has_any_progress(self, user_id: str, db: Session) -> bool:
+        """
+        Check whether user has any activity that counts toward a badge.
+
+        Single EXISTS query over the sources get_badge_progress() reads
+        (completion/approval logs, tasks completed or claimed by the user,
+        and an active streak). When False, every badge is at zero progress
+        and the full computation can be skipped.
+
+        Args:
+            user_id: User ID
+            db: Database session
+
+        Returns:
+            True if at least one badge-relevant record exists
+        """
+        has_logs = exists().where(
+            TaskLog.userId == user_id,
+            TaskLog.action.in_(("completed", "approved"))
+        )
+        has_claims = exists().where(
+            Task.claimedBy == user_id,
+            Task.status == "done"
+        )
+        # Completions applied via sync set completedBy without a TaskLog
+        has_completions = exists().where(
+            Task.completedBy == user_id,
+            Task.status == "done"
+        )
+        has_streak = exists().where(
+            UserStreak.userId == user_id,
+            UserStreak.currentStreak > 0
+        )
+        return bool(db.query(
+            or_(has_logs, has_claims, has_completions, has_streak)
+        ).scalar())
+
     def _get_user_stats(self, user_id: str, task: Optional[Task], db: Session) -> Dict:
         """Calculate user statistics for badge evaluation."""
 
@@ -493,7 +570,7 @@ class BadgeService:
         five_star_count = db.query(func.count(TaskLog.id)).filter(
             TaskLog.userId == user_id,
             TaskLog.action == "approved",
-            TaskLog.meta["rating"].astext.cast(db.bind.dialect.type_descriptor(db.Integer)) >= 5
+            TaskLog.meta["rating"].as_integer() >= 5
         ).scalar() or 0
         stats["five_star_tasks"] = five_star_count
 
@@ -5,20 +5,47 @@ Central handler for all gamification logic on task completion.
 
 from typing import Dict, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from core.models import Task, User
 from services.streak_service import StreakService
 from services.badge_service import BadgeService
 from services.points_service import PointsService
 
 
+# Milestones highlighted as special achievements
+_STREAK_MILESTONES = frozenset({3, 7, 14, 30})
+_TASK_MILESTONES = frozenset({10, 25, 50, 100})
+
+# Special achievement templates; "{}" in a message is filled per completion
+_FIRST_TASK = {"type": "first_task", "message": "Your first task completed!", "icon": "🎉"}
+_HIGH_POINTS = {"type": "high_points", "message": "Wow! {} points earned!", "icon": "💰"}
+_BADGE_COMBO = {"type": "badge_combo", "message": "Earned {} badges at once!", "icon": "🏅"}
+_STREAK_MILESTONE = {"type": "streak_milestone", "message": "{}-day streak achieved!", "icon": "🔥"}
+_PERSONAL_BEST = {"type": "personal_best", "message": "New personal best streak!", "icon": "👑"}
+_TASK_MILESTONE = {"type": "task_milestone", "message": "{} tasks completed!", "icon": "⭐"}
+
+
+def _achievement(template: Dict, value: Optional[int] = None) -> Dict:
+    """Copy an achievement template, filling its message with value if given."""
+    achievement = dict(template)
+    if value is not None:
+        achievement["message"] = template["message"].format(value)
+    return achievement
+
+# Shared sub-services (stateless apart from the badge definitions, which
+# are built once per process instead of per GamificationService)
+_STREAK = StreakService()
+_BADGE = BadgeService()
+_POINTS = PointsService()
+
+
 class GamificationService:
     """Orchestrates all gamification services on task completion."""
 
     def __init__(self):
-        self.streak_service = StreakService()
-        self.badge_service = BadgeService()
-        self.points_service = PointsService()
+        self.streak_service = _STREAK
+        self.badge_service = _BADGE
+        self.points_service = _POINTS
 
     def on_task_completed(
         self,
@@ -35,7 +62,14 @@ class GamificationService:
         1. Points calculation and award
         2. Streak tracking and updates
         3. Badge checking and awards
-        4. Statistics gathering for UI
+        4. Special achievements for UI animations
+
+        Leaderboard rank and near-unlock badges are not part of this
+        response; clients fetch them via get_post_completion_extras().
+
+        Writes are flushed but not committed, so the caller can complete
+        the task and its gamification in one transaction. On error the
+        exception propagates and the caller is responsible for rollback.
 
         Args:
             task: Task that was completed
@@ -51,110 +85,122 @@ class GamificationService:
             "success": True,
             "user_id": user.id,
             "task_id": task.id,
-            "completion_time": completion_time.isoformat()
+            "completion_time": completion_time.isoformat(timespec="seconds")
         }
 
-        try:
-            # 1. Calculate and award points
-            points, multipliers = self.points_service.calculate_points(
-                task=task,
-                user=user,
-                completion_time=completion_time,
-                approval_rating=approval_rating
-            )
+        # 1. Calculate and award points
+        points, multipliers = self.points_service.calculate_points(
+            task=task,
+            user=user,
+            completion_time=completion_time,
+            approval_rating=approval_rating
+        )
 
-            self.points_service.award_points(
-                user_id=user.id,
-                task_id=task.id,
-                points=points,
-                reason="task_completed",
-                db=db
-            )
+        total_points = self.points_service.award_points(
+            user_id=user.id,
+            task_id=task.id,
+            points=points,
+            reason="task_completed",
+            db=db
+        )
 
-            result["points_earned"] = points
-            result["multipliers"] = [
-                {"name": name, "value": value} for name, value in multipliers
-            ]
-            result["total_points"] = self.points_service.get_user_points(user.id, db)
+        result["points_earned"] = points
+        result["multipliers"] = {
+            "names": [m[0] for m in multipliers],
+            "values": [m[1] for m in multipliers]
+        }
+        result["total_points"] = total_points
 
-            # 2. Update streak
-            streak_stats = self.streak_service.update_streak(
-                user_id=user.id,
-                completed_date=completion_time.date(),
-                db=db
-            )
+        # Bump completed-task counter atomically in this transaction
+        total_tasks = (user.tasksCompletedCount or 0) + 1
+        db.query(User).filter_by(id=user.id).update(
+            {User.tasksCompletedCount: User.tasksCompletedCount + 1}
+        )
 
-            result["streak"] = streak_stats
+        # 2. Update streak
+        streak_stats = self.streak_service.update_streak(
+            user_id=user.id,
+            completed_date=completion_time.date(),
+            db=db
+        )
 
-            # 3. Check and award badges
-            new_badges = self.badge_service.check_and_award_badges(
-                user_id=user.id,
-                task=task,
-                db=db
-            )
+        result["streak"] = streak_stats
 
-            # Format badge data for UI
-            result["new_badges"] = []
-            for badge in new_badges:
-                badge_def = self.badge_service.badges.get(badge.code)
-                if badge_def:
-                    result["new_badges"].append({
-                        "id": badge.id,
-                        "code": badge.code,
-                        "name": badge_def.name,
-                        "description": badge_def.description,
-                        "icon": badge_def.icon,
-                        "category": badge_def.category
-                    })
-
-            # 4. Get badge progress for next unlocks
-            badge_progress = self.badge_service.get_badge_progress(user.id, db)
-
-            # Find badges close to unlocking (>75% progress)
-            close_badges = {
-                code: data for code, data in badge_progress.items()
-                if data["progress"] >= 0.75
-            }
+        # 3. Check and award badges
+        new_badges = self.badge_service.check_and_award_badges(
+            user_id=user.id,
+            task=task,
+            db=db
+        )
 
-            result["close_to_unlock"] = close_badges
+        # Format badge data for UI
+        result["new_badges"] = []
+        for badge in new_badges:
+            badge_def = self.badge_service.badges.get(badge.code)
+            if badge_def:
+                result["new_badges"].append({
+                    "id": badge.id,
+                    "code": badge.code,
+                    "name": badge_def.name,
+                    "description": badge_def.description,
+                    "icon": badge_def.icon,
+                    "category": badge_def.category
+                })
 
-            # 5. Get leaderboard position
-            leaderboard = self.points_service.get_leaderboard(
-                family_id=user.familyId,
-                db=db,
-                period="week"
-            )
+        # 4. Check for special achievements
+        achievements = self._check_special_achievements(
+            user=user,
+            task=task,
+            points_earned=points,
+            new_badges=new_badges,
+            streak_stats=streak_stats,
+            total_tasks=total_tasks
+        )
 
-            user_rank = None
-            for entry in leaderboard:
-                if entry["user_id"] == user.id:
-                    user_rank = entry["rank"]
-                    break
-
-            result["leaderboard_position"] = user_rank
-
-            # 6. Check for special achievements
-            achievements = self._check_special_achievements(
-                user=user,
-                task=task,
-                points_earned=points,
-                new_badges=new_badges,
-                streak_stats=streak_stats,
-                db=db
-            )
+        result["special_achievements"] = achievements
 
-            result["special_achievements"] = achievements
+        # Flush so callers see the writes; committing is left to the caller
+        db.flush()
 
-            # Commit all changes
-            db.commit()
+        return result
 
-            return result
+    def get_post_completion_extras(
+        self,
+        user_id: str,
+        db: Session
+    ) -> Dict:
+        """
+        Get secondary gamification data shown after a task completion.
+
+        Kept off the completion hot path so the completion response does
+        not wait on the leaderboard and badge progress queries.
+
+        Args:
+            user_id: User who completed the task
+            db: Database session
 
-        except Exception as e:
-            db.rollback()
-            result["success"] = False
-            result["error"] = str(e)
-            return result
+        Returns:
+            Dict with close_to_unlock badges and weekly leaderboard_position
+        """
+        user = db.query(User).filter_by(id=user_id).first()
+        if not user:
+            return {"error": "User not found"}
+
+        return {
+            "user_id": user_id,
+            # Badges close to unlocking (>75% progress)
+            "close_to_unlock": self.badge_service.get_close_to_unlock(
+                user_id=user_id,
+                threshold=0.75,
+                db=db
+            ),
+            "leaderboard_position": self.points_service.get_user_rank(
+                user_id=user_id,
+                family_id=user.familyId,
+                db=db,
+                period="week"
+            )
+        }
 
     def get_gamification_profile(
         self,
@@ -167,40 +213,48 @@ class GamificationService:
         Returns:
             Dict with all gamification data (points, badges, streaks, progress)
         """
-        user = db.query(User).filter_by(id=user_id).first()
+        # Load user with ledger, badges and streak in one round of queries
+        user = db.query(User).options(
+            selectinload(User.points_ledger),
+            selectinload(User.badges),
+            selectinload(User.streaks)
+        ).filter_by(id=user_id).first()
         if not user:
             return {"error": "User not found"}
 
-        # Points summary
-        points_summary = self.points_service.get_points_summary(user_id, db)
-
-        # Streak stats
-        streak_stats = self.streak_service.get_streak_stats(user_id, db)
-
-        # Badges
-        earned_badges = self.badge_service.get_user_badges(user_id, db)
-        badge_progress = self.badge_service.get_badge_progress(user_id, db)
-
-        # Leaderboard
-        leaderboard_week = self.points_service.get_leaderboard(
+        # Leaderboards (week and all-time from one aggregate query)
+        leaderboards = self.points_service.get_week_and_alltime_leaderboards(
             family_id=user.familyId,
             db=db,
-            period="week",
             limit=10
         )
+        leaderboard_week = leaderboards["week"]
+        leaderboard_alltime = leaderboards["alltime"]
 
-        leaderboard_alltime = self.points_service.get_leaderboard(
-            family_id=user.familyId,
-            db=db,
-            period="alltime",
-            limit=10
+        # Points summary
+        points_summary = self.points_service.summarize_ledger(
+            user_id=user_id,
+            entries=user.points_ledger,
+            alltime_leaderboard=leaderboard_alltime
+        )
+
+        # Streak stats
+        streak_stats = self.streak_service.format_streak_stats(
+            user.streaks[0] if user.streaks else None
+        )
+
+        # Badges
+        earned_badges = self.badge_service.format_user_badges(
+            sorted(user.badges, key=lambda b: b.awardedAt, reverse=True)
         )
+        badge_progress = self.badge_service.get_badge_progress(user_id, db)
 
         # Affordable rewards
         affordable_rewards = self.points_service.get_affordable_rewards(
             user_id=user_id,
             family_id=user.familyId,
-            db=db
+            db=db,
+            current_points=points_summary["current_balance"]
         )
 
         return {
@@ -232,69 +286,43 @@ class GamificationService:
         points_earned: int,
         new_badges: list,
         streak_stats: Dict,
-        db: Session
+        total_tasks: int
     ) -> list:
         """
         Check for special one-time achievements to highlight.
 
+        Args:
+            total_tasks: User's completed task count including this completion
+
         Returns:
             List of special achievement messages for UI
         """
         achievements = []
 
         # First task ever
-        total_tasks = db.query(Task).filter(
-            Task.completedBy == user.id,
-            Task.status == "done"
-        ).count()
-
         if total_tasks == 1:
-            achievements.append({
-                "type": "first_task",
-                "message": "Your first task completed!",
-                "icon": "🎉"
-            })
+            achievements.append(_achievement(_FIRST_TASK))
 
         # High points earned (>50)
         if points_earned >= 50:
-            achievements.append({
-                "type": "high_points",
-                "message": f"Wow! {points_earned} points earned!",
-                "icon": "💰"
-            })
+            achievements.append(_achievement(_HIGH_POINTS, points_earned))
 
         # Multiple new badges
         if len(new_badges) > 1:
-            achievements.append({
-                "type": "badge_combo",
-                "message": f"Earned {len(new_badges)} badges at once!",
-                "icon": "🏅"
-            })
+            achievements.append(_achievement(_BADGE_COMBO, len(new_badges)))
 
         # Streak milestones
         current_streak = streak_stats.get("current", 0)
-        if current_streak in [3, 7, 14, 30]:
-            achievements.append({
-                "type": "streak_milestone",
-                "message": f"{current_streak}-day streak achieved!",
-                "icon": "🔥"
-            })
+        if current_streak in _STREAK_MILESTONES:
+            achievements.append(_achievement(_STREAK_MILESTONE, current_streak))
 
         # Personal best streak
         if current_streak == streak_stats.get("longest", 0) and current_streak > 1:
-            achievements.append({
-                "type": "personal_best",
-                "message": "New personal best streak!",
-                "icon": "👑"
-            })
+            achievements.append(_achievement(_PERSONAL_BEST))
 
         # Round number milestones (10, 25, 50, 100 tasks)
-        if total_tasks in [10, 25, 50, 100]:
-            achievements.append({
-                "type": "task_milestone",
-                "message": f"{total_tasks} tasks completed!",
-                "icon": "⭐"
-            })
+        if total_tasks in _TASK_MILESTONES:
+            achievements.append(_achievement(_TASK_MILESTONE, total_tasks))
 
         return achievements
 
@@ -302,7 +330,8 @@ class GamificationService:
         self,
         task: Task,
         user: User,
-        db: Session
+        db: Session,
+        cache: Optional[Dict] = None
     ) -> Dict:
         """
         Preview points and potential badges for completing a task.
@@ -313,10 +342,15 @@ class GamificationService:
             task: Task to preview
             user: User who would complete it
             db: Database session
+            cache: Optional request-scoped dict; reused across previews for
+                the same user so streak and badge progress load only once
 
         Returns:
             Dict with estimated rewards
         """
+        if cache is None:
+            cache = {}
+
         # Calculate base points (no multipliers without actual completion time)
         base_points = task.points if task.points else 10
 
@@ -334,7 +368,10 @@ class GamificationService:
             estimated_points *= 1.2
 
         # Current streak bonus
-        streak_stats = self.streak_service.get_streak_stats(user.id, db)
+        streak_key = ("streak", user.id)
+        if streak_key not in cache:
+            cache[streak_key] = self.streak_service.get_streak_stats(user.id, db)
+        streak_stats = cache[streak_key]
         current_streak = streak_stats.get("current", 0)
 
         if current_streak >= 7:
@@ -345,9 +382,26 @@ class GamificationService:
             })
             estimated_points *= 1.1
 
-        # Potential badges
+        # Potential badges (skip the full progress pass for users with no
+        # badge-relevant activity yet; every badge would be at 0%)
         potential_badges = []
-        badge_progress = self.badge_service.get_badge_progress(user.id, db)
+        has_progress_key = ("has_progress", user.id)
+        if has_progress_key not in cache:
+            cache[has_progress_key] = self.badge_service.has_any_progress(user.id, db)
+
+        if not cache[has_progress_key]:
+            return {
+                "base_points": base_points,
+                "estimated_points": int(estimated_points),
+                "estimated_multipliers": estimated_multipliers,
+                "potential_badges": potential_badges,
+                "current_streak": current_streak
+            }
+
+        progress_key = ("badge_progress", user.id)
+        if progress_key not in cache:
+            cache[progress_key] = self.badge_service.get_badge_progress(user.id, db)
+        badge_progress = cache[progress_key]
 
         for code, data in badge_progress.items():
             if data["progress"] >= 0.9:  # Within 10% of unlocking
@@ -20,7 +20,9 @@ Full production implementation requires:
 import os
 import httpx
 import logging
-from typing import Dict, Any, Optional, Tuple
+import orjson
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
@@ -30,6 +32,39 @@ PRODUCT_FAMILY_UNLOCK = "app.famquest.family_unlock"
 PRODUCT_PREMIUM_MONTHLY = "app.famquest.premium_monthly"
 PRODUCT_PREMIUM_YEARLY = "app.famquest.premium_yearly"
 
+# Product catalog (static, built once at import; read-only views)
+_PRODUCTS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    PRODUCT_FAMILY_UNLOCK: MappingProxyType({
+        "id": PRODUCT_FAMILY_UNLOCK,
+        "name": "Family Unlock",
+        "type": "non_consumable",
+        "price": 9.99,
+        "currency": "EUR",
+        "description": "Unlock unlimited family members and remove ads"
+    }),
+    PRODUCT_PREMIUM_MONTHLY: MappingProxyType({
+        "id": PRODUCT_PREMIUM_MONTHLY,
+        "name": "Premium Monthly",
+        "type": "subscription",
+        "price": 4.99,
+        "currency": "EUR",
+        "period": "monthly",
+        "description": "Premium features with monthly subscription"
+    }),
+    PRODUCT_PREMIUM_YEARLY: MappingProxyType({
+        "id": PRODUCT_PREMIUM_YEARLY,
+        "name": "Premium Yearly",
+        "type": "subscription",
+        "price": 49.99,
+        "currency": "EUR",
+        "period": "yearly",
+        "description": "Premium features with yearly subscription (save 17%)"
+    })
+})
+
+# Serialized once; the catalog never changes at runtime
+_PRODUCTS_JSON: bytes = orjson.dumps([dict(product) for product in _PRODUCTS.values()])
+
 
 class IAPVerificationService:
     """In-App Purchase verification service"""
@@ -58,17 +93,18 @@ class IAPVerificationService:
         # Stub implementation for MVP
         logger.warning("iOS IAP verification is stubbed for MVP")
 
-        # In production, call App Store Server API:
+        # In production, call App Store Server API via core.http.get_http_client:
         # POST https://buy.itunes.apple.com/verifyReceipt
         # (or sandbox.itunes.apple.com for testing)
 
         # For MVP, accept all receipts if in sandbox mode
         if self.ios_sandbox:
             logger.info(f"iOS IAP (sandbox): Accepting receipt for {product_id}")
+            now = datetime.utcnow()
             return True, {
-                "transaction_id": f"ios_sandbox_{datetime.utcnow().timestamp()}",
+                "transaction_id": f"ios_sandbox_{now.timestamp()}",
                 "product_id": product_id,
-                "purchase_date": datetime.utcnow().isoformat(),
+                "purchase_date": now.isoformat(),
                 "environment": "sandbox"
             }, None
 
@@ -96,64 +132,49 @@ class IAPVerificationService:
         # Stub implementation for MVP
         logger.warning("Android IAP verification is stubbed for MVP")
 
-        # In production, call Google Play Developer API:
+        # In production, call Google Play Developer API via core.http.get_http_client:
         # GET https://androidpublisher.googleapis.com/androidpublisher/v3/applications/{packageName}/purchases/products/{productId}/tokens/{token}
         # Requires Google Play Service Account JSON
 
         # For MVP, accept all purchases if in test mode
         if self.android_test:
             logger.info(f"Android IAP (test): Accepting purchase for {product_id}")
+            now = datetime.utcnow()
             return True, {
-                "order_id": f"android_test_{datetime.utcnow().timestamp()}",
+                "order_id": f"android_test_{now.timestamp()}",
                 "product_id": product_id,
-                "purchase_time": datetime.utcnow().isoformat(),
+                "purchase_time": now.isoformat(),
                 "environment": "test"
             }, None
 
         return False, None, "Android IAP verification not implemented in MVP"
 
-    def get_product_info(self, product_id: str) -> Dict[str, Any]:
+    def get_product_info(self, product_id: str) -> Mapping[str, Any]:
         """
         Get product information by ID.
 
-        Returns product details including price and type.
+        Returns product details including price and type (read-only).
         """
-        products = {
-            PRODUCT_FAMILY_UNLOCK: {
-                "id": PRODUCT_FAMILY_UNLOCK,
-                "name": "Family Unlock",
-                "type": "non_consumable",
-                "price": 9.99,
-                "currency": "EUR",
-                "description": "Unlock unlimited family members and remove ads"
-            },
-            PRODUCT_PREMIUM_MONTHLY: {
-                "id": PRODUCT_PREMIUM_MONTHLY,
-                "name": "Premium Monthly",
-                "type": "subscription",
-                "price": 4.99,
-                "currency": "EUR",
-                "period": "monthly",
-                "description": "Premium features with monthly subscription"
-            },
-            PRODUCT_PREMIUM_YEARLY: {
-                "id": PRODUCT_PREMIUM_YEARLY,
-                "name": "Premium Yearly",
-                "type": "subscription",
-                "price": 49.99,
-                "currency": "EUR",
-                "period": "yearly",
-                "description": "Premium features with yearly subscription (save 17%)"
-            }
-        }
+        product = _PRODUCTS.get(product_id)
+        if product is not None:
+            return product
 
-        return products.get(product_id, {
+        return {
             "id": product_id,
             "name": "Unknown Product",
             "type": "unknown",
             "price": 0,
             "currency": "EUR"
-        })
+        }
+
+    def get_all_products_json(self) -> bytes:
+        """
+        Get the full product catalog as pre-serialized JSON.
+
+        Returns:
+            JSON array of all products (bytes)
+        """
+        return _PRODUCTS_JSON
 
     def calculate_expiry_date(self, product_id: str, purchase_date: datetime) -> Optional[datetime]:
         """
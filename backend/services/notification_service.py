@@ -19,20 +19,218 @@ Notification Types:
 - points_awarded (gamification feedback)
 """
 
+from collections import defaultdict
+from sqlalchemy import and_, func, insert, select, update
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
+from string import Template
+from urllib.parse import urlparse
+from redis.exceptions import RedisError
+from core.cache import get_redis
+from core.http import get_http_client
 from core.models import Notification, DeviceToken, WebPushSub, User, Task
 import os
-import json
+import html
+import hashlib
+import time
+import asyncio
+import threading
+import httpx
+import orjson
 import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Push notification clients (lazy loaded)
+# Push notification clients (set up once by init_push_backends)
 _firebase_app = None
 _firebase_messaging = None
+_push_backends_initialized = False
+_push_init_lock = threading.Lock()
+
+# FCM accepts at most 500 tokens per multicast message
+_FCM_MULTICAST_LIMIT = 500
+
+# FCM error codes meaning the token will never be deliverable again
+_INVALID_FCM_TOKEN_CODES = frozenset({
+    "registration-token-not-registered",
+    "invalid-argument",
+    "NOT_FOUND",
+    "INVALID_ARGUMENT",
+})
+
+
+# Concurrent deliveries in cron fan-outs (streak guard, scheduled sends)
+_DELIVERY_CONCURRENCY = 50
+
+# Scheduled notifications claimed, delivered and committed per chunk
+_SCHEDULED_CHUNK_SIZE = 200
+
+# VAPID JWTs are valid for 12 hours; reuse them until 5 minutes before expiry
+_VAPID_CLAIMS_TTL = 12 * 60 * 60
+_VAPID_REFRESH_MARGIN = 5 * 60
+_VAPID_SUBJECT = "mailto:no-reply@famquest.app"
+
+# Parsed VAPID signing key and signed headers per push service origin
+_vapid_signer: Optional[Tuple[str, Any]] = None
+_vapid_header_cache: Dict[str, Tuple[float, Dict[str, str]]] = {}
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Shared client for WebPush endpoints and Mailgun (keep-alive pooling per origin)."""
+    return get_http_client("notifications", timeout=10.0, max_keepalive_connections=50)
+
+
+# Email HTML, parsed once; values are HTML-escaped before substitution
+_EMAIL_ACTION_BUTTON = Template('''
+            <p style="text-align: center; margin-top: 20px;">
+                <a href="$action_url"
+                   style="display: inline-block; padding: 12px 24px; background-color: #4CAF50;
+                          color: white; text-decoration: none; border-radius: 4px; font-weight: bold;">
+                    View Details
+                </a>
+            </p>
+            ''')
+
+_EMAIL_TEMPLATE = Template('''
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        </head>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
+            <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px;">
+                <h2 style="color: #4CAF50; margin-top: 0;">FamQuest Notification</h2>
+                <p style="font-size: 16px;">$body</p>
+                $action_button
+                <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
+                <p style="font-size: 12px; color: #666; text-align: center;">
+                    You received this email because you're part of a FamQuest family.<br>
+                    To manage your notification preferences, visit your settings.
+                </p>
+            </div>
+        </body>
+        </html>
+        ''')
+
+# Shared HTML for Sendgrid bulk sends; placeholders are substituted per
+# personalization
+_EMAIL_BULK_HTML = _EMAIL_TEMPLATE.substitute(body="-body-", action_button="-action_button-")
+
+# Sendgrid accepts at most 1000 personalizations per request
+_SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+# Notification types that are also sent by email
+_EMAIL_NOTIFICATION_TYPES = frozenset({'task_approval_requested', 'streak_guard', 'task_overdue'})
+
+# Identical notifications (same user, type, title, body) within this window
+# are dropped; hits are counted under _DEDUP_HITS_KEY
+_DEDUP_WINDOW_SECONDS = 60
+_DEDUP_HITS_KEY = "notif:dedup:hits"
+
+# Redis stream queue for off-request delivery (see enqueue/run_worker)
+_QUEUE_STREAM = "notif:q"
+_QUEUE_GROUP = "notif-workers"
+_DEAD_LETTER_STREAM = "notif:dlq"
+_QUEUE_MAX_ATTEMPTS = 3
+
+# Failed deliveries wait in this sorted set (score = not-before epoch
+# seconds) until a worker moves them back onto the stream
+_QUEUE_RETRY_KEY = "notif:q:retry"
+
+# Workers refresh this key every loop; enqueue() sends inline without it
+_QUEUE_WORKER_KEY = "notif:q:worker"
+_QUEUE_WORKER_TTL_SECONDS = 30
+
+# Pending messages idle this long belong to a dead consumer and are reclaimed
+_QUEUE_CLAIM_IDLE_MS = 60000
+
+# Concurrent Sendgrid API calls (provider rate limits)
+_SENDGRID_CONCURRENCY = 20
+_sendgrid_semaphore = asyncio.Semaphore(_SENDGRID_CONCURRENCY)
+
+
+async def _sendgrid_send(client: Any, message: Any) -> Any:
+    """Run the blocking Sendgrid SDK send in a worker thread."""
+    async with _sendgrid_semaphore:
+        return await asyncio.to_thread(client.send, message)
+
+
+def init_push_backends() -> None:
+    """
+    Initialize Firebase for push notifications.
+
+    Called once at app startup so constructing a NotificationService per
+    request does not repeat the import and credential checks. Safe to call
+    more than once.
+    """
+    global _firebase_app, _firebase_messaging, _push_backends_initialized
+
+    with _push_init_lock:
+        if _push_backends_initialized:
+            return
+        _push_backends_initialized = True
+
+        try:
+            import firebase_admin
+            from firebase_admin import credentials, messaging
+
+            firebase_creds_path = os.getenv("FIREBASE_CREDENTIALS_PATH")
+            if firebase_creds_path and os.path.exists(firebase_creds_path):
+                if not firebase_admin._apps:
+                    cred = credentials.Certificate(firebase_creds_path)
+                    _firebase_app = firebase_admin.initialize_app(cred)
+                    _firebase_messaging = messaging
+                    logger.info("Firebase initialized successfully")
+            else:
+                logger.warning("Firebase credentials not found, push notifications disabled")
+        except ImportError:
+            logger.warning("firebase-admin not installed, push notifications disabled")
+        except Exception as e:
+            logger.error(f"Failed to initialize Firebase: {e}")
+
+
+def _build_vapid_headers(origin: str, vapid_private_key: str) -> Dict[str, str]:
+    """
+    Return VAPID auth headers for a push service origin.
+
+    Signing is an ECDSA operation, so signed headers are cached per origin
+    and reused across notifications until shortly before their JWT expires.
+    """
+    global _vapid_signer
+
+    now = time.time()
+    cached = _vapid_header_cache.get(origin)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    if _vapid_signer is None or _vapid_signer[0] != vapid_private_key:
+        from py_vapid import Vapid
+        _vapid_signer = (vapid_private_key, Vapid.from_string(private_key=vapid_private_key))
+        _vapid_header_cache.clear()
+
+    exp = int(now) + _VAPID_CLAIMS_TTL
+    headers = _vapid_signer[1].sign({"sub": _VAPID_SUBJECT, "aud": origin, "exp": exp})
+    _vapid_header_cache[origin] = (exp - _VAPID_REFRESH_MARGIN, headers)
+    return headers
+
+
+def _dedup_key(user_id: str, notification_type: str, title: str, body: str) -> str:
+    """Redis key identifying a notification's content for one user."""
+    digest = hashlib.blake2b(
+        f"{notification_type}|{title}|{body}".encode(), digest_size=8
+    ).hexdigest()
+    return f"nd:{user_id}:{digest}"
+
+
+def _is_invalid_fcm_token(exc: Exception) -> bool:
+    """Check whether an FCM send error means the token should be removed."""
+    if getattr(exc, "code", None) in _INVALID_FCM_TOKEN_CODES:
+        return True
+    # Legacy error messages
+    return "NotRegistered" in str(exc) or "InvalidRegistration" in str(exc)
 
 
 class NotificationService:
@@ -59,30 +257,6 @@ class NotificationService:
             db: Database session
         """
         self.db = db
-        self._init_firebase()
-
-    def _init_firebase(self):
-        """Initialize Firebase for push notifications (lazy loading)."""
-        global _firebase_app, _firebase_messaging
-
-        if _firebase_app is None:
-            try:
-                import firebase_admin
-                from firebase_admin import credentials, messaging
-
-                firebase_creds_path = os.getenv("FIREBASE_CREDENTIALS_PATH")
-                if firebase_creds_path and os.path.exists(firebase_creds_path):
-                    if not firebase_admin._apps:
-                        cred = credentials.Certificate(firebase_creds_path)
-                        _firebase_app = firebase_admin.initialize_app(cred)
-                        _firebase_messaging = messaging
-                        logger.info("Firebase initialized successfully")
-                else:
-                    logger.warning("Firebase credentials not found, push notifications disabled")
-            except ImportError:
-                logger.warning("firebase-admin not installed, push notifications disabled")
-            except Exception as e:
-                logger.error(f"Failed to initialize Firebase: {e}")
 
     async def send_notification(
         self,
@@ -91,11 +265,22 @@ class NotificationService:
         title: str,
         body: str,
         data: Dict[str, Any] = None,
-        action_url: Optional[str] = None
+        action_url: Optional[str] = None,
+        persist_first: bool = False,
+        notification_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Send notification via all enabled channels (push, email, local).
 
+        A notification identical to one sent to the same user within the
+        last _DEDUP_WINDOW_SECONDS is dropped (returns "deduped": True).
+        If delivery fails the dedup key is released so retries go through.
+        Without Redis, deduplication is skipped.
+
+        By default the notification row is written once, after delivery,
+        with its final status. Pass persist_first=True to store it as
+        pending before sending (durable even if delivery crashes midway).
+
         Args:
             user_id: Target user ID
             notification_type: Type of notification (task_due, task_completed, etc.)
@@ -103,6 +288,8 @@ class NotificationService:
             body: Notification body text
             data: Additional data payload (optional)
             action_url: Deep link URL (optional)
+            persist_first: Save the notification before sending (optional)
+            notification_id: Pre-assigned ID, e.g. from enqueue() (optional)
 
         Returns:
             Dict with send results:
@@ -112,36 +299,144 @@ class NotificationService:
                 "notification_id": "uuid"
             }
         """
-        # 1. Save notification to database
-        notification = Notification(
-            id=self._generate_id(),
-            userId=user_id,
-            type=notification_type,
-            title=title,
-            body=body,
-            payload=data or {},
-            status="pending",
-            createdAt=datetime.utcnow()
-        )
+        dedup_key = _dedup_key(user_id, notification_type, title, body)
+        if not await self._claim_dedup_key(dedup_key):
+            logger.info(f"Duplicate notification dropped: type={notification_type}, user={user_id}")
+            return {
+                "push_sent": 0,
+                "email_sent": False,
+                "notification_id": None,
+                "deduped": True
+            }
+
+        try:
+            return await self._deliver_notification(
+                user_id, notification_type, title, body, data,
+                action_url, persist_first, notification_id
+            )
+        except Exception:
+            await self._release_dedup_key(dedup_key)
+            raise
+
+    async def _claim_dedup_key(self, key: str) -> bool:
+        """
+        Claim a dedup key for _DEDUP_WINDOW_SECONDS (SET NX EX).
+
+        Returns:
+            False if the key is already held (duplicate), True otherwise,
+            including when Redis is unavailable
+        """
+        try:
+            redis = await get_redis()
+            if await redis.set(key, "1", nx=True, ex=_DEDUP_WINDOW_SECONDS):
+                return True
+            await redis.incr(_DEDUP_HITS_KEY)
+            return False
+        except RedisError as e:
+            logger.warning(f"Notification dedup unavailable: {e}")
+            return True
+
+    async def _release_dedup_key(self, key: str) -> None:
+        """Release a dedup key after a failed delivery."""
+        try:
+            redis = await get_redis()
+            await redis.delete(key)
+        except RedisError as e:
+            logger.warning(f"Failed to release notification dedup key: {e}")
 
+    async def _deliver_notification(
+        self,
+        user_id: str,
+        notification_type: str,
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]],
+        action_url: Optional[str],
+        persist_first: bool,
+        notification_id: Optional[str]
+    ) -> Dict[str, Any]:
+        """Deliver and record a notification (see send_notification())."""
+        notification_id = notification_id or self._generate_id()
+        # One timestamp per notification, reused for createdAt and sentAt
+        now = datetime.utcnow()
+        payload = dict(data or {})
         if action_url:
-            notification.payload["action_url"] = action_url
+            payload["action_url"] = action_url
+
+        # Check available channels (email + device count) in one query
+        channels = self.db.execute(
+            select(User.email, func.count(DeviceToken.id))
+            .outerjoin(DeviceToken, DeviceToken.userId == User.id)
+            .where(User.id == user_id)
+            .group_by(User.id)
+        ).first()
+        email = channels[0] if channels else None
+        device_count = channels[1] if channels else 0
+        wants_email = bool(email) and notification_type in _EMAIL_NOTIFICATION_TYPES
+
+        # No device and no email: keep the in-app record, skip delivery
+        if not device_count and not wants_email:
+            self.db.execute(insert(Notification).values(
+                id=notification_id,
+                userId=user_id,
+                type=notification_type,
+                title=title,
+                body=body,
+                payload=payload,
+                status="skipped",
+                createdAt=now
+            ))
+            self.db.commit()
+            logger.debug(f"Notification skipped (no channels): type={notification_type}, user={user_id}")
+            return {
+                "push_sent": 0,
+                "email_sent": False,
+                "notification_id": notification_id
+            }
 
-        self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
+        # 1. Save notification up front (durability-first callers only)
+        if persist_first:
+            self.db.execute(insert(Notification).values(
+                id=notification_id,
+                userId=user_id,
+                type=notification_type,
+                title=title,
+                body=body,
+                payload=payload,
+                status="pending",
+                createdAt=now
+            ))
+            self.db.commit()
 
         # 2. Send push notifications
-        push_count = await self._send_push(user_id, title, body, data)
+        push_count = 0
+        if device_count:
+            push_count = await self._send_push(user_id, title, body, data)
 
         # 3. Send email (for critical notifications)
         email_sent = False
-        if notification_type in ['task_approval_requested', 'streak_guard', 'task_overdue']:
-            email_sent = await self._send_email(user_id, title, body, action_url)
-
-        # Update notification status
-        notification.status = "sent"
-        notification.sentAt = datetime.utcnow()
+        if wants_email:
+            email_sent = await self._deliver_email(email, title, body, action_url)
+
+        # 4. Record the notification with its final status
+        if persist_first:
+            self.db.execute(
+                update(Notification)
+                .where(Notification.id == notification_id)
+                .values(status="sent", sentAt=now)
+            )
+        else:
+            self.db.execute(insert(Notification).values(
+                id=notification_id,
+                userId=user_id,
+                type=notification_type,
+                title=title,
+                body=body,
+                payload=payload,
+                status="sent",
+                sentAt=now,
+                createdAt=now
+            ))
         self.db.commit()
 
         logger.info(f"Notification sent: type={notification_type}, user={user_id}, push={push_count}, email={email_sent}")
@@ -149,9 +444,62 @@ class NotificationService:
         return {
             "push_sent": push_count,
             "email_sent": email_sent,
-            "notification_id": notification.id
+            "notification_id": notification_id
+        }
+
+    async def enqueue(
+        self,
+        user_id: str,
+        notification_type: str,
+        title: str,
+        body: str,
+        data: Dict[str, Any] = None,
+        action_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue a notification for delivery by the background worker.
+
+        Returns immediately after a Redis XADD instead of waiting on the
+        push/email providers. Falls back to sending inline if Redis is
+        unavailable or no worker has refreshed _QUEUE_WORKER_KEY recently
+        (e.g. serverless deployments without a worker process).
+
+        Args:
+            Same as send_notification()
+
+        Returns:
+            Dict with "queued" flag and "notification_id"
+        """
+        notification_id = self._generate_id()
+        envelope = {
+            "notification_id": notification_id,
+            "user_id": user_id,
+            "notification_type": notification_type,
+            "title": title,
+            "body": body,
+            "data": data,
+            "action_url": action_url,
+            "attempts": 0
         }
 
+        try:
+            redis = await get_redis()
+            if await redis.exists(_QUEUE_WORKER_KEY):
+                await redis.xadd(_QUEUE_STREAM, {"data": orjson.dumps(envelope)})
+                return {"queued": True, "notification_id": notification_id}
+        except RedisError as e:
+            logger.warning(f"Notification queue unavailable, sending inline: {e}")
+
+        result = await self.send_notification(
+            user_id=user_id,
+            notification_type=notification_type,
+            title=title,
+            body=body,
+            data=data,
+            action_url=action_url
+        )
+        return {"queued": False, **result}
+
     async def _send_push(
         self,
         user_id: str,
@@ -171,75 +519,230 @@ class NotificationService:
         Returns:
             Number of devices successfully reached
         """
-        # Get all active device tokens for this user
-        tokens = self.db.query(DeviceToken).filter(
-            DeviceToken.userId == user_id
+        targets = self._load_push_targets([user_id]).get(user_id, [])
+        sent_count, dead_tokens, dead_subs = await self._send_push_prefetched(
+            user_id, title, body, data, targets
+        )
+        if dead_tokens or dead_subs:
+            self._drop_push_targets(dead_tokens, dead_subs)
+            self.db.commit()
+        return sent_count
+
+    def _load_push_targets(self, user_ids: List[str]) -> Dict[str, List[tuple]]:
+        """
+        Load device tokens for many users in one query.
+
+        Each token comes with its matching WebPush subscription (None for
+        FCM tokens or web tokens without a subscription).
+
+        Args:
+            user_ids: Target user IDs
+
+        Returns:
+            Dict mapping user ID to list of (DeviceToken, WebPushSub) pairs
+        """
+        rows = self.db.query(DeviceToken, WebPushSub).outerjoin(
+            WebPushSub,
+            and_(
+                WebPushSub.userId == DeviceToken.userId,
+                WebPushSub.endpoint == DeviceToken.token
+            )
+        ).filter(
+            DeviceToken.userId.in_(user_ids)
         ).all()
 
-        if not tokens:
+        targets = defaultdict(list)
+        for token, web_sub in rows:
+            targets[token.userId].append((token, web_sub))
+        return targets
+
+    async def _send_push_prefetched(
+        self,
+        user_id: str,
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]],
+        rows: List[tuple]
+    ) -> Tuple[int, Set[str], Set[str]]:
+        """
+        Send push notification using device tokens loaded by _load_push_targets.
+
+        Dead tokens are returned rather than deleted so the caller can drop
+        them in its own transaction (see _drop_push_targets); committing here
+        would release row locks held by the caller.
+
+        Args:
+            user_id: Target user ID
+            title: Notification title
+            body: Notification body
+            data: Additional data payload
+            rows: User's (DeviceToken, WebPushSub) pairs
+
+        Returns:
+            (devices reached, dead DeviceToken IDs, dead WebPushSub IDs)
+        """
+        if not rows:
             logger.debug(f"No device tokens found for user {user_id}")
-            return 0
+            return 0, set(), set()
 
         sent_count = 0
+        dead_tokens: set = set()
+        dead_subs: set = set()
+
+        # Firebase Cloud Messaging (FCM) for Android/iOS: one multicast call
+        # per batch instead of one HTTPS request per device
+        mobile_tokens = [t for t, _ in rows if t.platform in ('android', 'ios')]
+        if mobile_tokens and _firebase_messaging:
+            # FCM requires string values; non-strings are sent as JSON
+            fcm_data = {
+                k: v if isinstance(v, str) else orjson.dumps(v).decode()
+                for k, v in (data or {}).items()
+            }
+            for i in range(0, len(mobile_tokens), _FCM_MULTICAST_LIMIT):
+                batch = mobile_tokens[i:i + _FCM_MULTICAST_LIMIT]
+                try:
+                    message = _firebase_messaging.MulticastMessage(
+                        notification=_firebase_messaging.Notification(
+                            title=title,
+                            body=body
+                        ),
+                        data=fcm_data,
+                        tokens=[t.token for t in batch]
+                    )
+                    # Blocking SDK call over the app's pooled session; keep
+                    # it off the event loop
+                    response = await asyncio.to_thread(
+                        _firebase_messaging.send_each_for_multicast,
+                        message,
+                        app=_firebase_app
+                    )
+                except Exception as e:
+                    logger.error(f"FCM multicast failed for user {user_id}: {e}")
+                    continue
+
+                sent_count += response.success_count
+                for token, resp in zip(batch, response.responses):
+                    if resp.exception is not None and _is_invalid_fcm_token(resp.exception):
+                        dead_tokens.add(token.id)
+
+                logger.info(
+                    f"FCM multicast to user {user_id}: "
+                    f"{response.success_count}/{len(batch)} delivered"
+                )
 
-        for token in tokens:
-            try:
-                if token.platform in ['android', 'ios']:
-                    # Firebase Cloud Messaging (FCM) for Android/iOS
-                    if _firebase_messaging:
-                        message = _firebase_messaging.Message(
-                            notification=_firebase_messaging.Notification(
-                                title=title,
-                                body=body
-                            ),
-                            data={k: str(v) for k, v in (data or {}).items()},  # FCM requires string values
-                            token=token.token
-                        )
-                        response = _firebase_messaging.send(message)
-                        logger.info(f"FCM push sent to {token.platform}: {response}")
-                        sent_count += 1
-
-                elif token.platform == 'web':
-                    # WebPush for browsers
-                    web_sub = self.db.query(WebPushSub).filter(
-                        WebPushSub.userId == user_id,
-                        WebPushSub.endpoint == token.token
-                    ).first()
-
-                    if web_sub:
-                        try:
-                            from pywebpush import webpush, WebPushException
-
-                            webpush(
-                                subscription_info={
-                                    "endpoint": web_sub.endpoint,
-                                    "keys": {
-                                        "p256dh": web_sub.p256dh,
-                                        "auth": web_sub.auth
-                                    }
-                                },
-                                data=json.dumps({"title": title, "body": body, "data": data}),
-                                vapid_private_key=os.getenv("VAPID_PRIVATE_KEY"),
-                                vapid_claims={"sub": "mailto:no-reply@famquest.app"}
-                            )
-                            logger.info(f"WebPush sent to browser")
-                            sent_count += 1
-                        except WebPushException as e:
-                            logger.error(f"WebPush failed: {e}")
-                            # Mark subscription as inactive if expired
-                            if "410" in str(e) or "404" in str(e):
-                                self.db.delete(web_sub)
-                                self.db.delete(token)
-                                self.db.commit()
+        # WebPush for browsers: all subscriptions are posted concurrently
+        web_targets = [
+            (token, web_sub) for token, web_sub in rows
+            if token.platform == 'web' and web_sub is not None
+        ]
 
-            except Exception as e:
-                logger.error(f"Push notification failed for {token.platform}: {e}")
-                # Mark token as inactive if invalid
-                if "NotRegistered" in str(e) or "InvalidRegistration" in str(e):
-                    self.db.delete(token)
-                    self.db.commit()
+        if web_targets:
+            web_sent, expired = await self._send_web_push(web_targets, title, body, data)
+            sent_count += web_sent
+            for token, web_sub in expired:
+                dead_tokens.add(token.id)
+                dead_subs.add(web_sub.id)
 
-        return sent_count
+        return sent_count, dead_tokens, dead_subs
+
+    def _drop_push_targets(self, dead_tokens: Set[str], dead_subs: Set[str]) -> None:
+        """
+        Delete dead device tokens and WebPush subscriptions (no commit).
+
+        Args:
+            dead_tokens: DeviceToken IDs to delete
+            dead_subs: WebPushSub IDs to delete
+        """
+        if dead_tokens:
+            self.db.query(DeviceToken).filter(
+                DeviceToken.id.in_(dead_tokens)
+            ).delete(synchronize_session=False)
+        if dead_subs:
+            self.db.query(WebPushSub).filter(
+                WebPushSub.id.in_(dead_subs)
+            ).delete(synchronize_session=False)
+        if dead_tokens or dead_subs:
+            logger.info(
+                f"Removed {len(dead_tokens)} dead device tokens and "
+                f"{len(dead_subs)} WebPush subscriptions"
+            )
+
+    async def _send_web_push(
+        self,
+        targets: List[tuple],
+        title: str,
+        body: str,
+        data: Dict[str, Any] = None
+    ) -> Tuple[int, List[tuple]]:
+        """
+        Send WebPush messages to browser subscriptions concurrently.
+
+        Args:
+            targets: List of (DeviceToken, WebPushSub) pairs
+            title: Notification title
+            body: Notification body
+            data: Additional data payload
+
+        Returns:
+            Tuple of (subscriptions reached, expired (DeviceToken, WebPushSub)
+            pairs for the caller to remove)
+        """
+        vapid_private_key = os.getenv("VAPID_PRIVATE_KEY")
+        if not vapid_private_key:
+            logger.warning("VAPID_PRIVATE_KEY not set, WebPush disabled")
+            return 0, []
+
+        try:
+            from pywebpush import WebPusher
+        except ImportError:
+            logger.warning("pywebpush not installed, WebPush disabled")
+            return 0, []
+
+        # Serialized once and encrypted per subscription
+        payload = orjson.dumps({"title": title, "body": body, "data": data})
+
+        pending = []
+        for _, web_sub in targets:
+            url = urlparse(web_sub.endpoint)
+            origin = f"{url.scheme}://{url.netloc}"
+
+            encoded = WebPusher({
+                "endpoint": web_sub.endpoint,
+                "keys": {"p256dh": web_sub.p256dh, "auth": web_sub.auth}
+            }).encode(payload, "aes128gcm")
+
+            headers = {
+                **_build_vapid_headers(origin, vapid_private_key),
+                "content-encoding": "aes128gcm",
+                "ttl": "0"
+            }
+            pending.append((origin, web_sub.endpoint, headers, encoded["body"]))
+
+        client = _get_http_client()
+        responses = await asyncio.gather(
+            *(client.post(endpoint, headers=headers, content=content)
+              for _, endpoint, headers, content in pending),
+            return_exceptions=True
+        )
+
+        sent_count = 0
+        expired = []
+        for (token, web_sub), (origin, *_), response in zip(targets, pending, responses):
+            if isinstance(response, Exception):
+                logger.error(f"WebPush failed: {response}")
+            elif response.status_code <= 202:
+                sent_count += 1
+            else:
+                logger.error(f"WebPush failed: {response.status_code} {response.text}")
+                # Push service rejected our VAPID JWT; re-sign on next send
+                if response.status_code in (401, 403):
+                    _vapid_header_cache.pop(origin, None)
+                # Subscription expired or unsubscribed
+                if response.status_code in (404, 410):
+                    expired.append((token, web_sub))
+
+        logger.info(f"WebPush sent to {sent_count}/{len(targets)} browsers")
+        return sent_count, expired
 
     async def _send_email(
         self,
@@ -265,6 +768,27 @@ class NotificationService:
             logger.warning(f"No email found for user {user_id}")
             return False
 
+        return await self._deliver_email(user.email, subject, body, action_url)
+
+    async def _deliver_email(
+        self,
+        email: str,
+        subject: str,
+        body: str,
+        action_url: Optional[str]
+    ) -> bool:
+        """
+        Send one email to an address via Sendgrid, falling back to Mailgun.
+
+        Args:
+            email: Recipient address
+            subject: Email subject
+            body: Email body text
+            action_url: Action URL for email button
+
+        Returns:
+            True if email sent successfully, False otherwise
+        """
         try:
             # Sendgrid implementation
             sendgrid_api_key = os.getenv("SENDGRID_API_KEY")
@@ -274,35 +798,33 @@ class NotificationService:
 
                 message = Mail(
                     from_email='no-reply@famquest.app',
-                    to_emails=user.email,
+                    to_emails=email,
                     subject=subject,
                     html_content=self._format_email_html(body, action_url)
                 )
 
                 sg = SendGridAPIClient(sendgrid_api_key)
-                response = sg.send(message)
-                logger.info(f"Email sent to {user.email} via Sendgrid: {response.status_code}")
+                response = await _sendgrid_send(sg, message)
+                logger.info(f"Email sent to {email} via Sendgrid: {response.status_code}")
                 return True
 
             # Mailgun implementation (fallback)
             mailgun_api_key = os.getenv("MAILGUN_API_KEY")
             mailgun_domain = os.getenv("MAILGUN_DOMAIN")
             if mailgun_api_key and mailgun_domain:
-                import requests
-
-                response = requests.post(
+                response = await _get_http_client().post(
                     f"https://api.mailgun.net/v3/{mailgun_domain}/messages",
                     auth=("api", mailgun_api_key),
                     data={
                         "from": "FamQuest <no-reply@famquest.app>",
-                        "to": user.email,
+                        "to": email,
                         "subject": subject,
                         "html": self._format_email_html(body, action_url)
                     }
                 )
 
                 if response.status_code == 200:
-                    logger.info(f"Email sent to {user.email} via Mailgun")
+                    logger.info(f"Email sent to {email} via Mailgun")
                     return True
                 else:
                     logger.error(f"Mailgun email failed: {response.status_code}")
@@ -315,6 +837,74 @@ class NotificationService:
             logger.error(f"Email send failed: {e}")
             return False
 
+    async def _send_email_bulk(
+        self,
+        recipients: List[Tuple[str, str, str, Optional[str]]]
+    ) -> int:
+        """
+        Send many emails with as few provider calls as possible.
+
+        With Sendgrid, recipients become personalizations of one message
+        (up to 1000 per API call) sharing the branded HTML, with body and
+        button filled in per recipient. Mailgun fallback sends individually.
+
+        Args:
+            recipients: List of (email, subject, body, action_url) tuples
+
+        Returns:
+            Number of emails accepted by the provider
+        """
+        if not recipients:
+            return 0
+
+        sendgrid_api_key = os.getenv("SENDGRID_API_KEY")
+        if not sendgrid_api_key:
+            results = await asyncio.gather(
+                *(self._deliver_email(*recipient) for recipient in recipients)
+            )
+            return sum(1 for sent in results if sent)
+
+        try:
+            from sendgrid import SendGridAPIClient
+            from sendgrid.helpers.mail import Mail, Personalization, To, Substitution
+        except ImportError:
+            logger.warning("sendgrid not installed, bulk email disabled")
+            return 0
+
+        sg = SendGridAPIClient(sendgrid_api_key)
+        sent_count = 0
+
+        for i in range(0, len(recipients), _SENDGRID_MAX_PERSONALIZATIONS):
+            batch = recipients[i:i + _SENDGRID_MAX_PERSONALIZATIONS]
+            message = Mail(
+                from_email='no-reply@famquest.app',
+                subject=batch[0][1],
+                html_content=_EMAIL_BULK_HTML
+            )
+            for email, subject, body, action_url in batch:
+                personalization = Personalization()
+                personalization.add_to(To(email))
+                personalization.subject = subject
+                personalization.add_substitution(
+                    Substitution("-body-", html.escape(body))
+                )
+                personalization.add_substitution(Substitution(
+                    "-action_button-",
+                    _EMAIL_ACTION_BUTTON.substitute(
+                        action_url=html.escape(action_url, quote=True)
+                    ) if action_url else ""
+                ))
+                message.add_personalization(personalization)
+
+            try:
+                response = await _sendgrid_send(sg, message)
+                sent_count += len(batch)
+                logger.info(f"Bulk email sent to {len(batch)} recipients via Sendgrid: {response.status_code}")
+            except Exception as e:
+                logger.error(f"Bulk email send failed: {e}")
+
+        return sent_count
+
     def _format_email_html(self, body: str, action_url: Optional[str]) -> str:
         """
         Format email HTML with FamQuest branding.
@@ -328,37 +918,14 @@ class NotificationService:
         """
         action_button = ""
         if action_url:
-            action_button = f'''
-            <p style="text-align: center; margin-top: 20px;">
-                <a href="{action_url}"
-                   style="display: inline-block; padding: 12px 24px; background-color: #4CAF50;
-                          color: white; text-decoration: none; border-radius: 4px; font-weight: bold;">
-                    View Details
-                </a>
-            </p>
-            '''
+            action_button = _EMAIL_ACTION_BUTTON.substitute(
+                action_url=html.escape(action_url, quote=True)
+            )
 
-        return f'''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px;">
-                <h2 style="color: #4CAF50; margin-top: 0;">FamQuest Notification</h2>
-                <p style="font-size: 16px;">{body}</p>
-                {action_button}
-                <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
-                <p style="font-size: 12px; color: #666; text-align: center;">
-                    You received this email because you're part of a FamQuest family.<br>
-                    To manage your notification preferences, visit your settings.
-                </p>
-            </div>
-        </body>
-        </html>
-        '''
+        return _EMAIL_TEMPLATE.substitute(
+            body=html.escape(body),
+            action_button=action_button
+        )
 
     async def schedule_task_reminder(self, task_id: str):
         """
@@ -368,110 +935,400 @@ class NotificationService:
         Args:
             task_id: Task ID to schedule reminder for
         """
-        task = self.db.query(Task).filter(Task.id == task_id).first()
-        if not task or not task.due:
-            logger.warning(f"Cannot schedule reminder: task {task_id} not found or has no due date")
-            return
+        await self.schedule_task_reminders([task_id])
 
-        # Calculate reminder time (60 min before due)
-        reminder_time = task.due - timedelta(minutes=60)
+    async def schedule_task_reminders(self, task_ids: List[str]) -> int:
+        """
+        Schedule task_due notifications for many tasks at once.
 
-        if reminder_time <= datetime.utcnow():
-            logger.debug(f"Task {task_id} due time already passed, skipping reminder")
-            return
+        Loads all tasks with one query and inserts every reminder in a
+        single statement and commit.
 
-        # Get assignee
-        assignee_id = task.assignees[0] if task.assignees else task.claimedBy
-        if not assignee_id:
-            logger.warning(f"Task {task_id} has no assignee, skipping reminder")
-            return
+        Args:
+            task_ids: Task IDs to schedule reminders for
 
-        # Create scheduled notification
-        notification = Notification(
-            id=self._generate_id(),
-            userId=assignee_id,
-            type='task_due',
-            title=f'Task due soon: {task.title}',
-            body=f'Your task "{task.title}" is due in 60 minutes',
-            payload={'task_id': task_id, 'due': task.due.isoformat()},
-            status='pending',
-            scheduledFor=reminder_time,
-            createdAt=datetime.utcnow()
-        )
-        self.db.add(notification)
-        self.db.commit()
+        Returns:
+            Number of reminders scheduled
+        """
+        if not task_ids:
+            return 0
+
+        tasks = self.db.query(Task).filter(Task.id.in_(task_ids)).all()
+        found = {task.id for task in tasks}
+        for task_id in task_ids:
+            if task_id not in found:
+                logger.warning(f"Cannot schedule reminder: task {task_id} not found")
 
-        logger.info(f"Task reminder scheduled: task={task_id}, scheduled_for={reminder_time}")
+        now = datetime.utcnow()
+        rows = []
+        for task in tasks:
+            if not task.due:
+                logger.warning(f"Cannot schedule reminder: task {task.id} has no due date")
+                continue
+
+            # Calculate reminder time (60 min before due)
+            reminder_time = task.due - timedelta(minutes=60)
+
+            if reminder_time <= now:
+                logger.debug(f"Task {task.id} due time already passed, skipping reminder")
+                continue
+
+            # Get assignee
+            assignee_id = task.assignees[0] if task.assignees else task.claimedBy
+            if not assignee_id:
+                logger.warning(f"Task {task.id} has no assignee, skipping reminder")
+                continue
+
+            rows.append({
+                "id": self._generate_id(),
+                "userId": assignee_id,
+                "type": "task_due",
+                "title": f'Task due soon: {task.title}',
+                "body": f'Your task "{task.title}" is due in 60 minutes',
+                "payload": {'task_id': task.id, 'due': task.due.isoformat()},
+                "status": "pending",
+                "scheduledFor": reminder_time,
+                "createdAt": now
+            })
+
+        if rows:
+            self.db.execute(insert(Notification), rows)
+            self.db.commit()
+
+        logger.info(f"Task reminders scheduled: {len(rows)} of {len(task_ids)} tasks")
+        return len(rows)
 
     async def check_streak_guard(self):
         """
         Daily cron job at 20:00: Check users with 0 tasks completed today.
         Send streak_guard notification.
 
+        At-risk users are found with one query, their notifications are
+        inserted in bulk, and push/email delivery fans out concurrently.
+
         Should be called by background worker at 20:00 daily.
         """
         from services.streak_service import StreakService
 
-        # Get all users with current streak > 0
-        users = self.db.query(User).all()
-
-        for user in users:
-            # Check user's streak
-            streak_service = StreakService()
-            if streak_service.check_streak_guard(user.id, self.db):
-                # Streak at risk, send notification
-                streak_stats = streak_service.get_streak_stats(user.id, self.db)
-
-                await self.send_notification(
-                    user_id=user.id,
-                    notification_type='streak_guard',
-                    title='Streak at risk! 🔥',
-                    body=f'Complete a task before midnight to keep your {streak_stats["current"]}-day streak',
-                    data={'current_streak': streak_stats["current"]},
-                    action_url='/tasks'
+        at_risk = StreakService().fetch_at_risk_streakers(self.db)
+        if not at_risk:
+            return
+
+        now = datetime.utcnow()
+        title = 'Streak at risk! 🔥'
+        rows = [
+            {
+                "id": self._generate_id(),
+                "userId": user_id,
+                "type": "streak_guard",
+                "title": title,
+                "body": f'Complete a task before midnight to keep your {current}-day streak',
+                "payload": {"current_streak": current, "action_url": "/tasks"},
+                "status": "pending",
+                "createdAt": now
+            }
+            for user_id, current in at_risk
+        ]
+        self.db.execute(insert(Notification), rows)
+        self.db.commit()
+
+        # One token query for the whole batch
+        push_targets = self._load_push_targets([user_id for user_id, _ in at_risk])
+
+        # Respect FCM / email provider concurrency limits
+        semaphore = asyncio.Semaphore(_DELIVERY_CONCURRENCY)
+
+        async def deliver(row: Dict[str, Any]):
+            async with semaphore:
+                return await self._send_push_prefetched(
+                    row["userId"], title, row["body"],
+                    {"current_streak": row["payload"]["current_streak"]},
+                    push_targets.get(row["userId"], [])
                 )
 
-                logger.info(f"Streak guard notification sent to user {user.id}")
+        results = await asyncio.gather(
+            *(deliver(row) for row in rows), return_exceptions=True
+        )
+        sent_ids: List[str] = []
+        failed_ids: List[str] = []
+        dead_tokens: Set[str] = set()
+        dead_subs: Set[str] = set()
+        for row, result in zip(rows, results):
+            if isinstance(result, Exception):
+                logger.error(f"Streak guard delivery failed for user {row['userId']}: {result}")
+                failed_ids.append(row["id"])
+            else:
+                sent_ids.append(row["id"])
+                dead_tokens |= result[1]
+                dead_subs |= result[2]
+
+        # Email everyone in as few provider calls as possible
+        emails = dict(self.db.query(User.id, User.email).filter(
+            User.id.in_([row["userId"] for row in rows]),
+            User.email.isnot(None)
+        ).all())
+        await self._send_email_bulk([
+            (emails[row["userId"]], title, row["body"], "/tasks")
+            for row in rows if emails.get(row["userId"])
+        ])
+
+        if sent_ids:
+            self.db.execute(
+                update(Notification)
+                .where(Notification.id.in_(sent_ids))
+                .values(status='sent', sentAt=now)
+            )
+        if failed_ids:
+            self.db.execute(
+                update(Notification)
+                .where(Notification.id.in_(failed_ids))
+                .values(status='failed')
+            )
+        self._drop_push_targets(dead_tokens, dead_subs)
+        self.db.commit()
+
+        logger.info(
+            f"Streak guard notifications sent to {len(sent_ids)} users, "
+            f"{len(failed_ids)} failed"
+        )
 
     async def process_scheduled_notifications(self):
         """
         Process all pending scheduled notifications.
 
+        Works through the due backlog in chunks of _SCHEDULED_CHUNK_SIZE.
+        Each chunk is claimed with FOR UPDATE SKIP LOCKED so concurrent
+        workers do not double-send, delivered concurrently, and committed
+        with one UPDATE per status before the next chunk is fetched. Peak
+        memory stays bounded by the chunk size however large the backlog.
+
         Should be called periodically (e.g., every 5 minutes) by background worker.
         """
         now = datetime.utcnow()
+        processed = 0
 
-        # Get all pending scheduled notifications due now
-        notifications = self.db.query(Notification).filter(
-            Notification.status == 'pending',
-            Notification.scheduledFor <= now
-        ).all()
+        while True:
+            notifications = self.db.execute(
+                select(Notification).where(
+                    Notification.status == 'pending',
+                    Notification.scheduledFor <= now
+                ).with_for_update(skip_locked=True).limit(_SCHEDULED_CHUNK_SIZE)
+            ).scalars().all()
 
-        logger.info(f"Processing {len(notifications)} scheduled notifications")
+            if not notifications:
+                break
 
-        for notification in notifications:
-            try:
-                # Send push notifications
-                push_count = await self._send_push(
-                    notification.userId,
-                    notification.title,
-                    notification.body,
-                    notification.payload
-                )
+            await self._deliver_scheduled_chunk(notifications, now)
+            processed += len(notifications)
 
-                # Update status
-                notification.status = 'sent'
-                notification.sentAt = now
-                self.db.commit()
+            if len(notifications) < _SCHEDULED_CHUNK_SIZE:
+                break
 
-                logger.info(f"Scheduled notification sent: id={notification.id}, push_count={push_count}")
+        logger.info(f"Processed {processed} scheduled notifications")
 
-            except Exception as e:
-                logger.error(f"Failed to send scheduled notification {notification.id}: {e}")
-                notification.status = 'failed'
-                self.db.commit()
+    async def _deliver_scheduled_chunk(
+        self,
+        notifications: List[Notification],
+        now: datetime
+    ) -> None:
+        """
+        Deliver one claimed chunk of scheduled notifications and commit.
+
+        The commit records the outcome and releases the chunk's row locks.
+
+        Args:
+            notifications: Pending notifications locked by this worker
+            now: Timestamp recorded as sentAt
+        """
+        push_targets = self._load_push_targets(
+            list({notification.userId for notification in notifications})
+        )
+        semaphore = asyncio.Semaphore(_DELIVERY_CONCURRENCY)
+
+        async def deliver(notification: Notification):
+            async with semaphore:
+                try:
+                    push_count, dead_tokens, dead_subs = await self._send_push_prefetched(
+                        notification.userId,
+                        notification.title,
+                        notification.body,
+                        notification.payload,
+                        push_targets.get(notification.userId, [])
+                    )
+                    logger.info(f"Scheduled notification sent: id={notification.id}, push_count={push_count}")
+                    return notification.id, 'sent', dead_tokens, dead_subs
+                except Exception as e:
+                    logger.error(f"Failed to send scheduled notification {notification.id}: {e}")
+                    return notification.id, 'failed', set(), set()
+
+        results = await asyncio.gather(*(deliver(n) for n in notifications))
+
+        sent_ids = [nid for nid, status, _, _ in results if status == 'sent']
+        failed_ids = [nid for nid, status, _, _ in results if status == 'failed']
+
+        if sent_ids:
+            self.db.execute(
+                update(Notification)
+                .where(Notification.id.in_(sent_ids))
+                .values(status='sent', sentAt=now)
+            )
+        if failed_ids:
+            self.db.execute(
+                update(Notification)
+                .where(Notification.id.in_(failed_ids))
+                .values(status='failed')
+            )
+
+        # Dead tokens go in the same commit so the chunk's locks are held
+        # until every row has its final status
+        self._drop_push_targets(
+            set().union(*(dead for _, _, dead, _ in results)),
+            set().union(*(dead for _, _, _, dead in results))
+        )
+        self.db.commit()
 
     def _generate_id(self) -> str:
         """Generate unique ID for database records."""
         from uuid import uuid4
         return str(uuid4())
+
+
+async def _handle_queued(redis, message_id: str, fields: Optional[Dict[str, str]]) -> None:
+    """
+    Deliver one queued notification and acknowledge it.
+
+    Failures are parked in _QUEUE_RETRY_KEY with an exponential not-before
+    time rather than sleeping, so one slow retry never holds up the rest of
+    the batch. After _QUEUE_MAX_ATTEMPTS the envelope goes to the
+    dead-letter stream.
+
+    Args:
+        redis: Redis client
+        message_id: Stream entry ID
+        fields: Stream entry fields (None if the entry was trimmed)
+    """
+    from core.db import SessionLocal
+
+    if not fields:
+        await redis.xack(_QUEUE_STREAM, _QUEUE_GROUP, message_id)
+        return
+
+    envelope = orjson.loads(fields["data"])
+    db = SessionLocal()
+    try:
+        await NotificationService(db).send_notification(
+            user_id=envelope["user_id"],
+            notification_type=envelope["notification_type"],
+            title=envelope["title"],
+            body=envelope["body"],
+            data=envelope["data"],
+            action_url=envelope["action_url"],
+            notification_id=envelope["notification_id"]
+        )
+    except Exception as e:
+        db.rollback()
+        envelope["attempts"] += 1
+        logger.error(
+            f"Queued notification {envelope['notification_id']} failed "
+            f"(attempt {envelope['attempts']}): {e}"
+        )
+        if envelope["attempts"] >= _QUEUE_MAX_ATTEMPTS:
+            await redis.xadd(_DEAD_LETTER_STREAM, {"data": orjson.dumps(envelope)})
+        else:
+            not_before = time.time() + 2 ** envelope["attempts"]
+            await redis.zadd(_QUEUE_RETRY_KEY, {orjson.dumps(envelope): not_before})
+    finally:
+        db.close()
+        await redis.xack(_QUEUE_STREAM, _QUEUE_GROUP, message_id)
+
+
+async def _promote_due_retries(redis) -> int:
+    """
+    Move retries whose not-before time has passed back onto the stream.
+
+    ZREM decides which worker promotes a member, so concurrent workers
+    never requeue the same retry twice.
+
+    Returns:
+        Number of retries requeued
+    """
+    due = await redis.zrangebyscore(_QUEUE_RETRY_KEY, 0, time.time())
+    promoted = 0
+    for member in due:
+        if await redis.zrem(_QUEUE_RETRY_KEY, member):
+            await redis.xadd(_QUEUE_STREAM, {"data": member})
+            promoted += 1
+    return promoted
+
+
+async def _reclaim_idle(redis, consumer: str, batch_size: int) -> int:
+    """
+    Claim and deliver messages left pending by a crashed consumer.
+
+    Walks the group's pending list with XAUTOCLAIM, taking every entry idle
+    for at least _QUEUE_CLAIM_IDLE_MS.
+
+    Returns:
+        Number of messages reclaimed
+    """
+    start_id = "0-0"
+    reclaimed = 0
+    while True:
+        result = await redis.xautoclaim(
+            _QUEUE_STREAM, _QUEUE_GROUP, consumer, _QUEUE_CLAIM_IDLE_MS,
+            start_id=start_id, count=batch_size
+        )
+        start_id, messages = result[0], result[1]
+        if messages:
+            await asyncio.gather(*(_handle_queued(redis, mid, fields) for mid, fields in messages))
+            reclaimed += len(messages)
+        if start_id in ("0-0", b"0-0"):
+            return reclaimed
+
+
+async def run_worker(consumer: str, batch_size: int = 50, block_ms: int = 5000) -> None:
+    """
+    Consume queued notifications from Redis and deliver them.
+
+    Uses a consumer group so several workers can share the stream; each
+    message is acknowledged after delivery (at-least-once). Messages left
+    pending by a crashed consumer are reclaimed on startup and then every
+    _QUEUE_CLAIM_IDLE_MS. Failed deliveries are retried with exponential
+    backoff via _QUEUE_RETRY_KEY and moved to the dead-letter stream after
+    _QUEUE_MAX_ATTEMPTS. While running, the worker keeps _QUEUE_WORKER_KEY
+    alive so enqueue() knows it can queue.
+
+    Args:
+        consumer: Unique consumer name for this worker process
+        batch_size: Messages read per XREADGROUP call
+        block_ms: How long to block waiting for new messages
+    """
+    init_push_backends()
+    redis = await get_redis()
+
+    try:
+        await redis.xgroup_create(_QUEUE_STREAM, _QUEUE_GROUP, id="0", mkstream=True)
+    except RedisError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+    await redis.set(_QUEUE_WORKER_KEY, consumer, ex=_QUEUE_WORKER_TTL_SECONDS)
+    reclaimed = await _reclaim_idle(redis, consumer, batch_size)
+    if reclaimed:
+        logger.info(f"Notification worker {consumer} reclaimed {reclaimed} pending messages")
+    next_claim = time.monotonic() + _QUEUE_CLAIM_IDLE_MS / 1000
+
+    logger.info(f"Notification worker {consumer} started")
+    while True:
+        await redis.set(_QUEUE_WORKER_KEY, consumer, ex=_QUEUE_WORKER_TTL_SECONDS)
+        await _promote_due_retries(redis)
+        if time.monotonic() >= next_claim:
+            await _reclaim_idle(redis, consumer, batch_size)
+            next_claim = time.monotonic() + _QUEUE_CLAIM_IDLE_MS / 1000
+
+        batches = await redis.xreadgroup(
+            _QUEUE_GROUP, consumer, {_QUEUE_STREAM: ">"},
+            count=batch_size, block=block_ms
+        )
+        for _, messages in batches or []:
+            await asyncio.gather(*(_handle_queued(redis, mid, fields) for mid, fields in messages))
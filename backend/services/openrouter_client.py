@@ -4,11 +4,18 @@ Enhanced AI client with voice NLU support using Claude Haiku for fast intent par
 """
 
 import os
+import re
+import copy
+import random
+import asyncio
 import httpx
-import json
+import orjson
 import logging
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, Any, Optional, Tuple, List
 from datetime import datetime
+from core.http import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +34,164 @@ TIMEOUT_STUDY = 15.0  # Study plan generation
 TIMEOUT_VISION = 20.0  # Vision analysis
 
 
+def _get_http_client() -> httpx.AsyncClient:
+    """Shared OpenRouter client; per-call timeouts are passed on each request."""
+    return get_http_client(
+        "openrouter",
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        keepalive_expiry=30.0
+    )
+
+
+# Transient OpenRouter errors (rate limits, overloaded/bad gateway) are
+# retried with exponential backoff: 0.2s, 0.4s (+ jitter), or Retry-After
+_RETRYABLE_STATUS = frozenset({429, 502, 503, 529})
+_MAX_ATTEMPTS = 3
+_RETRY_BASE_DELAY = 0.2
+_RETRY_AFTER_MAX = 2.0
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Backoff before the next attempt, honouring a short Retry-After."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), _RETRY_AFTER_MAX)
+        except ValueError:
+            pass  # HTTP-date form; use the default backoff
+    return _RETRY_BASE_DELAY * 2 ** attempt + random.random() * 0.1
+
+
+# Concurrent OpenRouter calls issued by the batch helpers (process-wide)
+_BATCH_CONCURRENCY = 8
+_batch_semaphore = asyncio.Semaphore(_BATCH_CONCURRENCY)
+
+# Exact-match cache of parsed voice intents, keyed on (normalized
+# transcript, locale); least recently used entries are evicted first
+_INTENT_CACHE_SIZE = 2048
+_intent_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+
+def _intent_cache_key(transcript: str, user_locale: str) -> Tuple[str, str]:
+    """Normalize a transcript (case, surrounding/repeated whitespace) for caching."""
+    return " ".join(transcript.lower().split()), user_locale
+
+# Markdown code fence around model JSON output (```json ... ``` or ``` ... ```);
+# the closing fence may be missing when a stream was cut off early
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+def _extract_json(content: str) -> str:
+    """Strip a markdown code fence from model output, if present."""
+    match = _FENCE_RE.search(content)
+    return (match.group(1) if match else content).strip()
+
+
+class _JsonObjectScanner:
+    """Incrementally detect the end of the first top-level JSON object in a text stream."""
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """Consume a chunk; return the offset just past the closing brace, if reached."""
+        for i, char in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = self.started
+            elif char == "{":
+                self.depth += 1
+                self.started = True
+            elif char == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+        return None
+
+
+def _build_nlu_prompt(user_locale: str) -> str:
+    """Build the voice intent system prompt for a locale."""
+    return f"""You are a voice command parser for FamQuest family task app.
+Parse the user's voice command into a structured intent.
+
+**Supported Intents**:
+- create_task: Create new task
+- mark_done: Mark task as completed
+- show_tasks: List user's tasks
+- show_points: Show gamification points
+- add_event: Add calendar event
+- help: Show help
+
+**Locale**: {user_locale}
+
+**Output Format** (pure JSON, no markdown):
+{{
+  "intent": "create_task",
+  "confidence": 0.95,
+  "slots": {{
+    "title": "extracted task title",
+    "datetime": "ISO datetime if mentioned",
+    "assignee": "user name if mentioned",
+    "action": "specific action keyword"
+  }},
+  "response": "Friendly confirmation message in user's language",
+  "locale": "{user_locale}"
+}}
+
+**Examples**:
+Input (NL): "Maak taak stofzuigen morgen 17:00"
+Output: {{"intent": "create_task", "confidence": 0.95, "slots": {{"title": "stofzuigen", "datetime": "tomorrow 17:00"}}, "response": "Ik maak de taak stofzuigen aan voor morgen 17:00", "locale": "nl"}}
+
+Input (EN): "Show my tasks for today"
+Output: {{"intent": "show_tasks", "confidence": 1.0, "slots": {{"filter": "today"}}, "response": "Here are your tasks for today", "locale": "en"}}
+
+Parse this command now (return only JSON):"""
+
+
+# NLU prompts for the app's supported locales, built once at import
+_NLU_PROMPTS = {
+    locale: _build_nlu_prompt(locale)
+    for locale in ("en", "nl", "de", "fr", "tr", "pl", "ar")
+}
+
+
+@lru_cache(maxsize=256)
+def _build_quiz_prompt(subject: str, topic: str, difficulty: str, num_questions: int) -> str:
+    """Build (and memoize) the quiz generation system prompt."""
+    return f"""Generate {num_questions} quiz questions for active recall practice.
+
+**Subject**: {subject}
+**Topic**: {topic}
+**Difficulty**: {difficulty}
+
+**Question Types**:
+- multiple_choice: 4 options, 1 correct
+- true_false: Boolean answer
+- short_answer: Brief text answer
+
+**Output Format** (pure JSON array):
+[
+  {{
+    "question": "Question text",
+    "correct_answer": "Answer",
+    "type": "multiple_choice",
+    "options": ["Option1", "Option2", "Option3", "Option4"],
+    "explanation": "Why this is correct"
+  }}
+]
+
+Generate questions now (JSON only):"""
+
+
 class OpenRouterClient:
     """OpenRouter API client with specialized methods for different AI tasks"""
 
@@ -52,11 +217,21 @@ class OpenRouterClient:
         model: str,
         temperature: float = 0.4,
         timeout: float = 30.0,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        stream: bool = False
     ) -> Tuple[Optional[Dict], Optional[str]]:
         """
         Call OpenRouter API
 
+        With stream=True the completion is read as server-sent events and
+        the stream is closed as soon as the first top-level JSON object in
+        the content is complete (for single-object replies such as voice
+        intents). The result has the same shape as a non-streamed response;
+        "usage" is only present if the stream ran to completion.
+
+        Rate limits and gateway errors (429/502/503/529) are retried up to
+        _MAX_ATTEMPTS times with exponential backoff.
+
         Returns:
             (response_dict, error_message)
         """
@@ -67,20 +242,31 @@ class OpenRouterClient:
             payload = {
                 "model": model,
                 "messages": messages,
-                "temperature": temperature
+                "temperature": temperature,
+                **({"max_tokens": max_tokens} if max_tokens else {})
             }
 
-            if max_tokens:
-                payload["max_tokens"] = max_tokens
-
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
-                    OPENROUTER_URL,
-                    headers=self._headers(),
-                    json=payload
-                )
-                response.raise_for_status()
-                return response.json(), None
+            for attempt in range(_MAX_ATTEMPTS):
+                try:
+                    if stream:
+                        return await self._stream_completion(payload, timeout), None
+
+                    response = await _get_http_client().post(
+                        OPENROUTER_URL,
+                        headers=self._headers(),
+                        content=orjson.dumps(payload),
+                        timeout=timeout
+                    )
+                    response.raise_for_status()
+                    return orjson.loads(response.content), None
+
+                except httpx.HTTPStatusError as e:
+                    status = e.response.status_code
+                    if status not in _RETRYABLE_STATUS or attempt == _MAX_ATTEMPTS - 1:
+                        raise
+                    delay = _retry_delay(e.response, attempt)
+                    logger.warning(f"OpenRouter HTTP {status}, retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
 
         except httpx.TimeoutException:
             logger.error(f"OpenRouter timeout after {timeout}s")
@@ -93,6 +279,51 @@ class OpenRouterClient:
             logger.error(f"OpenRouter error: {str(e)}")
             return None, str(e)
 
+    async def _stream_completion(self, payload: Dict[str, Any], timeout: float) -> Dict:
+        """Stream a completion, stopping early once a JSON object is complete."""
+        payload["stream"] = True
+        parts: List[str] = []
+        usage: Dict[str, Any] = {}
+        scanner = _JsonObjectScanner()
+
+        async with _get_http_client().stream(
+            "POST",
+            OPENROUTER_URL,
+            headers=self._headers(),
+            content=orjson.dumps(payload),
+            timeout=timeout
+        ) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                # SSE: skip keep-alive comments and blank separators
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+
+                event = orjson.loads(data)
+                usage = event.get("usage") or usage
+                choices = event.get("choices") or []
+                chunk = choices[0].get("delta", {}).get("content") if choices else None
+                if not chunk:
+                    continue
+
+                end = scanner.feed(chunk)
+                if end is not None:
+                    # Object complete; drop any trailing tokens
+                    parts.append(chunk[:end])
+                    break
+                parts.append(chunk)
+
+        return {
+            "choices": [{"message": {"content": "".join(parts)}}],
+            "usage": usage
+        }
+
     async def parse_voice_intent(
         self,
         transcript: str,
@@ -118,42 +349,17 @@ class OpenRouterClient:
             "response": "Ik maak de taak 'stofzuigen' aan voor morgen 17:00",
             "locale": "nl"
         }
-        """
-        system_prompt = f"""You are a voice command parser for FamQuest family task app.
-Parse the user's voice command into a structured intent.
 
-**Supported Intents**:
-- create_task: Create new task
-- mark_done: Mark task as completed
-- show_tasks: List user's tasks
-- show_points: Show gamification points
-- add_event: Add calendar event
-- help: Show help
-
-**Locale**: {user_locale}
-
-**Output Format** (pure JSON, no markdown):
-{{
-  "intent": "create_task",
-  "confidence": 0.95,
-  "slots": {{
-    "title": "extracted task title",
-    "datetime": "ISO datetime if mentioned",
-    "assignee": "user name if mentioned",
-    "action": "specific action keyword"
-  }},
-  "response": "Friendly confirmation message in user's language",
-  "locale": "{user_locale}"
-}}
-
-**Examples**:
-Input (NL): "Maak taak stofzuigen morgen 17:00"
-Output: {{"intent": "create_task", "confidence": 0.95, "slots": {{"title": "stofzuigen", "datetime": "tomorrow 17:00"}}, "response": "Ik maak de taak stofzuigen aan voor morgen 17:00", "locale": "nl"}}
-
-Input (EN): "Show my tasks for today"
-Output: {{"intent": "show_tasks", "confidence": 1.0, "slots": {{"filter": "today"}}, "response": "Here are your tasks for today", "locale": "en"}}
+        Successful parses are cached in-process (LRU); cache hits skip the
+        API call and carry "cached": true instead of "tokens_used".
+        """
+        cache_key = _intent_cache_key(transcript, user_locale)
+        cached = _intent_cache.get(cache_key)
+        if cached is not None:
+            _intent_cache.move_to_end(cache_key)
+            return {**copy.deepcopy(cached), "cached": True}
 
-Parse this command now (return only JSON):"""
+        system_prompt = _NLU_PROMPTS.get(user_locale) or _build_nlu_prompt(user_locale)
 
         messages = [
             {"role": "system", "content": system_prompt},
@@ -165,7 +371,8 @@ Parse this command now (return only JSON):"""
             model=MODEL_HAIKU,  # Fast + cheap for NLU
             temperature=0.2,  # Low temperature for structured output
             timeout=TIMEOUT_NLU,
-            max_tokens=500
+            max_tokens=500,
+            stream=True  # Stop reading once the intent object is complete
         )
 
         if error or not response:
@@ -183,24 +390,23 @@ Parse this command now (return only JSON):"""
             content = response["choices"][0]["message"]["content"]
 
             # Extract JSON (handle markdown code blocks)
-            if "```json" in content:
-                start = content.index("```json") + 7
-                end = content.rindex("```")
-                content = content[start:end].strip()
-            elif "```" in content:
-                start = content.index("```") + 3
-                end = content.rindex("```")
-                content = content[start:end].strip()
+            content = _extract_json(content)
+
+            intent_data = orjson.loads(content)
+            intent_data["model"] = MODEL_HAIKU
 
-            intent_data = json.loads(content)
+            # Cache recognized intents (without per-call usage metadata)
+            if intent_data.get("intent") not in (None, "unknown"):
+                _intent_cache[cache_key] = copy.deepcopy(intent_data)
+                if len(_intent_cache) > _INTENT_CACHE_SIZE:
+                    _intent_cache.popitem(last=False)
 
             # Add usage metadata
             intent_data["tokens_used"] = response.get("usage", {})
-            intent_data["model"] = MODEL_HAIKU
 
             return intent_data
 
-        except (json.JSONDecodeError, KeyError, IndexError) as e:
+        except (orjson.JSONDecodeError, KeyError, IndexError) as e:
             logger.error(f"Failed to parse NLU response: {e}")
             return {
                 "intent": "unknown",
@@ -211,6 +417,27 @@ Parse this command now (return only JSON):"""
                 "locale": user_locale
             }
 
+    async def parse_voice_intents_batch(
+        self,
+        items: List[Tuple[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Parse several voice transcripts concurrently.
+
+        Calls run in parallel, at most _BATCH_CONCURRENCY at a time.
+
+        Args:
+            items: (transcript, user_locale) pairs
+
+        Returns:
+            Parsed intents in the same order as items
+        """
+        async def parse_one(transcript: str, user_locale: str) -> Dict[str, Any]:
+            async with _batch_semaphore:
+                return await self.parse_voice_intent(transcript, user_locale)
+
+        return await asyncio.gather(*(parse_one(t, loc) for t, loc in items))
+
     async def generate_study_plan(
         self,
         subject: str,
@@ -329,17 +556,10 @@ Generate the study plan now (JSON only):"""
         try:
             content = response["choices"][0]["message"]["content"]
 
-            # Extract JSON
-            if "```json" in content:
-                start = content.index("```json") + 7
-                end = content.rindex("```")
-                content = content[start:end].strip()
-            elif "```" in content:
-                start = content.index("```") + 3
-                end = content.rindex("```")
-                content = content[start:end].strip()
+            # Extract JSON (handle markdown code blocks)
+            content = _extract_json(content)
 
-            plan_data = json.loads(content)
+            plan_data = orjson.loads(content)
 
             # Add metadata
             plan_data["tokens_used"] = response.get("usage", {})
@@ -348,7 +568,7 @@ Generate the study plan now (JSON only):"""
 
             return plan_data
 
-        except (json.JSONDecodeError, KeyError, IndexError) as e:
+        except (orjson.JSONDecodeError, KeyError, IndexError) as e:
             logger.error(f"Failed to parse study plan response: {e}")
             return {
                 "plan": [],
@@ -380,29 +600,7 @@ Generate the study plan now (JSON only):"""
             }
         ]
         """
-        system_prompt = f"""Generate {num_questions} quiz questions for active recall practice.
-
-**Subject**: {subject}
-**Topic**: {topic}
-**Difficulty**: {difficulty}
-
-**Question Types**:
-- multiple_choice: 4 options, 1 correct
-- true_false: Boolean answer
-- short_answer: Brief text answer
-
-**Output Format** (pure JSON array):
-[
-  {{
-    "question": "Question text",
-    "correct_answer": "Answer",
-    "type": "multiple_choice",
-    "options": ["Option1", "Option2", "Option3", "Option4"],
-    "explanation": "Why this is correct"
-  }}
-]
-
-Generate questions now (JSON only):"""
+        system_prompt = _build_quiz_prompt(subject, topic, difficulty, num_questions)
 
         messages = [
             {"role": "system", "content": system_prompt},
@@ -424,20 +622,35 @@ Generate questions now (JSON only):"""
         try:
             content = response["choices"][0]["message"]["content"]
 
-            # Extract JSON
-            if "```json" in content:
-                start = content.index("```json") + 7
-                end = content.rindex("```")
-                content = content[start:end].strip()
-            elif "```" in content:
-                start = content.index("```") + 3
-                end = content.rindex("```")
-                content = content[start:end].strip()
+            # Extract JSON (handle markdown code blocks)
+            content = _extract_json(content)
 
-            questions = json.loads(content)
+            questions = orjson.loads(content)
 
             return questions if isinstance(questions, list) else []
 
-        except (json.JSONDecodeError, KeyError, IndexError) as e:
+        except (orjson.JSONDecodeError, KeyError, IndexError) as e:
             logger.error(f"Failed to parse quiz response: {e}")
             return []
+
+    async def generate_quizzes_batch(
+        self,
+        specs: List[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Generate several quizzes concurrently (e.g., one per study topic).
+
+        Calls run in parallel, at most _BATCH_CONCURRENCY at a time.
+
+        Args:
+            specs: generate_quiz() keyword arguments per quiz
+                (subject, topic, difficulty, num_questions)
+
+        Returns:
+            Question lists in the same order as specs
+        """
+        async def generate_one(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+            async with _batch_semaphore:
+                return await self.generate_quiz(**spec)
+
+        return await asyncio.gather(*(generate_one(spec) for spec in specs))
@@ -3,13 +3,45 @@ Points Calculation Service
 Manages points economy with multipliers and redemption.
 """
 
+import math
+import logging
+import orjson
 from typing import Tuple, List, Dict, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import bindparam, case, func, insert, update
+from redis.exceptions import RedisError
+from core.cache import get_redis
 from core.models import Task, User, PointsLedger, UserStreak, Reward, AuditLog
+from services.streak_service import StreakService
 from uuid import uuid4
 
+logger = logging.getLogger(__name__)
+
+
+# Shared streak lookup for the streak multiplier (stateless)
+_STREAK_SERVICE = StreakService()
+
+# Multiplier tiers, highest first; the first tier that applies wins.
+# Quality: minimum approval rating; streak: minimum current streak (days);
+# speed: actual duration below this fraction of the estimate.
+_QUALITY_TIERS = ((5, "quality_excellent", 1.2), (4, "quality_good", 1.1))
+_STREAK_TIERS = (
+    (30, "streak_month", 1.3),
+    (14, "streak_two_weeks", 1.2),
+    (7, "streak_week", 1.1)
+)
+_SPEED_TIERS = ((0.5, "speed_demon", 1.15), (0.75, "speed_bonus", 1.05))
+
+# Leaderboards are cached in Redis as one hash per family (field per
+# period/limit), so a points change invalidates them with a single DEL
+_LEADERBOARD_CACHE_TTL = 60
+
+
+def _leaderboard_cache_key(family_id: str) -> str:
+    """Redis hash holding a family's cached leaderboards."""
+    return f"lb:{family_id}"
+
 
 class PointsService:
     """Service for calculating and managing user points."""
@@ -45,31 +77,27 @@ class PointsService:
 
         # Quality bonus (if parent approved with rating)
         if approval_rating:
-            if approval_rating >= 5:
-                multipliers.append(("quality_excellent", 1.2))
-            elif approval_rating >= 4:
-                multipliers.append(("quality_good", 1.1))
+            for min_rating, name, mult in _QUALITY_TIERS:
+                if approval_rating >= min_rating:
+                    multipliers.append((name, mult))
+                    break
 
         # Streak bonus (if user has active streak)
-        from services.streak_service import StreakService
-        streak_service = StreakService()
-        streak = streak_service.get_streak_stats(user.id, Session.object_session(user))
+        streak = _STREAK_SERVICE.get_streak_stats(user.id, Session.object_session(user))
 
         current_streak = streak.get("current", 0)
-        if current_streak >= 30:
-            multipliers.append(("streak_month", 1.3))
-        elif current_streak >= 14:
-            multipliers.append(("streak_two_weeks", 1.2))
-        elif current_streak >= 7:
-            multipliers.append(("streak_week", 1.1))
+        for min_streak, name, mult in _STREAK_TIERS:
+            if current_streak >= min_streak:
+                multipliers.append((name, mult))
+                break
 
         # Speed bonus (completed faster than estimated)
-        if hasattr(task, 'createdAt') and hasattr(task, 'completedAt') and task.estDuration:
+        if task.estDuration and task.completedAt and task.createdAt:
             actual_duration = (task.completedAt - task.createdAt).total_seconds() / 60
-            if actual_duration < task.estDuration * 0.5:
-                multipliers.append(("speed_demon", 1.15))
-            elif actual_duration < task.estDuration * 0.75:
-                multipliers.append(("speed_bonus", 1.05))
+            for fraction, name, mult in _SPEED_TIERS:
+                if actual_duration < task.estDuration * fraction:
+                    multipliers.append((name, mult))
+                    break
 
         # Photo proof bonus (extra effort)
         if task.photoRequired and task.proofPhotos:
@@ -79,10 +107,8 @@ class PointsService:
         if task.claimable and task.claimedBy == user.id:
             multipliers.append(("helper_bonus", 1.1))
 
-        # Calculate final points
-        final_points = float(base_points)
-        for name, mult in multipliers:
-            final_points *= mult
+        # Calculate final points (applied left to right, as before)
+        final_points = math.prod([float(base_points), *(mult for _, mult in multipliers)])
 
         return int(final_points), multipliers
 
@@ -93,8 +119,10 @@ class PointsService:
         points: int,
         reason: str,
         db: Session,
-        reward_id: Optional[str] = None
-    ):
+        reward_id: Optional[str] = None,
+        current_balance_hint: Optional[int] = None,
+        flush: bool = True
+    ) -> int:
         """
         Award points to user and log in ledger.
 
@@ -105,6 +133,13 @@ class PointsService:
             reason: Reason for points transaction
             db: Database session
             reward_id: Reward ID (if points spent on reward)
+            current_balance_hint: Balance before this award, if the caller
+                already knows it (skips the balance query)
+            flush: Flush the new rows immediately (pass False when awarding
+                in a loop; use award_points_bulk for many awards)
+
+        Returns:
+            New points balance
         """
         # Create ledger entry
         entry = PointsLedger(
@@ -118,6 +153,17 @@ class PointsService:
         )
         db.add(entry)
 
+        # Keep the materialized balance in step, in the same transaction
+        db.query(User).filter_by(id=user_id).update(
+            {User.pointsBalance: User.pointsBalance + points},
+            synchronize_session=False
+        )
+
+        if current_balance_hint is not None:
+            new_balance = current_balance_hint + points
+        else:
+            new_balance = self.get_user_points(user_id, db)
+
         # Log to audit log
         user = db.query(User).filter_by(id=user_id).first()
         if user:
@@ -131,17 +177,104 @@ class PointsService:
                     "reason": reason,
                     "task_id": task_id,
                     "reward_id": reward_id,
-                    "new_balance": self.get_user_points(user_id, db)
+                    "new_balance": new_balance
                 },
                 createdAt=datetime.utcnow()
             )
             db.add(log_entry)
 
+        if flush:
+            db.flush()
+
+        return new_balance
+
+    def award_points_bulk(self, awards: List[Dict], db: Session) -> Dict[str, int]:
+        """
+        Award points for many transactions at once.
+
+        Ledger and audit entries are written with one multi-row INSERT each
+        and balances with one executemany UPDATE, instead of a flush per
+        award. Audit entries record the running balance after each award.
+
+        Args:
+            awards: Dicts with user_id, points, reason and optionally
+                task_id and reward_id (same meaning as award_points)
+            db: Database session
+
+        Returns:
+            Dict of user_id -> new points balance
+        """
+        if not awards:
+            return {}
+
+        users = {
+            row.id: row for row in db.query(
+                User.id, User.familyId, User.pointsBalance
+            ).filter(User.id.in_({award["user_id"] for award in awards}))
+        }
+        balances = {user_id: row.pointsBalance or 0 for user_id, row in users.items()}
+        deltas: Dict[str, int] = {}
+
+        now = datetime.utcnow()
+        ledger_rows = []
+        audit_rows = []
+
+        for award in awards:
+            user_id = award["user_id"]
+            points = award["points"]
+            task_id = award.get("task_id")
+            reward_id = award.get("reward_id")
+
+            ledger_rows.append({
+                "id": str(uuid4()),
+                "userId": user_id,
+                "delta": points,
+                "reason": award["reason"],
+                "taskId": task_id,
+                "rewardId": reward_id,
+                "createdAt": now
+            })
+            deltas[user_id] = deltas.get(user_id, 0) + points
+
+            user = users.get(user_id)
+            if user:
+                balances[user_id] += points
+                audit_rows.append({
+                    "id": str(uuid4()),
+                    "actorUserId": user_id,
+                    "familyId": user.familyId,
+                    "action": "points.awarded" if points > 0 else "points.spent",
+                    "meta": {
+                        "delta": points,
+                        "reason": award["reason"],
+                        "task_id": task_id,
+                        "reward_id": reward_id,
+                        "new_balance": balances[user_id]
+                    },
+                    "createdAt": now
+                })
+
+        db.execute(insert(PointsLedger), ledger_rows)
+        if audit_rows:
+            db.execute(insert(AuditLog), audit_rows)
+
+        users_table = User.__table__
+        db.execute(
+            update(users_table)
+            .where(users_table.c.id == bindparam("b_user_id"))
+            .values(pointsBalance=users_table.c.pointsBalance + bindparam("b_delta")),
+            [{"b_user_id": user_id, "b_delta": delta} for user_id, delta in deltas.items()]
+        )
         db.flush()
 
+        return balances
+
     def get_user_points(self, user_id: str, db: Session) -> int:
         """
-        Calculate total points for user.
+        Get current points balance for user.
+
+        Reads the materialized User.pointsBalance instead of summing the
+        ledger; see reconcile_points_balances for rebuilding it.
 
         Args:
             user_id: User ID
@@ -150,12 +283,45 @@ class PointsService:
         Returns:
             Total points balance
         """
-        total = db.query(func.sum(PointsLedger.delta)).filter(
-            PointsLedger.userId == user_id
-        ).scalar()
+        total = db.query(User.pointsBalance).filter_by(id=user_id).scalar()
 
         return int(total) if total else 0
 
+    def reconcile_points_balances(
+        self,
+        db: Session,
+        user_ids: Optional[List[str]] = None
+    ) -> int:
+        """
+        Rebuild User.pointsBalance from the points ledger.
+
+        The ledger stays the source of truth; run this after writing ledger
+        entries outside award_points (seeding, manual fixes) or as a
+        periodic consistency job.
+
+        Args:
+            db: Database session
+            user_ids: Users to rebuild (all users if omitted)
+
+        Returns:
+            Number of users updated
+        """
+        ledger_total = db.query(
+            func.coalesce(func.sum(PointsLedger.delta), 0)
+        ).filter(PointsLedger.userId == User.id).scalar_subquery()
+
+        query = db.query(User)
+        if user_ids is not None:
+            query = query.filter(User.id.in_(user_ids))
+
+        updated = query.update(
+            {User.pointsBalance: ledger_total},
+            synchronize_session=False
+        )
+        db.commit()
+
+        return updated
+
     def get_points_history(
         self,
         user_id: str,
@@ -165,6 +331,9 @@ class PointsService:
         """
         Get points transaction history for user.
 
+        Each entry's balance_after is a running SUM() window over the
+        user's ledger, so history and balances come from one query.
+
         Args:
             user_id: User ID
             db: Database session
@@ -173,26 +342,34 @@ class PointsService:
         Returns:
             List of transaction dictionaries
         """
-        entries = db.query(PointsLedger).filter(
-            PointsLedger.userId == user_id
-        ).order_by(PointsLedger.createdAt.desc()).limit(limit).all()
-
-        history = []
-        running_balance = self.get_user_points(user_id, db)
+        ledger = db.query(
+            PointsLedger.id,
+            PointsLedger.delta,
+            PointsLedger.reason,
+            PointsLedger.taskId,
+            PointsLedger.rewardId,
+            PointsLedger.createdAt,
+            func.sum(PointsLedger.delta).over(
+                order_by=(PointsLedger.createdAt.asc(), PointsLedger.id.asc())
+            ).label("balance_after")
+        ).filter(PointsLedger.userId == user_id).subquery()
+
+        entries = db.query(ledger).order_by(
+            ledger.c.createdAt.desc(), ledger.c.id.desc()
+        ).limit(limit).all()
 
-        for entry in entries:
-            history.append({
+        return [
+            {
                 "id": entry.id,
                 "delta": entry.delta,
                 "reason": entry.reason,
                 "task_id": entry.taskId,
                 "reward_id": entry.rewardId,
                 "created_at": entry.createdAt.isoformat(),
-                "balance_after": running_balance
-            })
-            running_balance -= entry.delta
-
-        return history
+                "balance_after": int(entry.balance_after)
+            }
+            for entry in entries
+        ]
 
     def spend_points(
         self,
@@ -240,8 +417,10 @@ class PointsService:
             points=-cost,
             reason=f"Redeemed: {reward.name}",
             db=db,
-            reward_id=reward_id
+            reward_id=reward_id,
+            current_balance_hint=current_points
         )
+        new_balance = current_points - cost
 
         # Log redemption
         user = db.query(User).filter_by(id=user_id).first()
@@ -256,7 +435,7 @@ class PointsService:
                     "reward_name": reward.name,
                     "cost": cost,
                     "requires_approval": require_approval,
-                    "new_balance": self.get_user_points(user_id, db)
+                    "new_balance": new_balance
                 },
                 createdAt=datetime.utcnow()
             )
@@ -269,7 +448,7 @@ class PointsService:
             "reward_id": reward_id,
             "reward_name": reward.name,
             "cost": cost,
-            "new_balance": self.get_user_points(user_id, db),
+            "new_balance": new_balance,
             "requires_approval": require_approval
         }
 
@@ -277,7 +456,8 @@ class PointsService:
         self,
         user_id: str,
         family_id: str,
-        db: Session
+        db: Session,
+        current_points: Optional[int] = None
     ) -> List[Dict]:
         """
         Get rewards user can afford with current points.
@@ -286,11 +466,13 @@ class PointsService:
             user_id: User ID
             family_id: Family ID
             db: Database session
+            current_points: Known balance, skips the balance query if given
 
         Returns:
             List of affordable reward dictionaries
         """
-        current_points = self.get_user_points(user_id, db)
+        if current_points is None:
+            current_points = self.get_user_points(user_id, db)
 
         rewards = db.query(Reward).filter(
             Reward.familyId == family_id,
@@ -329,55 +511,256 @@ class PointsService:
         Returns:
             List of leaderboard entries with rankings
         """
-        # Get family users
-        users = db.query(User).filter_by(familyId=family_id).all()
-        user_ids = [u.id for u in users]
-
         # Calculate time filter
+        cutoff = self._get_period_cutoff(period)
+        total_points = func.sum(PointsLedger.delta)
+
+        # Per-user totals in one aggregate query (helpers excluded)
+        query = db.query(
+            User.id,
+            User.displayName,
+            User.avatar,
+            User.role,
+            total_points.label("points")
+        ).join(PointsLedger, PointsLedger.userId == User.id).filter(
+            User.familyId == family_id,
+            User.role != "helper"
+        )
+
+        if cutoff:
+            query = query.filter(PointsLedger.createdAt >= cutoff)
+
+        rows = query.group_by(
+            User.id, User.displayName, User.avatar, User.role
+        ).having(total_points > 0).order_by(total_points.desc()).limit(limit).all()
+
+        return [
+            {
+                "user_id": row.id,
+                "display_name": row.displayName,
+                "avatar": row.avatar,
+                "role": row.role,
+                "points": int(row.points),
+                "rank": idx
+            }
+            for idx, row in enumerate(rows, start=1)
+        ]
+
+    async def get_leaderboard_cached(
+        self,
+        family_id: str,
+        db: Session,
+        period: str = "week",
+        limit: int = 10
+    ) -> List[Dict]:
+        """
+        Get family leaderboard through the shared Redis cache.
+
+        Cached for _LEADERBOARD_CACHE_TTL seconds and dropped by
+        invalidate_leaderboard_cache when points change. Falls back to
+        get_leaderboard if Redis is unavailable.
+
+        Args:
+            family_id: Family ID
+            db: Database session
+            period: Time period (week, month, alltime)
+            limit: Maximum number of users to return
+
+        Returns:
+            List of leaderboard entries with rankings
+        """
+        key = _leaderboard_cache_key(family_id)
+        field = f"{period}:{limit}"
+
+        try:
+            redis = await get_redis()
+            cached = await redis.hget(key, field)
+            if cached:
+                return orjson.loads(cached)
+        except RedisError as e:
+            logger.warning(f"Leaderboard cache read failed: {e}")
+
+        leaderboard = self.get_leaderboard(family_id, db, period=period, limit=limit)
+
+        try:
+            redis = await get_redis()
+            await redis.hset(key, field, orjson.dumps(leaderboard))
+            await redis.expire(key, _LEADERBOARD_CACHE_TTL)
+        except RedisError as e:
+            logger.warning(f"Leaderboard cache write failed: {e}")
+
+        return leaderboard
+
+    async def invalidate_leaderboard_cache(self, family_id: str) -> None:
+        """
+        Drop a family's cached leaderboards (call after committing points changes).
+
+        Args:
+            family_id: Family ID
+        """
+        try:
+            redis = await get_redis()
+            await redis.delete(_leaderboard_cache_key(family_id))
+        except RedisError as e:
+            logger.warning(f"Leaderboard cache invalidation failed: {e}")
+
+    def get_week_and_alltime_leaderboards(
+        self,
+        family_id: str,
+        db: Session,
+        limit: int = 10
+    ) -> Dict[str, List[Dict]]:
+        """
+        Get week and all-time leaderboards with a single aggregate query.
+
+        Args:
+            family_id: Family ID
+            db: Database session
+            limit: Maximum number of users per leaderboard
+
+        Returns:
+            Dict with "week" and "alltime" leaderboard entry lists
+        """
+        week_cutoff = self._get_period_cutoff("week")
+
+        rows = db.query(
+            User.id,
+            User.displayName,
+            User.avatar,
+            User.role,
+            func.sum(
+                case((PointsLedger.createdAt >= week_cutoff, PointsLedger.delta), else_=0)
+            ).label("week_points"),
+            func.sum(PointsLedger.delta).label("alltime_points")
+        ).join(PointsLedger, PointsLedger.userId == User.id).filter(
+            User.familyId == family_id,
+            User.role != "helper"
+        ).group_by(User.id, User.displayName, User.avatar, User.role).all()
+
+        leaderboards = {}
+
+        for period in ("week", "alltime"):
+            entries = []
+            for row in rows:
+                points = getattr(row, f"{period}_points") or 0
+                if points > 0:
+                    entries.append({
+                        "user_id": row.id,
+                        "display_name": row.displayName,
+                        "avatar": row.avatar,
+                        "role": row.role,
+                        "points": int(points)
+                    })
+
+            entries.sort(key=lambda x: x["points"], reverse=True)
+
+            for idx, entry in enumerate(entries[:limit], start=1):
+                entry["rank"] = idx
+
+            leaderboards[period] = entries[:limit]
+
+        return leaderboards
+
+    def get_user_rank(
+        self,
+        user_id: str,
+        family_id: str,
+        db: Session,
+        period: str = "week"
+    ) -> Optional[int]:
+        """
+        Get user's leaderboard rank without loading the full leaderboard.
+
+        Ranking is computed in the database with ROW_NUMBER() over the
+        per-user point sums, using the same rules as get_leaderboard.
+
+        Args:
+            user_id: User ID
+            family_id: Family ID
+            db: Database session
+            period: Time period (week, month, alltime)
+
+        Returns:
+            1-based rank, or None if user has no points in period
+        """
+        cutoff = self._get_period_cutoff(period)
+        total_points = func.sum(PointsLedger.delta)
+
+        query = db.query(
+            PointsLedger.userId.label("user_id"),
+            func.row_number().over(order_by=total_points.desc()).label("rank")
+        ).join(User, User.id == PointsLedger.userId).filter(
+            User.familyId == family_id,
+            User.role != "helper"
+        )
+
+        if cutoff:
+            query = query.filter(PointsLedger.createdAt >= cutoff)
+
+        ranked = query.group_by(PointsLedger.userId).having(total_points > 0).subquery()
+
+        return db.query(ranked.c.rank).filter(ranked.c.user_id == user_id).scalar()
+
+    def _get_period_cutoff(self, period: str) -> Optional[datetime]:
+        """Return start of leaderboard period, or None for all-time."""
         now = datetime.utcnow()
         if period == "week":
-            from datetime import timedelta
-            cutoff = now - timedelta(days=7)
+            return now - timedelta(days=7)
         elif period == "month":
-            from datetime import timedelta
-            cutoff = now - timedelta(days=30)
-        else:
-            cutoff = None
-
-        # Get points for each user
-        leaderboard = []
+            return now - timedelta(days=30)
+        return None
 
-        for user in users:
-            # Skip helper role from leaderboard
-            if user.role == "helper":
-                continue
+    def summarize_ledger(
+        self,
+        user_id: str,
+        entries: List[PointsLedger],
+        alltime_leaderboard: List[Dict]
+    ) -> Dict:
+        """
+        Build the points summary from already loaded ledger entries.
 
-            query = db.query(func.sum(PointsLedger.delta)).filter(
-                PointsLedger.userId == user.id
-            )
+        Produces the same shape as get_points_summary without querying.
 
-            if cutoff:
-                query = query.filter(PointsLedger.createdAt >= cutoff)
+        Args:
+            user_id: User ID
+            entries: All ledger entries for the user
+            alltime_leaderboard: Family all-time leaderboard
 
-            total_points = query.scalar() or 0
+        Returns:
+            Dict with points statistics
+        """
+        total_points = sum(e.delta for e in entries)
+        total_earned = sum(e.delta for e in entries if e.delta > 0)
+        total_spent = sum(e.delta for e in entries if e.delta < 0)
 
-            if total_points > 0:
-                leaderboard.append({
-                    "user_id": user.id,
-                    "display_name": user.displayName,
-                    "avatar": user.avatar,
-                    "role": user.role,
-                    "points": int(total_points)
-                })
+        recent_history = []
+        running_balance = total_points
 
-        # Sort by points descending
-        leaderboard.sort(key=lambda x: x["points"], reverse=True)
+        for entry in sorted(entries, key=lambda e: e.createdAt, reverse=True)[:10]:
+            recent_history.append({
+                "id": entry.id,
+                "delta": entry.delta,
+                "reason": entry.reason,
+                "task_id": entry.taskId,
+                "reward_id": entry.rewardId,
+                "created_at": entry.createdAt.isoformat(),
+                "balance_after": running_balance
+            })
+            running_balance -= entry.delta
 
-        # Add rankings
-        for idx, entry in enumerate(leaderboard[:limit], start=1):
-            entry["rank"] = idx
+        leaderboard_position = None
+        for idx, entry in enumerate(alltime_leaderboard, start=1):
+            if entry["user_id"] == user_id:
+                leaderboard_position = idx
+                break
 
-        return leaderboard[:limit]
+        return {
+            "current_balance": int(total_points),
+            "total_earned": int(total_earned),
+            "total_spent": abs(int(total_spent)),
+            "recent_history": recent_history,
+            "leaderboard_position": leaderboard_position
+        }
 
     def get_points_summary(self, user_id: str, db: Session) -> Dict:
         """
@@ -390,33 +773,29 @@ class PointsService:
         Returns:
             Dict with points statistics
         """
-        total_points = self.get_user_points(user_id, db)
-
-        # Points earned (positive deltas only)
-        total_earned = db.query(func.sum(PointsLedger.delta)).filter(
-            PointsLedger.userId == user_id,
-            PointsLedger.delta > 0
-        ).scalar() or 0
-
-        # Points spent (negative deltas only)
-        total_spent = db.query(func.sum(PointsLedger.delta)).filter(
-            PointsLedger.userId == user_id,
-            PointsLedger.delta < 0
-        ).scalar() or 0
+        # Balance, points earned (positive deltas) and spent (negative
+        # deltas) in one pass over the user's ledger
+        total_points, total_earned, total_spent = db.query(
+            func.coalesce(func.sum(PointsLedger.delta), 0),
+            func.coalesce(func.sum(
+                case((PointsLedger.delta > 0, PointsLedger.delta), else_=0)
+            ), 0),
+            func.coalesce(func.sum(
+                case((PointsLedger.delta < 0, PointsLedger.delta), else_=0)
+            ), 0)
+        ).filter(PointsLedger.userId == user_id).one()
 
         # Recent transactions
         recent_history = self.get_points_history(user_id, db, limit=10)
 
-        # Get user's family for leaderboard position
-        user = db.query(User).filter_by(id=user_id).first()
+        # All-time leaderboard position, ranked in SQL
+        family_id = db.query(User.familyId).filter_by(id=user_id).scalar()
         leaderboard_position = None
 
-        if user:
-            leaderboard = self.get_leaderboard(user.familyId, db, period="alltime")
-            for idx, entry in enumerate(leaderboard, start=1):
-                if entry["user_id"] == user_id:
-                    leaderboard_position = idx
-                    break
+        if family_id:
+            leaderboard_position = self.get_user_rank(
+                user_id, family_id, db, period="alltime"
+            )
 
         return {
             "current_balance": int(total_points),
@@ -3,10 +3,151 @@ Premium Service
 Monetization logic for FamQuest premium features and limits
 """
 
+import asyncio
+import logging
+import orjson
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
+from redis.exceptions import RedisError
 from datetime import datetime, timedelta
+from core.cache import get_sync_redis
 from core.models import User, Family, AIUsageLog
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cross-request premium status cache; purchases/cancellations delete the key
+_PREMIUM_CACHE_TTL = 60
+
+
+def _premium_cache_key(user_id: str) -> str:
+    return f"premium:{user_id}"
+
+
+# Static price list returned by get_pricing (shared; treat as read-only)
+_PRICING = {
+    "family_unlock": {
+        "price": 9.99,
+        "currency": "EUR",
+        "type": "one_time",
+        "description": "Unlock all 8 themes for your entire family"
+    },
+    "premium_monthly": {
+        "price": 4.99,
+        "currency": "EUR",
+        "type": "subscription",
+        "billing_period": "monthly",
+        "description": "Unlimited AI planning, all themes, priority support"
+    },
+    "premium_yearly": {
+        "price": 49.99,
+        "currency": "EUR",
+        "type": "subscription",
+        "billing_period": "yearly",
+        "save_percentage": "20%",
+        "description": "Unlimited AI planning, all themes, priority support (save 20%)"
+    }
+}
+
+# Themes available without premium or family unlock
+_FREE_THEMES = frozenset({'minimal', 'cartoony'})
+
+# Actions counted against the free-tier daily AI limit
+_AI_QUOTA_ACTIONS = ('plan_week', 'generate_tasks', 'study_plan')
+_AI_QUOTA_DAILY_LIMIT = 5
+# Day-bucketed counters outlive their day by 24h as a safety margin
+_AI_QUOTA_TTL = 172800
+
+
+def _ai_quota_key(user_id: str, day: datetime) -> str:
+    return f"aiquota:{user_id}:{day.date().isoformat()}"
+
+
+# Buffered AI usage audit log: rows are queued by log_ai_usage and written
+# in bulk by a background task, so logging never commits on the request path
+_USAGE_FLUSH_SIZE = 500
+_USAGE_FLUSH_INTERVAL = 2.0
+
+_usage_buffer: Optional[asyncio.Queue] = None
+_usage_writer: Optional[asyncio.Task] = None
+
+
+def _write_usage_rows(rows: List[Dict]):
+    """Insert a batch of AIUsageLog rows in one statement and commit"""
+    from core.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(AIUsageLog), rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _flush_usage_rows(rows: List[Dict]):
+    try:
+        await asyncio.to_thread(_write_usage_rows, rows)
+    except Exception as e:
+        logger.error(f"Failed to write {len(rows)} AI usage log rows: {e}")
+
+
+async def _run_usage_writer():
+    """
+    Drain the usage buffer every _USAGE_FLUSH_SIZE rows or _USAGE_FLUSH_INTERVAL seconds.
+
+    Rows already taken off the buffer are flushed when the writer is
+    cancelled, so stop_usage_writer() never loses a partial batch.
+    """
+    loop = asyncio.get_running_loop()
+    rows: List[Dict] = []
+    try:
+        while True:
+            rows.append(await _usage_buffer.get())
+            deadline = loop.time() + _USAGE_FLUSH_INTERVAL
+            while len(rows) < _USAGE_FLUSH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.append(await asyncio.wait_for(_usage_buffer.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch, rows = rows, []
+            await _flush_usage_rows(batch)
+    finally:
+        if rows:
+            await _flush_usage_rows(rows)
+
+
+def start_usage_writer():
+    """Start the background AI usage writer (call once per process on startup)"""
+    global _usage_buffer, _usage_writer
+    if _usage_writer is None:
+        _usage_buffer = asyncio.Queue()
+        _usage_writer = asyncio.create_task(_run_usage_writer())
+
+
+async def stop_usage_writer():
+    """Stop the background writer and flush any rows still buffered"""
+    global _usage_buffer, _usage_writer
+    if _usage_writer is None:
+        return
+
+    _usage_writer.cancel()
+    try:
+        await _usage_writer
+    except asyncio.CancelledError:
+        pass
+
+    rows = []
+    while not _usage_buffer.empty():
+        rows.append(_usage_buffer.get_nowait())
+    if rows:
+        await _flush_usage_rows(rows)
+
+    _usage_buffer = None
+    _usage_writer = None
+
 
 class PremiumService:
     """
@@ -20,6 +161,11 @@ class PremiumService:
 
     def __init__(self, db: Session):
         self.db = db
+        # One clock read per request; services are created per request
+        self._now = datetime.utcnow()
+        # check_premium results per user id; services are created per
+        # request, so this only spans the current request
+        self._premium_cache: Dict[str, Dict[str, any]] = {}
 
     def check_premium(self, user: User) -> Dict[str, any]:
         """
@@ -38,15 +184,34 @@ class PremiumService:
                 "advanced_analytics": true
             }
         }
+
+        Results are memoized on this service instance, so repeated checks
+        within a request (e.g. can_use_ai_planning + can_use_theme) query
+        the family only once, and shared across requests through Redis for
+        _PREMIUM_CACHE_TTL seconds.
         """
 
+        cached = self._premium_cache.get(user.id)
+        if cached is not None:
+            return cached
+
+        try:
+            raw = get_sync_redis().get(_premium_cache_key(user.id))
+        except RedisError as e:
+            logger.warning(f"Premium cache read failed: {e}")
+            raw = None
+        if raw:
+            status = orjson.loads(raw)
+            self._premium_cache[user.id] = status
+            return status
+
         has_premium = False
         has_family_unlock = False
         premium_expires = None
         premium_plan = None
 
         # Check premium subscription (individual user)
-        if user.premiumUntil and user.premiumUntil > datetime.utcnow():
+        if user.premiumUntil and user.premiumUntil > self._now:
             has_premium = True
             premium_expires = user.premiumUntil.isoformat()
             premium_plan = user.premiumPlan
@@ -56,7 +221,7 @@ class PremiumService:
         if family and family.familyUnlock:
             has_family_unlock = True
 
-        return {
+        status = {
             "has_premium": has_premium,
             "has_family_unlock": has_family_unlock,
             "premium_expires": premium_expires,
@@ -70,6 +235,25 @@ class PremiumService:
                 "export_data": has_premium
             }
         }
+        self._premium_cache[user.id] = status
+
+        try:
+            get_sync_redis().setex(
+                _premium_cache_key(user.id), _PREMIUM_CACHE_TTL, orjson.dumps(status)
+            )
+        except RedisError as e:
+            logger.warning(f"Premium cache write failed: {e}")
+
+        return status
+
+    def _invalidate_premium_cache(self, *user_ids: str):
+        """Drop cached premium status for the given users (instance + Redis)"""
+        for user_id in user_ids:
+            self._premium_cache.pop(user_id, None)
+        try:
+            get_sync_redis().delete(*(_premium_cache_key(u) for u in user_ids))
+        except RedisError as e:
+            logger.warning(f"Premium cache invalidation failed: {e}")
 
     def can_use_ai_planning(self, user: User) -> Dict[str, any]:
         """
@@ -99,16 +283,12 @@ class PremiumService:
             }
 
         # Free users: 5 per day limit
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        today_start = self._now.replace(hour=0, minute=0, second=0, microsecond=0)
         tomorrow_start = today_start + timedelta(days=1)
 
-        ai_count_today = self.db.query(AIUsageLog).filter(
-            AIUsageLog.userId == user.id,
-            AIUsageLog.createdAt >= today_start,
-            AIUsageLog.action.in_(['plan_week', 'generate_tasks', 'study_plan'])
-        ).count()
+        ai_count_today = self._get_ai_usage_today(user, today_start)
 
-        daily_limit = 5
+        daily_limit = _AI_QUOTA_DAILY_LIMIT
         remaining = max(0, daily_limit - ai_count_today)
 
         return {
@@ -118,24 +298,89 @@ class PremiumService:
             "resets_at": tomorrow_start.isoformat()
         }
 
+    def _count_ai_usage_today(self, user: User, today_start: datetime) -> int:
+        """Count today's quota-relevant AI usage from the audit log"""
+        return self.db.query(AIUsageLog).filter(
+            AIUsageLog.userId == user.id,
+            AIUsageLog.createdAt >= today_start,
+            AIUsageLog.action.in_(_AI_QUOTA_ACTIONS)
+        ).count()
+
+    def _get_ai_usage_today(self, user: User, today_start: datetime) -> int:
+        """
+        Today's AI usage count from the Redis counter.
+
+        A missing counter (first request of the day, Redis restart) is
+        seeded from the audit log; if Redis is unavailable the audit log
+        is counted directly.
+        """
+        key = _ai_quota_key(user.id, today_start)
+        try:
+            redis = get_sync_redis()
+            cached = redis.get(key)
+            if cached is not None:
+                return int(cached)
+
+            count = self._count_ai_usage_today(user, today_start)
+            redis.set(key, count, ex=_AI_QUOTA_TTL, nx=True)
+            return count
+        except RedisError as e:
+            logger.warning(f"AI quota counter read failed: {e}")
+            return self._count_ai_usage_today(user, today_start)
+
+    def _increment_ai_usage_today(self, user: User):
+        """
+        Bump today's Redis quota counter for a new usage row.
+
+        The counter must already be seeded (see log_ai_usage); it is never
+        reseeded here because buffered rows may not be in the audit log yet.
+        """
+        today_start = self._now.replace(hour=0, minute=0, second=0, microsecond=0)
+        key = _ai_quota_key(user.id, today_start)
+        try:
+            redis = get_sync_redis()
+            pipe = redis.pipeline()
+            pipe.incr(key)
+            pipe.expire(key, _AI_QUOTA_TTL)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"AI quota counter update failed: {e}")
+
     def log_ai_usage(self, user: User, action: str, metadata: Optional[Dict] = None):
         """
         Log AI usage for rate limiting and analytics.
 
+        When the background writer is running the row is queued and written
+        in bulk; otherwise (scripts, tests) it is committed immediately.
+
         Args:
             user: User object
             action: 'plan_week' | 'generate_tasks' | 'study_plan'
             metadata: Optional metadata (e.g., tasks_generated, model, tokens)
         """
 
-        usage_log = AIUsageLog(
-            userId=user.id,
-            action=action,
-            metadata=metadata or {}
-        )
+        row = {
+            "userId": user.id,
+            "action": action,
+            "meta": metadata or {},
+            "createdAt": self._now
+        }
 
-        self.db.add(usage_log)
-        self.db.commit()
+        quota_relevant = action in _AI_QUOTA_ACTIONS
+        if quota_relevant:
+            # Seed a missing counter (SET NX) before this row exists so the
+            # INCR below counts it exactly once
+            today_start = self._now.replace(hour=0, minute=0, second=0, microsecond=0)
+            self._get_ai_usage_today(user, today_start)
+
+        if _usage_buffer is not None:
+            _usage_buffer.put_nowait(row)
+        else:
+            self.db.add(AIUsageLog(**row))
+            self.db.commit()
+
+        if quota_relevant:
+            self._increment_ai_usage_today(user)
 
     def can_use_theme(self, user: User, theme: str) -> bool:
         """
@@ -146,10 +391,8 @@ class PremiumService:
         Premium: All 8 themes
         """
 
-        free_themes = {'minimal', 'cartoony'}
-
         # Free themes always allowed
-        if theme in free_themes:
+        if theme in _FREE_THEMES:
             return True
 
         # Check premium or family unlock
@@ -178,18 +421,18 @@ class PremiumService:
                 raise ValueError("User's family not found")
 
             family.familyUnlock = True
-            family.familyUnlockPurchasedAt = datetime.utcnow()
+            family.familyUnlockPurchasedAt = self._now
             family.familyUnlockPurchasedById = user.id
 
         elif plan == 'monthly':
             # Monthly subscription (€4.99/month)
-            user.premiumUntil = datetime.utcnow() + timedelta(days=30)
+            user.premiumUntil = self._now + timedelta(days=30)
             user.premiumPlan = 'monthly'
             user.premiumPaymentId = payment_id
 
         elif plan == 'yearly':
             # Yearly subscription (€49.99/year)
-            user.premiumUntil = datetime.utcnow() + timedelta(days=365)
+            user.premiumUntil = self._now + timedelta(days=365)
             user.premiumPlan = 'yearly'
             user.premiumPaymentId = payment_id
 
@@ -197,6 +440,13 @@ class PremiumService:
             raise ValueError(f"Invalid plan: {plan}")
 
         self.db.commit()
+        if plan == "family_unlock" and user.familyId:
+            member_ids = self.db.execute(
+                select(User.id).where(User.familyId == user.familyId)
+            ).scalars().all()
+            self._invalidate_premium_cache(*member_ids)
+        else:
+            self._invalidate_premium_cache(user.id)
 
     def cancel_premium(self, user: User):
         """
@@ -210,6 +460,7 @@ class PremiumService:
         # Just clear payment ID to prevent renewal
         user.premiumPaymentId = None
         self.db.commit()
+        self._invalidate_premium_cache(user.id)
 
     def renew_premium(self, user: User):
         """
@@ -224,21 +475,22 @@ class PremiumService:
 
         if user.premiumPlan == 'monthly':
             # Extend by 30 days
-            if user.premiumUntil and user.premiumUntil > datetime.utcnow():
+            if user.premiumUntil and user.premiumUntil > self._now:
                 # Still active, extend from current expiry
                 user.premiumUntil = user.premiumUntil + timedelta(days=30)
             else:
                 # Expired, extend from now
-                user.premiumUntil = datetime.utcnow() + timedelta(days=30)
+                user.premiumUntil = self._now + timedelta(days=30)
 
         elif user.premiumPlan == 'yearly':
             # Extend by 365 days
-            if user.premiumUntil and user.premiumUntil > datetime.utcnow():
+            if user.premiumUntil and user.premiumUntil > self._now:
                 user.premiumUntil = user.premiumUntil + timedelta(days=365)
             else:
-                user.premiumUntil = datetime.utcnow() + timedelta(days=365)
+                user.premiumUntil = self._now + timedelta(days=365)
 
         self.db.commit()
+        self._invalidate_premium_cache(user.id)
 
     def get_pricing(self) -> Dict[str, any]:
         """
@@ -252,26 +504,4 @@ class PremiumService:
         }
         """
 
-        return {
-            "family_unlock": {
-                "price": 9.99,
-                "currency": "EUR",
-                "type": "one_time",
-                "description": "Unlock all 8 themes for your entire family"
-            },
-            "premium_monthly": {
-                "price": 4.99,
-                "currency": "EUR",
-                "type": "subscription",
-                "billing_period": "monthly",
-                "description": "Unlimited AI planning, all themes, priority support"
-            },
-            "premium_yearly": {
-                "price": 49.99,
-                "currency": "EUR",
-                "type": "subscription",
-                "billing_period": "yearly",
-                "save_percentage": "20%",
-                "description": "Unlimited AI planning, all themes, priority support (save 20%)"
-            }
-        }
+        return _PRICING
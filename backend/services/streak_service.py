@@ -4,11 +4,15 @@ Manages daily completion streaks for gamification.
 """
 
 from datetime import date, datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from core.models import UserStreak, User, AuditLog
 from uuid import uuid4
 
+# Streak lengths that get a streak.milestone audit event
+_STREAK_MILESTONES = frozenset({3, 7, 14, 30, 60, 100})
+
 
 class StreakService:
     """Service for tracking user completion streaks."""
@@ -28,10 +32,17 @@ class StreakService:
             db: Database session
 
         Returns:
-            Dict with streak statistics
+            Dict with streak statistics, built from the updated row rather
+            than re-read from the database
         """
-        # Get or create UserStreak record
-        streak = db.query(UserStreak).filter_by(userId=user_id).first()
+        now = datetime.utcnow()
+
+        # Audit events raised by this update, written in one insert at the end
+        events: List[Dict] = []
+
+        # Get or create UserStreak record; the row lock serializes concurrent
+        # completions for the same user so the read-modify-write can't race
+        streak = db.query(UserStreak).filter_by(userId=user_id).with_for_update().first()
 
         if not streak:
             streak = UserStreak(
@@ -40,21 +51,21 @@ class StreakService:
                 currentStreak=1,
                 longestStreak=1,
                 lastCompletionDate=datetime.combine(completed_date, datetime.min.time()),
-                updatedAt=datetime.utcnow()
+                updatedAt=now
             )
             db.add(streak)
             db.flush()
 
             # Log streak start
             self._log_streak_event(
-                db=db,
+                events=events,
                 user_id=user_id,
                 action="streak.started",
                 meta={"streak": 1, "date": completed_date.isoformat()}
             )
+            self._write_streak_events(db, user_id, events, now)
 
-            db.commit()
-            return self.get_streak_stats(user_id, db)
+            return self.format_streak_stats(streak)
 
         # Check if this is a consecutive day
         last_completion = streak.lastCompletionDate.date() if streak.lastCompletionDate else None
@@ -64,7 +75,7 @@ class StreakService:
 
             if days_since_last == 0:
                 # Same day completion, no streak change
-                return self.get_streak_stats(user_id, db)
+                return self.format_streak_stats(streak)
 
             elif days_since_last == 1:
                 # Consecutive day, increment streak
@@ -74,7 +85,7 @@ class StreakService:
                 if streak.currentStreak > streak.longestStreak:
                     streak.longestStreak = streak.currentStreak
                     self._log_streak_event(
-                        db=db,
+                        events=events,
                         user_id=user_id,
                         action="streak.longest_updated",
                         meta={
@@ -85,7 +96,7 @@ class StreakService:
 
                 # Check for streak milestones
                 self._check_streak_milestones(
-                    db=db,
+                    events=events,
                     user_id=user_id,
                     current_streak=streak.currentStreak,
                     completed_date=completed_date
@@ -97,7 +108,7 @@ class StreakService:
                 streak.currentStreak = 1
 
                 self._log_streak_event(
-                    db=db,
+                    events=events,
                     user_id=user_id,
                     action="streak.broken",
                     meta={
@@ -109,10 +120,11 @@ class StreakService:
 
         # Update last completion date
         streak.lastCompletionDate = datetime.combine(completed_date, datetime.min.time())
-        streak.updatedAt = datetime.utcnow()
+        streak.updatedAt = now
 
-        db.commit()
-        return self.get_streak_stats(user_id, db)
+        db.flush()
+        self._write_streak_events(db, user_id, events, now)
+        return self.format_streak_stats(streak)
 
     def check_streak_guard(self, user_id: str, db: Session) -> bool:
         """
@@ -137,6 +149,27 @@ class StreakService:
         # Streak is at risk if last completion was yesterday and no completion today
         return last_completion < today and streak.currentStreak > 0
 
+    def fetch_at_risk_streakers(self, db: Session) -> List[Tuple[str, int]]:
+        """
+        Find all users whose streak is at risk (no completion today).
+
+        Set-based equivalent of check_streak_guard() for the 20:00 cron job.
+
+        Args:
+            db: Database session
+
+        Returns:
+            List of (user_id, current_streak) tuples
+        """
+        today_start = datetime.combine(date.today(), datetime.min.time())
+
+        rows = db.query(UserStreak.userId, UserStreak.currentStreak).filter(
+            UserStreak.currentStreak > 0,
+            UserStreak.lastCompletionDate < today_start
+        ).all()
+
+        return [(user_id, current) for user_id, current in rows]
+
     def get_streak_stats(self, user_id: str, db: Session) -> Dict:
         """
         Return streak statistics for UI.
@@ -149,7 +182,18 @@ class StreakService:
             Dict with streak statistics
         """
         streak = db.query(UserStreak).filter_by(userId=user_id).first()
+        return self.format_streak_stats(streak)
 
+    def format_streak_stats(self, streak: Optional[UserStreak]) -> Dict:
+        """
+        Build streak statistics from an already loaded UserStreak row.
+
+        Args:
+            streak: UserStreak record, or None if user has no streak yet
+
+        Returns:
+            Dict with streak statistics
+        """
         if not streak:
             return {
                 "current": 0,
@@ -161,12 +205,14 @@ class StreakService:
 
         days_since_last = None
         last_completion_date = None
+        is_at_risk = False
 
         if streak.lastCompletionDate:
             last_completion_date = streak.lastCompletionDate.date().isoformat()
             days_since_last = (date.today() - streak.lastCompletionDate.date()).days
 
-        is_at_risk = self.check_streak_guard(user_id, db)
+            # Same rule as check_streak_guard, without re-querying the row
+            is_at_risk = days_since_last > 0 and streak.currentStreak > 0
 
         return {
             "current": streak.currentStreak,
@@ -178,17 +224,15 @@ class StreakService:
 
     def _check_streak_milestones(
         self,
-        db: Session,
+        events: List[Dict],
         user_id: str,
         current_streak: int,
         completed_date: date
     ):
         """Check for streak milestones and trigger badge awards."""
-        milestones = [3, 7, 14, 30, 60, 100]
-
-        if current_streak in milestones:
+        if current_streak in _STREAK_MILESTONES:
             self._log_streak_event(
-                db=db,
+                events=events,
                 user_id=user_id,
                 action="streak.milestone",
                 meta={
@@ -199,22 +243,39 @@ class StreakService:
 
     def _log_streak_event(
         self,
-        db: Session,
+        events: List[Dict],
         user_id: str,
         action: str,
         meta: Dict
     ):
-        """Log streak event to audit log."""
-        user = db.query(User).filter_by(id=user_id).first()
-        if not user:
+        """Queue a streak event for the audit log (see _write_streak_events)."""
+        events.append({
+            "actorUserId": user_id,
+            "action": action,
+            "meta": meta
+        })
+
+    def _write_streak_events(
+        self,
+        db: Session,
+        user_id: str,
+        events: List[Dict],
+        now: datetime
+    ):
+        """Write queued streak events to the audit log in a single insert."""
+        if not events:
+            return
+
+        family_id = db.execute(
+            select(User.familyId).where(User.id == user_id)
+        ).scalar_one_or_none()
+        if family_id is None:
             return
 
-        log_entry = AuditLog(
-            id=str(uuid4()),
-            actorUserId=user_id,
-            familyId=user.familyId,
-            action=action,
-            meta=meta,
-            createdAt=datetime.utcnow()
+        db.execute(
+            insert(AuditLog),
+            [
+                {"id": str(uuid4()), "familyId": family_id, "createdAt": now, **event}
+                for event in events
+            ]
         )
-        db.add(log_entry)
@@ -5,18 +5,126 @@ Provides helper functions for delta synchronization operations including
 batch processing, conflict resolution, and family-wide change aggregation.
 """
 
+from sqlalchemy import Select, delete, func, select
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterator, Union
 from core import models
+import functools
+import os
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Rows deleted per transaction by clean_old_sync_data
+_CLEANUP_CHUNK_SIZE = 10_000
+
+# Changes applied per SAVEPOINT by apply_batch_changes
+_BATCH_CHUNK_SIZE = int(os.getenv("SYNC_BATCH_CHUNK_SIZE", "1000"))
+
+# Rows fetched per round trip when streaming family changes
+_STREAM_BATCH_SIZE = 1000
+
+
+@functools.cache
+def _sync_router():
+    """
+    The routers.sync module, imported on first use.
+
+    routers.sync imports this module at load time, so a top-level import
+    here would be circular; caching keeps batch loops to one import.
+    """
+    import routers.sync
+    return routers.sync
+
+
+def _timestamp_ms(value: Union[int, str, None]) -> int:
+    """
+    Normalize a wire timestamp to epoch milliseconds.
+
+    Clients may send epoch-ms integers (cheap to compare) or ISO strings
+    (older clients); naive ISO values are treated as UTC.
+    """
+    if isinstance(value, int):
+        return value
+    if not value:
+        return 0
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _updated_at_ms(data: Dict) -> int:
+    """Last-modified time of a sync payload, preferring updatedAt_ms"""
+    value = data.get("updatedAt_ms")
+    if value is None:
+        value = data.get("updatedAt")
+    return _timestamp_ms(value)
+
 
 class SyncService:
     """Service layer for sync operations"""
 
+    @staticmethod
+    def _family_change_statements(
+        db: Session,
+        family_id: str,
+        since: datetime
+    ) -> Dict[str, Select]:
+        """
+        Build the per-entity delta queries for a family.
+
+        Column selects return plain Row tuples, skipping ORM hydration.
+        Family members are resolved once instead of joining users for each
+        of the points/streaks/badges queries.
+        """
+        member_ids = db.execute(
+            select(models.User.id).where(models.User.familyId == family_id)
+        ).scalars().all()
+
+        return {
+            "tasks": select(
+                models.Task.id, models.Task.title, models.Task.status,
+                models.Task.assignees, models.Task.due, models.Task.version,
+                models.Task.updatedAt
+            ).where(
+                models.Task.familyId == family_id,
+                models.Task.updatedAt > since
+            ),
+            "events": select(
+                models.Event.id, models.Event.title, models.Event.start,
+                models.Event.end, models.Event.attendees, models.Event.updatedAt
+            ).where(
+                models.Event.familyId == family_id,
+                models.Event.updatedAt > since
+            ),
+            "points": select(
+                models.PointsLedger.id, models.PointsLedger.userId,
+                models.PointsLedger.delta, models.PointsLedger.reason,
+                models.PointsLedger.taskId, models.PointsLedger.createdAt
+            ).where(
+                models.PointsLedger.userId.in_(member_ids),
+                models.PointsLedger.createdAt > since
+            ),
+            "streaks": select(
+                models.UserStreak.id, models.UserStreak.userId,
+                models.UserStreak.currentStreak, models.UserStreak.longestStreak,
+                models.UserStreak.updatedAt
+            ).where(
+                models.UserStreak.userId.in_(member_ids),
+                models.UserStreak.updatedAt > since
+            ),
+            "badges": select(
+                models.Badge.id, models.Badge.userId,
+                models.Badge.code, models.Badge.awardedAt
+            ).where(
+                models.Badge.userId.in_(member_ids),
+                models.Badge.awardedAt > since
+            )
+        }
+
     @staticmethod
     def get_family_changes_since(
         db: Session,
@@ -34,100 +142,57 @@ class SyncService:
             "streaks": [...],
             "badges": [...]
         }
+
+        Each entry is a plain dict of the selected columns with datetime
+        values left as-is; use serialize_changes() to encode the result.
         """
-        changes = {
-            "tasks": [],
-            "events": [],
-            "points": [],
-            "streaks": [],
-            "badges": []
-        }
+        with db.no_autoflush:
+            statements = SyncService._family_change_statements(db, family_id, since)
+
+            # Datetimes stay native; serialize_changes formats them via orjson
+            return {
+                entity: [row._asdict() for row in db.execute(stmt)]
+                for entity, stmt in statements.items()
+            }
+
+    @staticmethod
+    def serialize_changes(changes: Dict[str, List[Dict]]) -> bytes:
+        """
+        Encode a get_family_changes_since() result as JSON.
+
+        orjson formats datetimes natively (ISO 8601, same as isoformat()),
+        avoiding a per-row Python conversion pass.
+        """
+        return orjson.dumps(changes)
+
+    @staticmethod
+    def iter_family_changes_json(
+        db: Session,
+        family_id: str,
+        since: datetime,
+        batch_size: int = _STREAM_BATCH_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Stream the get_family_changes_since() JSON document in fragments.
 
-        # Tasks
-        tasks = db.query(models.Task).filter(
-            models.Task.familyId == family_id,
-            models.Task.updatedAt > since
-        ).all()
-
-        for task in tasks:
-            changes["tasks"].append({
-                "id": str(task.id),
-                "title": task.title,
-                "status": task.status,
-                "assignees": task.assignees,
-                "due": task.due.isoformat() if task.due else None,
-                "version": task.version,
-                "updatedAt": task.updatedAt.isoformat()
-            })
-
-        # Events
-        events = db.query(models.Event).filter(
-            models.Event.familyId == family_id,
-            models.Event.updatedAt > since
-        ).all()
-
-        for event in events:
-            changes["events"].append({
-                "id": str(event.id),
-                "title": event.title,
-                "start": event.start.isoformat(),
-                "end": event.end.isoformat() if event.end else None,
-                "attendees": event.attendees,
-                "updatedAt": event.updatedAt.isoformat()
-            })
-
-        # Points ledger
-        points = db.query(models.PointsLedger).join(
-            models.User, models.PointsLedger.userId == models.User.id
-        ).filter(
-            models.User.familyId == family_id,
-            models.PointsLedger.createdAt > since
-        ).all()
-
-        for entry in points:
-            changes["points"].append({
-                "id": str(entry.id),
-                "userId": str(entry.userId),
-                "delta": entry.delta,
-                "reason": entry.reason,
-                "taskId": entry.taskId,
-                "createdAt": entry.createdAt.isoformat()
-            })
-
-        # User streaks
-        streaks = db.query(models.UserStreak).join(
-            models.User, models.UserStreak.userId == models.User.id
-        ).filter(
-            models.User.familyId == family_id,
-            models.UserStreak.updatedAt > since
-        ).all()
-
-        for streak in streaks:
-            changes["streaks"].append({
-                "id": str(streak.id),
-                "userId": str(streak.userId),
-                "currentStreak": streak.currentStreak,
-                "longestStreak": streak.longestStreak,
-                "updatedAt": streak.updatedAt.isoformat()
-            })
-
-        # Badges
-        badges = db.query(models.Badge).join(
-            models.User, models.Badge.userId == models.User.id
-        ).filter(
-            models.User.familyId == family_id,
-            models.Badge.awardedAt > since
-        ).all()
-
-        for badge in badges:
-            changes["badges"].append({
-                "id": str(badge.id),
-                "userId": str(badge.userId),
-                "code": badge.code,
-                "awardedAt": badge.awardedAt.isoformat()
-            })
-
-        return changes
+        Rows are fetched batch_size at a time (server-side cursor on
+        Postgres), so memory stays bounded for devices that were offline
+        for a long time. Concatenated output equals serialize_changes().
+        """
+        with db.no_autoflush:
+            statements = SyncService._family_change_statements(db, family_id, since)
+
+            yield b"{"
+            for index, (entity, stmt) in enumerate(statements.items()):
+                yield (b"," if index else b"") + orjson.dumps(entity) + b":["
+                first = True
+                result = db.execute(stmt.execution_options(yield_per=batch_size))
+                for partition in result.partitions():
+                    chunk = b",".join(orjson.dumps(row._asdict()) for row in partition)
+                    yield (b"" if first else b",") + chunk
+                    first = False
+                yield b"]"
+            yield b"}"
 
     @staticmethod
     def apply_batch_changes(
@@ -139,6 +204,10 @@ class SyncService:
         Apply multiple changes in a transaction.
         Rolls back all if any critical error.
 
+        Changes are applied in SAVEPOINT-wrapped chunks of
+        _BATCH_CHUNK_SIZE (SYNC_BATCH_CHUNK_SIZE env var); a chunk that
+        fails to flush is rolled back on its own and counted as errors.
+
         Returns:
         {
             "applied": 15,
@@ -147,44 +216,75 @@ class SyncService:
             "details": [...]
         }
         """
+        prefetch_sync_entities = _sync_router().prefetch_sync_entities
+
         applied = 0
         conflicts = 0
         errors = 0
         details = []
 
         try:
-            for change in changes:
+            # One query per entity type instead of one per change; the list
+            # keeps the rows alive in the identity map for the loop below
+            prefetched = prefetch_sync_entities(
+                db, ((c.get("entity_type"), c.get("entity_id")) for c in changes)
+            )
+
+            for start in range(0, len(changes), _BATCH_CHUNK_SIZE):
+                chunk = changes[start:start + _BATCH_CHUNK_SIZE]
+                chunk_applied = chunk_conflicts = chunk_errors = 0
+                chunk_details = []
+
                 try:
-                    # Route to appropriate handler based on entity type
-                    entity_type = change.get("entity_type")
-
-                    if entity_type == "task":
-                        result = SyncService._apply_task_batch(db, change, user)
-                    elif entity_type == "event":
-                        result = SyncService._apply_event_batch(db, change, user)
-                    else:
-                        result = {"error": f"Unknown entity type: {entity_type}"}
-
-                    if result.get("success"):
-                        applied += 1
-                    elif result.get("conflict"):
-                        conflicts += 1
-                    else:
-                        errors += 1
-
-                    details.append({
-                        "entity_id": change.get("entity_id"),
-                        "entity_type": entity_type,
-                        "result": result
-                    })
+                    # SAVEPOINT per chunk: a failure while flushing only
+                    # discards this chunk, not the changes applied before it
+                    with db.begin_nested():
+                        for change in chunk:
+                            try:
+                                # Route to appropriate handler based on entity type
+                                entity_type = change.get("entity_type")
+
+                                if entity_type == "task":
+                                    result = SyncService._apply_task_batch(db, change, user)
+                                elif entity_type == "event":
+                                    result = SyncService._apply_event_batch(db, change, user)
+                                else:
+                                    result = {"error": f"Unknown entity type: {entity_type}"}
+
+                                if result.get("success"):
+                                    chunk_applied += 1
+                                elif result.get("conflict"):
+                                    chunk_conflicts += 1
+                                else:
+                                    chunk_errors += 1
+
+                                chunk_details.append({
+                                    "entity_id": change.get("entity_id"),
+                                    "entity_type": entity_type,
+                                    "result": result
+                                })
+
+                            except Exception as e:
+                                logger.error(f"Batch change failed for {change.get('entity_id')}: {e}")
+                                chunk_errors += 1
+                                chunk_details.append({
+                                    "entity_id": change.get("entity_id"),
+                                    "error": str(e)
+                                })
 
                 except Exception as e:
-                    logger.error(f"Batch change failed for {change.get('entity_id')}: {e}")
-                    errors += 1
-                    details.append({
-                        "entity_id": change.get("entity_id"),
-                        "error": str(e)
-                    })
+                    logger.error(f"Batch chunk at offset {start} rolled back: {e}")
+                    errors += len(chunk)
+                    details.extend(
+                        {"entity_id": change.get("entity_id"), "error": str(e)}
+                        for change in chunk
+                    )
+                    continue
+
+                applied += chunk_applied
+                conflicts += chunk_conflicts
+                errors += chunk_errors
+                details.extend(chunk_details)
 
             # Commit all changes if no critical errors
             if errors == 0 or errors < len(changes) * 0.1:  # Allow 10% error rate
@@ -217,10 +317,10 @@ class SyncService:
         user: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Apply single task change in batch context"""
-        from routers.sync import apply_task_change, SyncEntity
+        sync_router = _sync_router()
 
         # Convert dict to SyncEntity
-        entity = SyncEntity(
+        entity = sync_router.SyncEntity(
             entity_type="task",
             entity_id=change.get("entity_id"),
             action=change.get("action"),
@@ -229,7 +329,7 @@ class SyncService:
             client_timestamp=datetime.fromisoformat(change.get("client_timestamp"))
         )
 
-        return apply_task_change(db, entity, user)
+        return sync_router.apply_task_change(db, entity, user)
 
     @staticmethod
     def _apply_event_batch(
@@ -238,9 +338,9 @@ class SyncService:
         user: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Apply single event change in batch context"""
-        from routers.sync import apply_event_change, SyncEntity
+        sync_router = _sync_router()
 
-        entity = SyncEntity(
+        entity = sync_router.SyncEntity(
             entity_type="event",
             entity_id=change.get("entity_id"),
             action=change.get("action"),
@@ -249,7 +349,7 @@ class SyncService:
             client_timestamp=datetime.fromisoformat(change.get("client_timestamp"))
         )
 
-        return apply_event_change(db, entity, user)
+        return sync_router.apply_event_change(db, entity, user)
 
     @staticmethod
     def resolve_conflict_auto(
@@ -265,6 +365,10 @@ class SyncService:
         - Event: LWW on timestamp
         - Points: Server always wins (immutable)
 
+        Timestamps are compared as epoch milliseconds, taken from
+        ``updatedAt_ms`` when present and otherwise from ``updatedAt``
+        (epoch-ms int or ISO string).
+
         Returns:
         {
             "winner": "client" | "server" | "merge",
@@ -288,8 +392,8 @@ class SyncService:
                 }
 
             # Strategy 2: LWW on timestamp
-            client_ts = datetime.fromisoformat(client_data.get("updatedAt", "2000-01-01T00:00:00"))
-            server_ts = datetime.fromisoformat(server_data.get("updatedAt", "2000-01-01T00:00:00"))
+            client_ts = _updated_at_ms(client_data)
+            server_ts = _updated_at_ms(server_data)
 
             if client_ts > server_ts:
                 return {
@@ -306,8 +410,8 @@ class SyncService:
 
         elif entity_type == "event":
             # LWW for events
-            client_ts = datetime.fromisoformat(client_data.get("updatedAt", "2000-01-01T00:00:00"))
-            server_ts = datetime.fromisoformat(server_data.get("updatedAt", "2000-01-01T00:00:00"))
+            client_ts = _updated_at_ms(client_data)
+            server_ts = _updated_at_ms(server_data)
 
             return {
                 "winner": "client" if client_ts > server_ts else "server",
@@ -356,11 +460,19 @@ class SyncService:
             }
         }
         """
-        changes = SyncService.get_family_changes_since(db, family_id, since)
+        statements = SyncService._family_change_statements(db, family_id, since)
+
+        # Count every entity type in one round trip without loading rows
+        counts = db.execute(
+            select(*(
+                select(func.count()).select_from(stmt.subquery()).scalar_subquery().label(entity)
+                for entity, stmt in statements.items()
+            ))
+        ).one()._asdict()
 
         return {
-            "total_changes": sum(len(v) for v in changes.values()),
-            "by_entity": {k: len(v) for k, v in changes.items()},
+            "total_changes": sum(counts.values()),
+            "by_entity": counts,
             "time_range": {
                 "start": since.isoformat(),
                 "end": datetime.utcnow().isoformat()
@@ -380,29 +492,63 @@ class SyncService:
         - Old task logs (>90 days)
         - Old points ledger entries (>90 days, keep badges)
 
+        Rows are deleted in chunks of _CLEANUP_CHUNK_SIZE with a commit per
+        chunk to keep transactions and lock times short.
+
         Returns:
             Number of records deleted
         """
         cutoff_date = datetime.utcnow() - timedelta(days=older_than_days)
         deleted = 0
 
-        # Delete old completed tasks
-        old_tasks = db.query(models.Task).filter(
-            models.Task.status == "done",
-            models.Task.completedAt < cutoff_date
-        ).delete()
-        deleted += old_tasks
+        # Delete old completed tasks chunk by chunk, committing each chunk so
+        # a large backlog never becomes one long-running transaction. Their
+        # logs go first to satisfy the task_logs foreign key.
+        while True:
+            task_ids = db.execute(
+                select(models.Task.id).where(
+                    models.Task.status == "done",
+                    models.Task.completedAt < cutoff_date
+                ).limit(_CLEANUP_CHUNK_SIZE)
+            ).scalars().all()
+            if not task_ids:
+                break
+
+            deleted += db.execute(
+                delete(models.TaskLog)
+                .where(models.TaskLog.taskId.in_(task_ids))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            deleted += db.execute(
+                delete(models.Task)
+                .where(models.Task.id.in_(task_ids))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+
+            if len(task_ids) < _CLEANUP_CHUNK_SIZE:
+                break
 
         # Delete old task logs
-        old_logs = db.query(models.TaskLog).filter(
-            models.TaskLog.createdAt < cutoff_date
-        ).delete()
-        deleted += old_logs
+        while True:
+            old_logs = db.execute(
+                delete(models.TaskLog)
+                .where(models.TaskLog.id.in_(
+                    select(models.TaskLog.id)
+                    .where(models.TaskLog.createdAt < cutoff_date)
+                    .limit(_CLEANUP_CHUNK_SIZE)
+                ))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            deleted += old_logs
+
+            if old_logs < _CLEANUP_CHUNK_SIZE:
+                break
 
         # Note: Keep points ledger for historical tracking
         # Note: Keep badges forever (achievements)
 
-        db.commit()
         logger.info(f"Cleaned up {deleted} old sync records older than {older_than_days} days")
 
         return deleted
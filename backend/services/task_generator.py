@@ -11,16 +11,39 @@ Features:
 - Track generated instances to prevent duplicates
 """
 
-from datetime import date, datetime, timedelta
-from typing import List, Optional, Dict
+import logging
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Any, List, Optional, Dict, Set, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from dateutil.rrule import rrulestr
+from sqlalchemy import and_, insert, or_
+from dateutil.rrule import rruleset, rrulestr
 from uuid import uuid4
 
 from core import models
 from core.fairness import FairnessEngine
 
+logger = logging.getLogger(__name__)
+
+# Template columns copied verbatim onto each generated instance
+_INSTANCE_FIELDS = (
+    "familyId", "title", "desc", "category", "claimable", "points",
+    "photoRequired", "parentApproval", "priority", "estDuration", "createdBy",
+)
+
+
+@lru_cache(maxsize=256)
+def _parse_rrule(rrule_str: str, dtstart: datetime, exdates: Tuple[str, ...] = ()):
+    """Parse an RRULE once per (rule, dtstart, exdates); the set caches its own expansion."""
+    rule_set = rruleset(cache=True)
+    rule_set.rrule(rrulestr(rrule_str, dtstart=dtstart))
+
+    # Skipped occurrences are EXDATEs at the rule's time of day
+    for skipped in exdates:
+        rule_set.exdate(datetime.combine(date.fromisoformat(skipped), dtstart.timetz()))
+
+    return rule_set
+
 
 class TaskGenerator:
     """
@@ -58,8 +81,8 @@ class TaskGenerator:
         2. Expand RRULE for date range (max 365 occurrences)
         3. For each occurrence:
            - Check if already generated (TaskLog)
-           - Check if skipped
-           - Apply rotation logic (get assignee)
+           - Skipped dates are excluded by the rule set (EXDATE)
+           - Apply rotation logic (batched per template)
            - Create task instance with due date
         4. Return list of generated tasks
 
@@ -81,34 +104,92 @@ class TaskGenerator:
             )
         ).all()
 
-        generated_tasks = []
+        task_rows: List[Dict[str, Any]] = []
+        log_rows: List[Dict[str, Any]] = []
+        instance_ids: List[str] = []
+
+        # Prefetch generated markers for all templates in one query
+        generated = self._load_occurrence_logs([t.id for t in recurring_tasks])
 
         for template in recurring_tasks:
             occurrences = self._expand_task_rrule(template, start_date, end_date, max_occurrences)
 
-            for occurrence_date in occurrences:
-                # Check if already generated
-                if self._is_occurrence_generated(template.id, occurrence_date):
+            # Drop already generated dates (skipped dates never expand)
+            pending = [
+                occurrence_date for occurrence_date in occurrences
+                if (template.id, occurrence_date.isoformat()) not in generated
+            ]
+            if not pending:
+                continue
+
+            if template.rotationStrategy == "fairness":
+                # Fairness rotation reads workload from the database, so
+                # rows built for earlier templates must be inserted first
+                self._insert_generated_rows(task_rows, log_rows)
+
+            # Assign all pending occurrences of this template in one pass
+            assignee_ids = self.fairness_engine.rotate_assignees(template, pending, persist=False)
+
+            # Read template attributes once instead of per occurrence
+            fields = {name: getattr(template, name) for name in _INSTANCE_FIELDS}
+            due_time = template.due.time() if template.due else None
+            rotation_strategy = template.rotationStrategy or "manual"
+
+            for occurrence_date, assignee_id in zip(pending, assignee_ids):
+                if not assignee_id:
+                    # No assignee determined - skip this occurrence
                     continue
 
-                # Check if skipped
-                if self._is_occurrence_skipped(template.id, occurrence_date):
-                    continue
+                task_row, log_row = self._build_instance_rows(
+                    template.id, fields, due_time, rotation_strategy,
+                    occurrence_date, assignee_id
+                )
+                task_rows.append(task_row)
+                log_rows.append(log_row)
+                instance_ids.append(task_row["id"])
+
+        # Persist everything in a single transaction
+        self._insert_generated_rows(task_rows, log_rows)
+        self.db.commit()
 
-                # Generate task instance
-                task_instance = self._create_task_instance(template, occurrence_date)
+        if not instance_ids:
+            return []
 
-                if task_instance:
-                    generated_tasks.append(task_instance)
+        # Load the new instances once, in generation order
+        position = {instance_id: i for i, instance_id in enumerate(instance_ids)}
+        generated_tasks = self.db.query(models.Task).filter(
+            models.Task.id.in_(instance_ids)
+        ).all()
+        generated_tasks.sort(key=lambda task: position[task.id])
 
         return generated_tasks
 
+    def _insert_generated_rows(
+        self,
+        task_rows: List[Dict[str, Any]],
+        log_rows: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Bulk insert pending instance and TaskLog rows, then clear the lists.
+
+        Args:
+            task_rows: Task column dicts
+            log_rows: TaskLog column dicts
+        """
+        if task_rows:
+            self.db.execute(insert(models.Task), task_rows)
+            task_rows.clear()
+        if log_rows:
+            self.db.execute(insert(models.TaskLog), log_rows)
+            log_rows.clear()
+
     def _expand_task_rrule(
         self,
         task: models.Task,
         start_date: date,
         end_date: date,
-        max_occurrences: int
+        max_occurrences: int,
+        apply_skips: bool = True
     ) -> List[date]:
         """
         Expand RRULE for task into occurrence dates.
@@ -118,6 +199,7 @@ class TaskGenerator:
             start_date: Range start
             end_date: Range end
             max_occurrences: Maximum occurrences
+            apply_skips: Exclude the task's skippedDates from the expansion
 
         Returns:
             List of occurrence dates within range
@@ -133,31 +215,49 @@ class TaskGenerator:
         try:
             # Parse RRULE with task's due date as start
             dtstart = task.due if task.due else datetime.combine(start_date, datetime.min.time())
-            rule = rrulestr(task.rrule, dtstart=dtstart)
+            exdates = tuple(sorted(task.skippedDates or ())) if apply_skips else ()
+            rule = _parse_rrule(task.rrule, dtstart, exdates)
 
-            occurrences = []
-            count = 0
+            # Only expand the requested window instead of walking from dtstart
+            after = datetime.combine(start_date, time.min, tzinfo=dtstart.tzinfo)
+            before = datetime.combine(end_date, time.max, tzinfo=dtstart.tzinfo)
 
-            for occurrence_dt in rule:
-                if count >= max_occurrences:
-                    break
+            return [
+                occurrence_dt.date()
+                for occurrence_dt in rule.between(after, before, inc=True)[:max_occurrences]
+            ]
 
-                occurrence_date = occurrence_dt.date()
+        except (ValueError, TypeError):
+            # RRULE parsing failed - log and skip
+            logger.warning("Failed to parse RRULE for task %s", task.id, exc_info=True)
+            return []
 
-                # Check if within range
-                if occurrence_date > end_date:
-                    break
+    def _load_occurrence_logs(self, template_ids: List[str]) -> Set[Tuple[str, str]]:
+        """
+        Load generated occurrence markers for templates.
 
-                if occurrence_date >= start_date:
-                    occurrences.append(occurrence_date)
-                    count += 1
+        Args:
+            template_ids: Template task IDs
 
-            return occurrences
+        Returns:
+            Set of (template_id, ISO occurrence date) already generated
+        """
+        generated: Set[Tuple[str, str]] = set()
 
-        except Exception as e:
-            # RRULE parsing failed - log and skip
-            print(f"Failed to parse RRULE for task {task.id}: {e}")
-            return []
+        if not template_ids:
+            return generated
+
+        rows = self.db.query(models.TaskLog.taskId, models.TaskLog.meta).filter(
+            models.TaskLog.taskId.in_(template_ids),
+            models.TaskLog.action == "generated"
+        ).all()
+
+        for template_id, meta in rows:
+            occurrence = (meta or {}).get("occurrence_date")
+            if occurrence:
+                generated.add((template_id, occurrence))
+
+        return generated
 
     def _is_occurrence_generated(self, template_id: str, occurrence_date: date) -> bool:
         """
@@ -176,7 +276,7 @@ class TaskGenerator:
             and_(
                 models.TaskLog.taskId == template_id,
                 models.TaskLog.action == "generated",
-                models.TaskLog.meta["occurrence_date"].astext == occurrence_date.isoformat()
+                models.TaskLog.meta["occurrence_date"].as_string() == occurrence_date.isoformat()
             )
         ).first()
 
@@ -193,108 +293,76 @@ class TaskGenerator:
         Returns:
             True if skipped
         """
-        log_entry = self.db.query(models.TaskLog).filter(
-            and_(
-                models.TaskLog.taskId == template_id,
-                models.TaskLog.action == "skipped",
-                models.TaskLog.meta["occurrence_date"].astext == occurrence_date.isoformat()
-            )
-        ).first()
+        template = self.db.get(models.Task, template_id)
 
-        return log_entry is not None
+        return bool(template) and occurrence_date.isoformat() in (template.skippedDates or [])
 
-    def _create_task_instance(
+    def _build_instance_rows(
         self,
-        template: models.Task,
-        occurrence_date: date
-    ) -> Optional[models.Task]:
+        template_id: str,
+        fields: Dict[str, Any],
+        due_time: Optional[time],
+        rotation_strategy: str,
+        occurrence_date: date,
+        assignee_id: str
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
-        Create task instance from template for specific occurrence.
+        Build task instance and generation log rows for specific occurrence.
 
-        Applies rotation logic to determine assignee.
+        The caller bulk inserts the returned rows and commits.
 
         Args:
-            template: Task template
+            template_id: Template task ID
+            fields: Template values for _INSTANCE_FIELDS
+            due_time: Template due time, or None for end of day
+            rotation_strategy: Template rotation strategy (logged)
             occurrence_date: Date of occurrence
+            assignee_id: Assignee chosen by the rotation strategy
 
         Returns:
-            Created Task instance, or None if creation failed
+            (Task row, generation TaskLog row)
         """
-        # Determine assignee using rotation strategy
-        assignee_id = self._get_occurrence_assignee(template, occurrence_date)
-
-        if not assignee_id:
-            # No assignee determined - skip this occurrence
-            return None
-
         # Create due datetime for occurrence
-        if template.due:
+        if due_time:
             # Use template's time with occurrence date
-            due_time = template.due.time()
             due_datetime = datetime.combine(occurrence_date, due_time)
         else:
             # Default to end of day
             due_datetime = datetime.combine(occurrence_date, datetime.max.time().replace(microsecond=0))
 
-        # Create task instance
-        task_instance = models.Task(
-            id=str(uuid4()),
-            familyId=template.familyId,
-            title=template.title,
-            desc=template.desc,
-            category=template.category,
-            due=due_datetime,
-            frequency="none",  # Instance is not recurring
-            rrule=None,  # Instance has no rrule
-            assignees=[assignee_id],  # Single assignee for instance
-            claimable=template.claimable,
-            status="open",
-            points=template.points,
-            photoRequired=template.photoRequired,
-            parentApproval=template.parentApproval,
-            priority=template.priority,
-            estDuration=template.estDuration,
-            createdBy=template.createdBy,
-            createdAt=datetime.utcnow(),
-            updatedAt=datetime.utcnow(),
-            version=0
-        )
-
-        self.db.add(task_instance)
-
-        # Create TaskLog to track generation
-        log_entry = models.TaskLog(
-            id=str(uuid4()),
-            taskId=template.id,  # Log against template
-            userId=template.createdBy,
-            action="generated",
-            meta={
+        now = datetime.utcnow()
+        instance_id = str(uuid4())
+
+        # Task instance row
+        task_row = {
+            **fields,
+            "id": instance_id,
+            "due": due_datetime,
+            "frequency": "none",  # Instance is not recurring
+            "rrule": None,  # Instance has no rrule
+            "assignees": [assignee_id],  # Single assignee for instance
+            "status": "open",
+            "createdAt": now,
+            "updatedAt": now,
+            "version": 0
+        }
+
+        # TaskLog row to track generation
+        log_row = {
+            "id": str(uuid4()),
+            "taskId": template_id,  # Log against template
+            "userId": fields["createdBy"],
+            "action": "generated",
+            "meta": {
                 "occurrence_date": occurrence_date.isoformat(),
-                "instance_id": task_instance.id,
+                "instance_id": instance_id,
                 "assignee_id": assignee_id,
-                "rotation_strategy": getattr(template, "rotationStrategy", "manual")
+                "rotation_strategy": rotation_strategy
             },
-            createdAt=datetime.utcnow()
-        )
-
-        self.db.add(log_entry)
-        self.db.commit()
-        self.db.refresh(task_instance)
-
-        return task_instance
-
-    def _get_occurrence_assignee(self, template: models.Task, occurrence_date: date) -> Optional[str]:
-        """
-        Determine assignee for occurrence using rotation strategy.
+            "createdAt": now
+        }
 
-        Args:
-            template: Task template
-            occurrence_date: Occurrence date
-
-        Returns:
-            User ID of assignee, or None
-        """
-        return self.fairness_engine.rotate_assignee(template, occurrence_date)
+        return task_row, log_row
 
     def skip_task_occurrence(
         self,
@@ -305,7 +373,9 @@ class TaskGenerator:
         """
         Mark occurrence as skipped (don't generate).
 
-        Creates TaskLog entry with action='skipped'.
+        Adds the date to the template's skippedDates (applied as an EXDATE
+        during expansion) and creates a TaskLog entry with action='skipped'
+        for audit.
 
         Args:
             task_id: Template task ID
@@ -315,6 +385,10 @@ class TaskGenerator:
         Returns:
             True if successful
         """
+        template = self.db.get(models.Task, task_id)
+        if not template:
+            return False
+
         # Check if already skipped or generated
         if self._is_occurrence_skipped(task_id, occurrence_date):
             return False  # Already skipped
@@ -322,13 +396,16 @@ class TaskGenerator:
         if self._is_occurrence_generated(task_id, occurrence_date):
             return False  # Already generated - cannot skip
 
+        # Assign a new list so the column change is detected on flush
+        template.skippedDates = [*(template.skippedDates or []), occurrence_date.isoformat()]
+
         # Create skip log entry
         log_entry = models.TaskLog(
             id=str(uuid4()),
             taskId=task_id,
             userId=user_id,
             action="skipped",
-            metadata={
+            meta={
                 "occurrence_date": occurrence_date.isoformat(),
                 "reason": "manually_skipped"
             },
@@ -425,33 +502,41 @@ class TaskGenerator:
         if not template or not template.rrule:
             return []
 
-        # Expand RRULE
-        occurrence_dates = self._expand_task_rrule(template, start_date, end_date, max_occurrences=365)
+        # Expand RRULE, keeping skipped dates so they can be reported
+        occurrence_dates = self._expand_task_rrule(
+            template, start_date, end_date, max_occurrences=365, apply_skips=False
+        )
+
+        # Load generation markers with their generated instances in one query
+        rows = self.db.query(models.TaskLog.meta, models.Task).outerjoin(
+            models.Task,
+            models.Task.id == models.TaskLog.meta["instance_id"].as_string()
+        ).filter(
+            models.TaskLog.taskId == template.id,
+            models.TaskLog.action == "generated"
+        ).all()
+
+        generated_by_date: Dict[str, Optional[models.Task]] = {}
+        for meta, instance in rows:
+            occurrence = (meta or {}).get("occurrence_date")
+            if occurrence:
+                generated_by_date[occurrence] = instance
+
+        skipped_dates = set(template.skippedDates or [])
 
         occurrences = []
         for occurrence_date in occurrence_dates:
+            key = occurrence_date.isoformat()
+
             # Check status
-            is_generated = self._is_occurrence_generated(template.id, occurrence_date)
-            is_skipped = self._is_occurrence_skipped(template.id, occurrence_date)
+            is_generated = key in generated_by_date
+            is_skipped = key in skipped_dates
 
             # Get instance if generated
-            instance = None
-            if is_generated:
-                log = self.db.query(models.TaskLog).filter(
-                    and_(
-                        models.TaskLog.taskId == template.id,
-                        models.TaskLog.action == "generated",
-                        models.TaskLog.meta["occurrence_date"].astext == occurrence_date.isoformat()
-                    )
-                ).first()
-
-                if log and log.meta.get("instance_id"):
-                    instance = self.db.query(models.Task).filter_by(
-                        id=log.meta["instance_id"]
-                    ).first()
+            instance = generated_by_date.get(key)
 
             occurrences.append({
-                "occurrence_date": occurrence_date.isoformat(),
+                "occurrence_date": key,
                 "is_generated": is_generated,
                 "is_skipped": is_skipped,
                 "instance_id": instance.id if instance else None,
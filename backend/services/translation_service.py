@@ -3,11 +3,26 @@ Translation Service
 Dynamic i18n translation loading for 7 supported languages
 """
 
-import json
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional
-from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Iterator, Mapping, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+def _flatten(data: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, Tuple[Any, bool]]]:
+    """Yield (dotted key, (leaf value, has placeholders)) pairs for a nested translation dict."""
+    for k, v in data.items():
+        full_key = f"{prefix}.{k}" if prefix else k
+        if isinstance(v, dict):
+            yield from _flatten(v, full_key)
+        else:
+            yield full_key, (v, isinstance(v, str) and '{' in v)
 
 class TranslationService:
     """
@@ -22,6 +37,9 @@ class TranslationService:
 
     def __init__(self):
         self.translations: Dict[str, Dict[str, Any]] = {}
+        # (leaf value, has placeholders) keyed by dotted path, per locale,
+        # for single-probe lookups; read-only once loaded
+        self.flat: Dict[str, Mapping[str, Tuple[Any, bool]]] = {}
         self._load_all_translations()
 
     def _load_all_translations(self):
@@ -35,20 +53,27 @@ class TranslationService:
                 f"Translations directory not found: {translations_dir}"
             )
 
-        # Load each translation file
-        for locale in self.SUPPORTED_LOCALES:
+        def _load_one(locale: str) -> Tuple[str, Optional[Dict[str, Any]]]:
             file_path = translations_dir / f"{locale}.json"
 
             if not file_path.exists():
-                print(f"Warning: Translation file not found: {file_path}")
-                continue
+                logger.warning("Translation file not found: %s", file_path)
+                return locale, None
 
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self.translations[locale] = json.load(f)
-                print(f"Loaded translations for locale: {locale}")
-            except Exception as e:
-                print(f"Error loading translations for {locale}: {e}")
+                return locale, orjson.loads(file_path.read_bytes())
+            except (OSError, ValueError):
+                logger.warning("Error loading translations for %s", locale, exc_info=True)
+                return locale, None
+
+        # Read and parse the locale files in parallel
+        with ThreadPoolExecutor(max_workers=len(self.SUPPORTED_LOCALES)) as executor:
+            for locale, data in executor.map(_load_one, self.SUPPORTED_LOCALES):
+                if data is None:
+                    continue
+                self.translations[locale] = data
+                self.flat[locale] = MappingProxyType(dict(_flatten(data)))
+                logger.info("Loaded translations for locale: %s", locale)
 
     def get(self, locale: str, key: str, **kwargs) -> str:
         """
@@ -78,34 +103,22 @@ class TranslationService:
         if locale not in self.translations:
             locale = self.FALLBACK_LOCALE
 
-        # Navigate nested keys (e.g., "tasks.create_task")
-        keys = key.split('.')
-        value = self.translations.get(locale, {})
-
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                # Fallback to English
-                value = self.translations.get(self.FALLBACK_LOCALE, {})
-                for k2 in keys:
-                    if isinstance(value, dict) and k2 in value:
-                        value = value[k2]
-                    else:
-                        # Return key itself if not found
-                        return key
-                break
-
-        # Return key if value is still a dict (not a leaf node)
-        if isinstance(value, dict):
-            return key
-
-        # Format with kwargs (e.g., {name}, {task})
-        if kwargs and isinstance(value, str):
+        # Look up dotted key (e.g., "tasks.create_task"), falling back to English
+        entry = self.flat.get(locale, {}).get(key)
+        if entry is None:
+            if locale == self.FALLBACK_LOCALE:
+                # Already looked in English; return key itself
+                return key
+            # Return key itself if not found
+            entry = self.flat.get(self.FALLBACK_LOCALE, {}).get(key, (key, False))
+        value, has_placeholders = entry
+
+        # Format with kwargs (e.g., {name}, {task}); plain strings skip parsing
+        if kwargs and has_placeholders:
             try:
-                return value.format(**kwargs)
+                return value.format_map(kwargs)
             except KeyError as e:
-                print(f"Warning: Missing format parameter {e} for key {key}")
+                logger.warning("Missing format parameter %s for key %s", e, key)
                 return value
 
         return value
@@ -138,13 +151,14 @@ class TranslationService:
     def reload_translations(self):
         """Reload all translation files (useful for development)."""
         self.translations = {}
+        self.flat = {}
         self._load_all_translations()
 
 
-# Singleton instance for application-wide use
-_translation_service_instance: Optional[TranslationService] = None
+# Singleton instance for application-wide use, loaded at import so the
+# first request doesn't pay for parsing every locale file
+_translation_service_instance = TranslationService()
 
-@lru_cache(maxsize=1)
 def get_translation_service() -> TranslationService:
     """
     Get singleton TranslationService instance.
@@ -152,9 +166,4 @@ def get_translation_service() -> TranslationService:
     Returns:
         TranslationService singleton
     """
-    global _translation_service_instance
-
-    if _translation_service_instance is None:
-        _translation_service_instance = TranslationService()
-
     return _translation_service_instance
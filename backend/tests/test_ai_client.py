@@ -373,5 +373,19 @@ async def test_planner_response_time(sample_week_context):
         assert duration < 1.0
         assert "weekPlan" in result
 
+@pytest.mark.asyncio
+async def test_shared_http_clients_reused_and_closed():
+    """Test named HTTP clients are pooled per name and recreated after shutdown"""
+    from core.http import get_http_client, close_http_clients
+
+    client = get_http_client("test", timeout=1.0)
+    assert get_http_client("test", timeout=1.0) is client
+    assert get_http_client("other", timeout=1.0) is not client
+
+    await close_http_clients()
+    assert client.is_closed
+    assert get_http_client("test", timeout=1.0) is not client
+    await close_http_clients()
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -4,17 +4,37 @@ Tests streaks, badges, points, and integration.
 """
 
 import pytest
+from unittest.mock import AsyncMock, patch
 from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
 from uuid import uuid4
 
-from core.models import User, Family, Task, UserStreak, Badge, PointsLedger, TaskLog
+from core.models import User, Family, Task, UserStreak, Badge, PointsLedger, TaskLog, AuditLog
 from services.streak_service import StreakService
 from services.badge_service import BadgeService
 from services.points_service import PointsService
 from services.gamification_service import GamificationService
 
 
+class FakeAsyncRedis:
+    """In-memory stand-in for the async Redis hash commands used by the leaderboard cache"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def hget(self, key, field):
+        return self.store.get(key, {}).get(field)
+
+    async def hset(self, key, field, value):
+        self.store.setdefault(key, {})[field] = value
+
+    async def expire(self, key, ttl):
+        pass
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
 @pytest.fixture
 def db_session():
     """Database session fixture."""
@@ -172,6 +192,28 @@ class TestStreakService:
         assert stats["current"] == 5
         assert stats["longest"] == 5
 
+    def test_streak_events_written_to_audit_log(self, db_session, test_user):
+        """Test streak events are written to the audit log with the user's family."""
+        streak_service = StreakService()
+
+        for i in range(3):
+            streak_service.update_streak(
+                test_user.id,
+                date.today() - timedelta(days=2-i),
+                db_session
+            )
+
+        logs = db_session.query(AuditLog).filter_by(actorUserId=test_user.id).all()
+        actions = sorted(log.action for log in logs)
+
+        assert actions == [
+            "streak.longest_updated",
+            "streak.longest_updated",
+            "streak.milestone",
+            "streak.started",
+        ]
+        assert all(log.familyId == test_user.familyId for log in logs)
+
     def test_streak_at_risk_detection(self, db_session, test_user):
         """Test streak at-risk detection."""
         streak_service = StreakService()
@@ -188,6 +230,23 @@ class TestStreakService:
 
         assert is_at_risk is True
 
+    def test_fetch_at_risk_streakers(self, db_session, test_user):
+        """Test bulk at-risk lookup matches the per-user guard."""
+        streak_service = StreakService()
+
+        assert streak_service.fetch_at_risk_streakers(db_session) == []
+
+        streak_service.update_streak(
+            test_user.id,
+            date.today() - timedelta(days=1),
+            db_session
+        )
+        assert streak_service.fetch_at_risk_streakers(db_session) == [(test_user.id, 1)]
+
+        # Completing today takes the user out of the at-risk set
+        streak_service.update_streak(test_user.id, date.today(), db_session)
+        assert streak_service.fetch_at_risk_streakers(db_session) == []
+
 
 # =============================================================================
 # Badge Service Tests
@@ -383,6 +442,26 @@ class TestBadgeService:
         assert progress["tasks_10"]["target"] == 10
         assert progress["tasks_10"]["progress"] == 0.5
 
+    def test_five_star_approvals_counted(self, db_session, test_user, test_task):
+        """Test five-star approvals are counted from the log rating."""
+        badge_service = BadgeService()
+
+        for rating in (5, 4, 5):
+            db_session.add(TaskLog(
+                id=str(uuid4()),
+                taskId=test_task.id,
+                userId=test_user.id,
+                action="approved",
+                meta={"rating": rating},
+                createdAt=datetime.utcnow()
+            ))
+        db_session.commit()
+
+        stats = badge_service._get_user_stats(test_user.id, None, db_session)
+
+        assert stats["five_star_tasks"] == 2
+        assert stats["approved_tasks"] == 3
+
 
 # =============================================================================
 # Points Service Tests
@@ -494,6 +573,57 @@ class TestPointsService:
         balance = points_service.get_user_points(test_user.id, db_session)
         assert balance == 25  # 10 + 20 - 5
 
+    def test_award_points_bulk(self, db_session, test_user):
+        """Test bulk awards write every ledger entry and the final balance."""
+        points_service = PointsService()
+
+        balances = points_service.award_points_bulk([
+            {"user_id": test_user.id, "points": 10, "reason": "Task 1"},
+            {"user_id": test_user.id, "points": 20, "reason": "Task 2"},
+            {"user_id": test_user.id, "points": -5, "reason": "Spent"}
+        ], db_session)
+        db_session.commit()
+
+        assert balances == {test_user.id: 25}
+        assert points_service.get_user_points(test_user.id, db_session) == 25
+        assert db_session.query(PointsLedger).filter_by(userId=test_user.id).count() == 3
+
+    def test_reconcile_points_balances(self, db_session, test_user):
+        """Test materialized balance is rebuilt from direct ledger writes."""
+        points_service = PointsService()
+
+        points_service.award_points(test_user.id, None, 10, "Task 1", db_session)
+        db_session.add(PointsLedger(
+            id=str(uuid4()),
+            userId=test_user.id,
+            delta=15,
+            reason="Imported",
+            createdAt=datetime.utcnow()
+        ))
+        db_session.commit()
+
+        assert points_service.get_user_points(test_user.id, db_session) == 10
+
+        points_service.reconcile_points_balances(db_session, [test_user.id])
+
+        assert points_service.get_user_points(test_user.id, db_session) == 25
+
+    def test_points_history_running_balance(self, db_session, test_user):
+        """Test history entries carry the balance after each transaction."""
+        points_service = PointsService()
+
+        points_service.award_points(test_user.id, None, 10, "Task 1", db_session)
+        points_service.award_points(test_user.id, None, 20, "Task 2", db_session)
+        points_service.award_points(test_user.id, None, -5, "Spent", db_session)
+        db_session.commit()
+
+        history = points_service.get_points_history(test_user.id, db_session)
+
+        assert len(history) == 3
+        assert history[0]["balance_after"] == 25
+        for newer, older in zip(history, history[1:]):
+            assert older["balance_after"] == newer["balance_after"] - newer["delta"]
+
     def test_leaderboard_sorting(self, db_session, test_family):
         """Test leaderboard is sorted correctly."""
         points_service = PointsService()
@@ -540,6 +670,90 @@ class TestPointsService:
         assert leaderboard[2]["points"] == 25
         assert leaderboard[0]["rank"] == 1
 
+    def test_user_rank_matches_leaderboard(self, db_session, test_family, test_user):
+        """Test get_user_rank agrees with leaderboard ordering."""
+        points_service = PointsService()
+
+        rival = User(
+            id=str(uuid4()),
+            familyId=test_family.id,
+            email=f"rival_{uuid4()}@example.com",
+            displayName="Rival",
+            role="child",
+            passwordHash="dummy",
+            locale="en",
+            theme="minimal",
+            permissions={},
+            sso={},
+            createdAt=datetime.utcnow(),
+            updatedAt=datetime.utcnow()
+        )
+        db_session.add(rival)
+        db_session.commit()
+
+        points_service.award_points(test_user.id, None, 30, "Test", db_session)
+        points_service.award_points(rival.id, None, 80, "Test", db_session)
+        db_session.commit()
+
+        assert points_service.get_user_rank(rival.id, test_family.id, db_session) == 1
+        assert points_service.get_user_rank(test_user.id, test_family.id, db_session) == 2
+
+    def test_combined_leaderboards_match_per_period(self, db_session, test_family, test_user):
+        """Test combined week/all-time query matches get_leaderboard."""
+        points_service = PointsService()
+
+        points_service.award_points(test_user.id, None, 40, "Test", db_session)
+        db_session.add(PointsLedger(
+            id=str(uuid4()),
+            userId=test_user.id,
+            delta=25,
+            reason="Old",
+            createdAt=datetime.utcnow() - timedelta(days=20)
+        ))
+        db_session.commit()
+
+        leaderboards = points_service.get_week_and_alltime_leaderboards(
+            family_id=test_family.id,
+            db=db_session
+        )
+
+        for period in ("week", "alltime"):
+            assert leaderboards[period] == points_service.get_leaderboard(
+                family_id=test_family.id,
+                db=db_session,
+                period=period
+            )
+
+    @pytest.mark.asyncio
+    async def test_leaderboard_cache_invalidated_by_manual_award(
+        self, db_session, test_user, test_family
+    ):
+        """Test a parent's manual award drops the cached leaderboard."""
+        from routers.gamification import award_points_legacy, gamification_service
+
+        redis = FakeAsyncRedis()
+        points_service = gamification_service.points_service
+
+        with patch("services.points_service.get_redis", AsyncMock(return_value=redis)):
+            await award_points_legacy(
+                userId=test_user.id, delta=10, reason="Chores", d=db_session, payload={}
+            )
+            first = await points_service.get_leaderboard_cached(test_family.id, db_session)
+            assert redis.store
+
+            # Served from the cache while points are unchanged
+            with patch.object(points_service, "get_leaderboard") as query_mock:
+                assert await points_service.get_leaderboard_cached(test_family.id, db_session) == first
+            query_mock.assert_not_called()
+
+            await award_points_legacy(
+                userId=test_user.id, delta=5, reason="Bonus", d=db_session, payload={}
+            )
+            second = await points_service.get_leaderboard_cached(test_family.id, db_session)
+
+        assert first[0]["points"] == 10
+        assert second[0]["points"] == 15
+
 
 # =============================================================================
 # Integration Tests
@@ -574,6 +788,62 @@ class TestGamificationIntegration:
         assert "new_badges" in result
         assert "total_points" in result
 
+    def test_completion_increments_task_counter(self, db_session, test_user, test_task):
+        """Test completion bumps tasksCompletedCount and flags first task."""
+        gamification_service = GamificationService()
+
+        test_task.status = "done"
+        test_task.completedBy = test_user.id
+        test_task.completedAt = datetime.utcnow()
+
+        result = gamification_service.on_task_completed(
+            task=test_task,
+            user=test_user,
+            completion_time=datetime.utcnow(),
+            db=db_session
+        )
+
+        # The route commits once after the service has flushed its writes
+        db_session.commit()
+        db_session.expire_all()
+
+        assert db_session.get(User, test_user.id).tasksCompletedCount == 1
+        assert any(a["type"] == "first_task" for a in result["special_achievements"])
+
+    def test_post_completion_extras(self, db_session, test_user, test_task):
+        """Test extras carry leaderboard rank and near-unlock badges."""
+        gamification_service = GamificationService()
+
+        # 8 of 10 completions puts tasks_10 above the 75% threshold
+        for _ in range(8):
+            db_session.add(TaskLog(
+                id=str(uuid4()),
+                taskId=test_task.id,
+                userId=test_user.id,
+                action="completed",
+                meta={},
+                createdAt=datetime.utcnow()
+            ))
+        gamification_service.points_service.award_points(
+            test_user.id, test_task.id, 10, "Task completed", db_session
+        )
+        db_session.commit()
+
+        extras = gamification_service.get_post_completion_extras(
+            user_id=test_user.id,
+            db=db_session
+        )
+
+        assert extras["user_id"] == test_user.id
+        assert extras["close_to_unlock"]["tasks_10"]["current"] == 8
+        assert extras["leaderboard_position"] == 1
+
+        missing = gamification_service.get_post_completion_extras(
+            user_id="missing-user",
+            db=db_session
+        )
+        assert "error" in missing
+
     def test_multiple_task_completions(self, db_session, test_user, test_family):
         """Test multiple consecutive task completions."""
         gamification_service = GamificationService()
@@ -665,6 +935,104 @@ class TestGamificationIntegration:
         assert "current_streak" in preview
         assert preview["base_points"] == 10
 
+    def test_preview_task_rewards_reuses_cache(self, db_session, test_user, test_task):
+        """Test previews sharing a cache load streak and badge progress once."""
+        gamification_service = GamificationService()
+        cache = {}
+
+        with patch.object(
+            gamification_service.streak_service, "get_streak_stats",
+            return_value={"current": 0}
+        ) as streak_mock, patch.object(
+            gamification_service.badge_service, "has_any_progress",
+            return_value=True
+        ), patch.object(
+            gamification_service.badge_service, "get_badge_progress",
+            return_value={}
+        ) as progress_mock:
+            for _ in range(3):
+                gamification_service.preview_task_rewards(
+                    task=test_task,
+                    user=test_user,
+                    db=db_session,
+                    cache=cache
+                )
+
+        assert streak_mock.call_count == 1
+        assert progress_mock.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_preview_tasks_route_shares_cache(self, db_session, test_user, test_task):
+        """Test the list preview route loads streak and badge progress once."""
+        from routers.gamification import gamification_service, preview_tasks_rewards
+
+        with patch.object(
+            gamification_service.streak_service, "get_streak_stats",
+            return_value={"current": 0}
+        ) as streak_mock, patch.object(
+            gamification_service.badge_service, "has_any_progress",
+            return_value=True
+        ), patch.object(
+            gamification_service.badge_service, "get_badge_progress",
+            return_value={}
+        ) as progress_mock:
+            result = await preview_tasks_rewards(
+                task_ids=[test_task.id, "missing", test_task.id],
+                cache={},
+                d=db_session,
+                payload={"sub": test_user.id}
+            )
+
+        assert [p["task_id"] for p in result["previews"]] == [test_task.id, test_task.id]
+        assert streak_mock.call_count == 1
+        assert progress_mock.call_count == 1
+
+    def test_preview_skips_badge_progress_without_activity(
+        self, db_session, test_user, test_task
+    ):
+        """Test preview skips badge progress when user has no activity."""
+        gamification_service = GamificationService()
+
+        assert gamification_service.badge_service.has_any_progress(
+            test_user.id, db_session
+        ) is False
+
+        with patch.object(
+            gamification_service.badge_service, "get_badge_progress"
+        ) as progress_mock:
+            preview = gamification_service.preview_task_rewards(
+                task=test_task,
+                user=test_user,
+                db=db_session
+            )
+
+        progress_mock.assert_not_called()
+        assert preview["potential_badges"] == []
+
+    def test_has_any_progress_counts_sync_completions_and_streaks(
+        self, db_session, test_user, test_task
+    ):
+        """Test completions without a TaskLog and active streaks count as progress."""
+        badge_service = BadgeService()
+        assert badge_service.has_any_progress(test_user.id, db_session) is False
+
+        # Sync applies completions by setting completedBy, without a TaskLog
+        test_task.status = "done"
+        test_task.completedBy = test_user.id
+        db_session.commit()
+        assert badge_service.has_any_progress(test_user.id, db_session) is True
+
+        test_task.status = "open"
+        test_task.completedBy = None
+        db_session.add(UserStreak(
+            userId=test_user.id,
+            currentStreak=2,
+            longestStreak=2,
+            lastCompletionDate=datetime.utcnow()
+        ))
+        db_session.commit()
+        assert badge_service.has_any_progress(test_user.id, db_session) is True
+
 
 # =============================================================================
 # Edge Case Tests
@@ -12,6 +12,8 @@ Covers:
 
 import pytest
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 from sqlalchemy.orm import Session
 from core.models import User, Family, Notification, DeviceToken, WebPushSub, Task
 from services.notification_service import NotificationService
@@ -94,7 +96,8 @@ class TestNotificationService:
         assert notification.type == 'test'
         assert notification.title == 'Test Notification'
         assert notification.body == 'This is a test'
-        assert notification.status == 'sent'
+        # No devices and not an email type: stored in-app, delivery skipped
+        assert notification.status == 'skipped'
 
     @pytest.mark.asyncio
     async def test_send_notification_with_device_token(self, db: Session, test_child):
@@ -124,6 +127,113 @@ class TestNotificationService:
         # Push sending may fail in test environment (no Firebase), but should not error
         assert 'push_sent' in result
 
+        notification = db.query(Notification).filter(
+            Notification.id == result['notification_id']
+        ).first()
+        assert notification.status == 'sent'
+
+    @pytest.mark.asyncio
+    async def test_send_notification_dedup(self, db: Session, test_child):
+        """Test identical notifications within the window are sent once"""
+        keys = {}
+
+        async def fake_set(key, value, nx=False, ex=None):
+            if nx and key in keys:
+                return None
+            keys[key] = value
+            return True
+
+        redis = SimpleNamespace(set=fake_set, incr=AsyncMock(), delete=AsyncMock())
+        service = NotificationService(db)
+
+        with patch('services.notification_service.get_redis', AsyncMock(return_value=redis)):
+            first = await service.send_notification(
+                user_id=test_child.id,
+                notification_type='task_approved',
+                title='Task approved',
+                body='Great job!'
+            )
+            second = await service.send_notification(
+                user_id=test_child.id,
+                notification_type='task_approved',
+                title='Task approved',
+                body='Great job!'
+            )
+
+        assert first['notification_id'] is not None
+        assert second['deduped'] is True
+        assert db.query(Notification).filter_by(userId=test_child.id).count() == 1
+        redis.incr.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_fcm_multicast_removes_invalid_tokens(self, db: Session, test_child):
+        """Test FCM devices share one multicast call and dead tokens are removed"""
+        for i, platform in enumerate(['android', 'ios']):
+            db.add(DeviceToken(
+                id=f"token-{i}",
+                userId=test_child.id,
+                platform=platform,
+                token=f"fcm-token-{i}",
+                createdAt=datetime.utcnow()
+            ))
+        db.commit()
+
+        messaging = MagicMock()
+        messaging.send_each_for_multicast.return_value = SimpleNamespace(
+            success_count=1,
+            responses=[
+                SimpleNamespace(exception=None),
+                SimpleNamespace(exception=SimpleNamespace(code="NOT_FOUND")),
+            ]
+        )
+
+        service = NotificationService(db)
+        with patch("services.notification_service._firebase_messaging", messaging):
+            sent = await service._send_push(
+                test_child.id, "Title", "Body", {"n": 1, "ok": True, "id": "abc"}
+            )
+
+        assert sent == 1
+        messaging.send_each_for_multicast.assert_called_once()
+        # FCM data values must be strings; non-strings are JSON-encoded
+        assert messaging.MulticastMessage.call_args.kwargs["data"] == {
+            "n": "1", "ok": "true", "id": "abc"
+        }
+        remaining = db.query(DeviceToken).filter(DeviceToken.userId == test_child.id).all()
+        assert [t.token for t in remaining] == ["fcm-token-0"]
+
+    def test_vapid_headers_cached_per_origin(self):
+        """Test VAPID headers are signed once per origin and reused"""
+        from services import notification_service
+
+        signer = MagicMock()
+        signer.sign.return_value = {"Authorization": "vapid t=jwt,k=key"}
+
+        notification_service._vapid_header_cache.clear()
+        with patch.object(notification_service, "_vapid_signer", None), \
+                patch("py_vapid.Vapid.from_string", return_value=signer):
+            first = notification_service._build_vapid_headers("https://push.example.com", "key")
+            second = notification_service._build_vapid_headers("https://push.example.com", "key")
+            notification_service._build_vapid_headers("https://updates.push.example.org", "key")
+
+        assert first is second
+        assert signer.sign.call_count == 2
+        notification_service._vapid_header_cache.clear()
+
+    def test_email_html_escapes_content(self, db: Session):
+        """Test email body and action URL are HTML-escaped"""
+        service = NotificationService(db)
+
+        html_content = service._format_email_html(
+            '<script>alert("x")</script> done',
+            '/tasks/1?a=1&b="2"'
+        )
+
+        assert '<script>' not in html_content
+        assert '&lt;script&gt;' in html_content
+        assert 'href="/tasks/1?a=1&amp;b=&quot;2&quot;"' in html_content
+        assert 'View Details' not in service._format_email_html('Hi', None)
+
     @pytest.mark.asyncio
     async def test_schedule_task_reminder(self, db: Session, test_child, test_family):
         """Test scheduling task reminder"""
@@ -160,6 +270,107 @@ class TestNotificationService:
         expected_time = task.due - timedelta(minutes=60)
         assert abs((scheduled.scheduledFor - expected_time).total_seconds()) < 10
 
+    @pytest.mark.asyncio
+    async def test_schedule_task_reminders_bulk(self, db: Session, test_child, test_family):
+        """Test bulk reminder scheduling skips tasks due too soon"""
+        for task_id, due_in in [("task-a", 2), ("task-b", 3), ("task-soon", 0.5)]:
+            db.add(Task(
+                id=task_id,
+                familyId=test_family.id,
+                title=f"Task {task_id}",
+                desc="",
+                assignees=[test_child.id],
+                due=datetime.utcnow() + timedelta(hours=due_in),
+                status='open',
+                points=10,
+                createdBy=test_child.id,
+                createdAt=datetime.utcnow(),
+                updatedAt=datetime.utcnow()
+            ))
+        db.commit()
+
+        service = NotificationService(db)
+        scheduled = await service.schedule_task_reminders(
+            ["task-a", "task-b", "task-soon", "missing-task"]
+        )
+
+        assert scheduled == 2
+        task_ids = {
+            n.payload['task_id'] for n in db.query(Notification).filter(
+                Notification.type == 'task_due'
+            )
+        }
+        assert task_ids == {"task-a", "task-b"}
+
+    @pytest.mark.asyncio
+    async def test_process_scheduled_notifications_in_chunks(self, db: Session, test_child):
+        """Test the due backlog is drained across several chunks"""
+        for i in range(5):
+            db.add(Notification(
+                id=f"scheduled-{i}",
+                userId=test_child.id,
+                type="task_due",
+                title="Reminder",
+                body="Task due soon",
+                payload={},
+                status="pending",
+                scheduledFor=datetime.utcnow() - timedelta(minutes=1),
+                createdAt=datetime.utcnow()
+            ))
+        db.commit()
+
+        service = NotificationService(db)
+        with patch('services.notification_service._SCHEDULED_CHUNK_SIZE', 2):
+            await service.process_scheduled_notifications()
+
+        statuses = {n.status for n in db.query(Notification).filter(
+            Notification.id.like("scheduled-%")
+        )}
+        assert statuses == {"sent"}
+
+    @pytest.mark.asyncio
+    async def test_scheduled_chunk_commits_once_with_dead_tokens(self, db: Session, test_child):
+        """Test dead tokens are dropped in the chunk's single commit"""
+        db.add(DeviceToken(
+            id="token-dead",
+            userId=test_child.id,
+            platform="android",
+            token="fcm-dead",
+            createdAt=datetime.utcnow()
+        ))
+        for i in range(3):
+            db.add(Notification(
+                id=f"scheduled-{i}",
+                userId=test_child.id,
+                type="task_due",
+                title="Reminder",
+                body="Task due soon",
+                payload={},
+                status="pending",
+                scheduledFor=datetime.utcnow() - timedelta(minutes=1),
+                createdAt=datetime.utcnow()
+            ))
+        db.commit()
+
+        messaging = MagicMock()
+        messaging.send_each_for_multicast.return_value = SimpleNamespace(
+            success_count=0,
+            responses=[SimpleNamespace(exception=SimpleNamespace(code="NOT_FOUND"))]
+        )
+
+        service = NotificationService(db)
+        with patch("services.notification_service._firebase_messaging", messaging), \
+                patch.object(db, "commit", wraps=db.commit) as commit:
+            await service.process_scheduled_notifications()
+
+        # Committing mid-chunk would release the chunk's row locks
+        assert commit.call_count == 1
+        assert db.query(DeviceToken).filter_by(id="token-dead").count() == 0
+        statuses = {n.status for n in db.query(Notification).filter(
+            Notification.id.like("scheduled-%")
+        )}
+        assert statuses == {"sent"}
+
     @pytest.mark.asyncio
     async def test_check_streak_guard(self, db: Session, test_child):
         """Test streak guard notification"""
@@ -189,6 +400,125 @@ class TestNotificationService:
         assert notification is not None
         assert 'streak' in notification.body.lower()
 
+    @pytest.mark.asyncio
+    async def test_check_streak_guard_marks_failed_deliveries(self, db: Session, test_child, test_parent):
+        """Test streak guard rows whose push raised are marked failed"""
+        from core.models import UserStreak
+
+        for user in (test_child, test_parent):
+            db.add(UserStreak(
+                id=f"streak-{user.id}",
+                userId=user.id,
+                currentStreak=3,
+                longestStreak=3,
+                lastCompletionDate=datetime.utcnow() - timedelta(days=1),
+                updatedAt=datetime.utcnow()
+            ))
+        db.commit()
+
+        async def push(user_id, *args):
+            if user_id == test_parent.id:
+                raise RuntimeError("FCM down")
+            return 1, set(), set()
+
+        service = NotificationService(db)
+        with patch.object(service, "_send_push_prefetched", side_effect=push), \
+                patch.object(service, "_send_email_bulk", AsyncMock(return_value=0)):
+            await service.check_streak_guard()
+
+        statuses = dict(db.query(Notification.userId, Notification.status).filter(
+            Notification.type == 'streak_guard'
+        ).all())
+        assert statuses == {test_child.id: "sent", test_parent.id: "failed"}
+
+
+class TestNotificationQueue:
+    """Test the Redis stream queue and its worker helpers"""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_sends_inline_without_worker(self, db: Session, test_child):
+        """Test enqueue falls back to inline send when no worker is alive"""
+        redis = SimpleNamespace(exists=AsyncMock(return_value=0), xadd=AsyncMock())
+        service = NotificationService(db)
+
+        with patch('services.notification_service.get_redis', AsyncMock(return_value=redis)), \
+                patch.object(service, 'send_notification', AsyncMock(return_value={"notification_id": "n1"})) as send:
+            result = await service.enqueue(test_child.id, 'task_approved', 'Task approved', 'Great job!')
+
+        assert result == {"queued": False, "notification_id": "n1"}
+        send.assert_awaited_once()
+        redis.xadd.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_enqueue_queues_with_worker(self, db: Session, test_child):
+        """Test enqueue adds to the stream when a worker heartbeat exists"""
+        from services.notification_service import _QUEUE_STREAM
+
+        redis = SimpleNamespace(exists=AsyncMock(return_value=1), xadd=AsyncMock())
+        service = NotificationService(db)
+
+        with patch('services.notification_service.get_redis', AsyncMock(return_value=redis)):
+            result = await service.enqueue(test_child.id, 'task_approved', 'Task approved', 'Great job!')
+
+        assert result["queued"] is True
+        assert redis.xadd.await_args.args[0] == _QUEUE_STREAM
+
+    @pytest.mark.asyncio
+    async def test_failed_delivery_is_parked_not_slept(self):
+        """Test a failed delivery is scheduled for retry without sleeping"""
+        import orjson
+        from services.notification_service import _handle_queued, _QUEUE_RETRY_KEY
+
+        envelope = {
+            "notification_id": "n1", "user_id": "u1", "notification_type": "task_approved",
+            "title": "t", "body": "b", "data": None, "action_url": None, "attempts": 0
+        }
+        redis = SimpleNamespace(zadd=AsyncMock(), xadd=AsyncMock(), xack=AsyncMock())
+
+        with patch('core.db.SessionLocal', MagicMock()), \
+                patch.object(NotificationService, 'send_notification', AsyncMock(side_effect=RuntimeError("FCM down"))), \
+                patch('services.notification_service.asyncio.sleep', AsyncMock()) as sleep:
+            await _handle_queued(redis, "1-0", {"data": orjson.dumps(envelope)})
+
+        sleep.assert_not_awaited()
+        key, mapping = redis.zadd.await_args.args
+        assert key == _QUEUE_RETRY_KEY
+        (member, not_before), = mapping.items()
+        assert orjson.loads(member)["attempts"] == 1
+        assert not_before > datetime.utcnow().timestamp()
+        redis.xadd.assert_not_awaited()
+        redis.xack.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_promote_due_retries(self):
+        """Test due retries move back to the stream exactly once"""
+        from services.notification_service import _promote_due_retries, _QUEUE_STREAM
+
+        redis = SimpleNamespace(
+            zrangebyscore=AsyncMock(return_value=["a", "b"]),
+            zrem=AsyncMock(side_effect=[1, 0]),
+            xadd=AsyncMock()
+        )
+
+        assert await _promote_due_retries(redis) == 1
+        redis.xadd.assert_awaited_once_with(_QUEUE_STREAM, {"data": "a"})
+
+    @pytest.mark.asyncio
+    async def test_reclaim_idle_pending_messages(self):
+        """Test messages left pending by a dead consumer are redelivered"""
+        from services.notification_service import _reclaim_idle
+
+        redis = SimpleNamespace(xautoclaim=AsyncMock(side_effect=[
+            ["5-0", [("1-0", {"data": "x"}), ("2-0", None)], []],
+            ["0-0", [("5-0", {"data": "y"})], []],
+        ]))
+
+        with patch('services.notification_service._handle_queued', AsyncMock()) as handle:
+            assert await _reclaim_idle(redis, "worker-2", 50) == 3
+
+        assert handle.await_count == 3
+        assert redis.xautoclaim.await_args_list[1].kwargs["start_id"] == "5-0"
+
 
 class TestNotificationAPI:
     """Test notification API endpoints"""
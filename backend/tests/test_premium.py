@@ -3,8 +3,10 @@ Test Premium Monetization System
 Tests PremiumService, premium limits, and Stripe integration
 """
 
+import asyncio
 import pytest
 from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from core.db import Base
@@ -53,6 +55,48 @@ def test_user(db_session, test_family):
     return user
 
 
+class FakeRedis:
+    """In-memory stand-in for the sync Redis client used by the AI quota"""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = str(value)
+        return True
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Pipeline supporting the INCR/EXPIRE pair used by the AI quota"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def incr(self, key):
+        self.ops.append(key)
+
+    def expire(self, key, ttl):
+        pass
+
+    def execute(self):
+        key = self.ops[0]
+        value = int(self.redis.store.get(key, 0)) + 1
+        self.redis.store[key] = str(value)
+        return [value, True]
+
+
 class TestPremiumService:
     """Test PremiumService functionality"""
 
@@ -111,6 +155,20 @@ class TestPremiumService:
         assert status["features"]["all_themes"] is True  # Family unlock unlocks themes
         assert status["features"]["unlimited_ai"] is False  # But not AI
 
+    def test_check_premium_memoized_until_activation(self, db_session, test_user, test_family):
+        """Test premium status is cached per service and invalidated on purchase"""
+        service = PremiumService(db_session)
+        assert service.check_premium(test_user)["has_family_unlock"] is False
+
+        # Out-of-band change is not seen by the same service instance
+        test_family.familyUnlock = True
+        db_session.commit()
+        assert service.check_premium(test_user)["has_family_unlock"] is False
+
+        # Purchasing through the service invalidates the cached status
+        service.activate_premium(test_user, 'family_unlock', 'pi_test123')
+        assert service.check_premium(test_user)["has_family_unlock"] is True
+
     def test_can_use_ai_planning_free_user_no_usage(self, db_session, test_user):
         """Test AI planning for free user with no usage"""
         service = PremiumService(db_session)
@@ -196,6 +254,88 @@ class TestPremiumService:
         assert logs[0].action == 'plan_week'
         assert logs[0].meta['total_tasks'] == 28
 
+    def test_ai_quota_uses_redis_counter(self, db_session, test_user):
+        """Test daily AI quota is seeded from the log and then counted in Redis"""
+
+        db_session.add(AIUsageLog(userId=test_user.id, action='plan_week', meta={}))
+        db_session.commit()
+
+        fake = FakeRedis()
+        with patch("services.premium_service.get_sync_redis", return_value=fake):
+            service = PremiumService(db_session)
+            # First check seeds the counter from the audit log
+            assert service.can_use_ai_planning(test_user)["remaining"] == 4
+
+            service.log_ai_usage(test_user, action='generate_tasks')
+            service.log_ai_usage(test_user, action='chat')  # not quota-relevant
+            assert service.can_use_ai_planning(test_user)["remaining"] == 3
+
+            # Rows written outside log_ai_usage don't touch the counter
+            db_session.add(AIUsageLog(userId=test_user.id, action='plan_week', meta={}))
+            db_session.commit()
+            assert service.can_use_ai_planning(test_user)["remaining"] == 3
+
+    def test_ai_quota_counts_buffered_usage(self, db_session, test_user):
+        """Test buffered usage rows are counted even before they are flushed"""
+        from services import premium_service
+
+        fake = FakeRedis()
+        with patch("services.premium_service.get_sync_redis", return_value=fake), \
+                patch.object(premium_service, "_usage_buffer", MagicMock()):
+            service = PremiumService(db_session)
+            assert service.can_use_ai_planning(test_user)["remaining"] == 5
+
+            service.log_ai_usage(test_user, action='plan_week')
+            assert service.can_use_ai_planning(test_user)["remaining"] == 4
+
+            # Counter lost (Redis restart): reseeded from the log, then counted
+            fake.store.clear()
+            service.log_ai_usage(test_user, action='plan_week')
+            assert service.can_use_ai_planning(test_user)["remaining"] == 4
+
+    @pytest.mark.asyncio
+    async def test_log_ai_usage_buffered(self, db_session, test_user):
+        """Test usage rows are buffered while the writer runs and flushed on stop"""
+        from services import premium_service
+
+        written = []
+        with patch.object(premium_service, "_write_usage_rows", written.append):
+            premium_service.start_usage_writer()
+            service = PremiumService(db_session)
+            for _ in range(3):
+                service.log_ai_usage(test_user, action='plan_week', metadata={'total_tasks': 7})
+
+            # Nothing is committed on the request path
+            assert db_session.query(AIUsageLog).count() == 0
+
+            await premium_service.stop_usage_writer()
+
+        rows = [row for batch in written for row in batch]
+        assert len(rows) == 3
+        assert rows[0]["userId"] == test_user.id
+        assert rows[0]["meta"] == {'total_tasks': 7}
+        assert premium_service._usage_buffer is None
+
+    @pytest.mark.asyncio
+    async def test_stop_usage_writer_flushes_dequeued_rows(self, db_session, test_user):
+        """Test rows the writer already dequeued are flushed when it is stopped"""
+        from services import premium_service
+
+        written = []
+        with patch.object(premium_service, "_write_usage_rows", written.append):
+            premium_service.start_usage_writer()
+            service = PremiumService(db_session)
+            for _ in range(3):
+                service.log_ai_usage(test_user, action='plan_week')
+
+            # Let the writer take the rows off the buffer before stopping
+            await asyncio.sleep(0.1)
+            assert premium_service._usage_buffer.empty()
+
+            await premium_service.stop_usage_writer()
+
+        assert sum(len(batch) for batch in written) == 3
+
     def test_can_use_theme_free_user(self, db_session, test_user):
         """Test theme access for free user"""
         service = PremiumService(db_session)
@@ -13,7 +13,7 @@ Tests:
 """
 
 import pytest
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -22,6 +22,7 @@ from core import models
 from core.security import create_jwt
 from main import app
 import uuid
+import orjson
 
 # Test database
 TEST_DATABASE_URL = "sqlite:///./test_sync.db"
@@ -524,5 +525,130 @@ def test_delta_sync_concurrent_users(client, db_session, test_family, test_user)
     assert data_b["success"] is True or len(data_b["conflicts"]) > 0
 
 
+def test_family_changes_since(db_session, test_family, test_user):
+    """SyncService returns only this family's changes after the timestamp"""
+    from services.sync_service import SyncService
+
+    since = datetime.utcnow() - timedelta(minutes=5)
+    other_family = models.Family(name="Other Family")
+    db_session.add(other_family)
+    db_session.flush()
+
+    db_session.add_all([
+        models.Task(familyId=test_family.id, title="Fresh", category="cleaning",
+                    frequency="none", assignees=[test_user.id], createdBy=test_user.id),
+        models.Task(familyId=test_family.id, title="Stale", category="cleaning",
+                    frequency="none", assignees=[], createdBy=test_user.id,
+                    updatedAt=since - timedelta(days=1)),
+        models.Task(familyId=other_family.id, title="Other", category="cleaning",
+                    frequency="none", assignees=[], createdBy=test_user.id),
+        models.PointsLedger(userId=test_user.id, delta=10, reason="task_complete"),
+        models.PointsLedger(userId=test_user.id, delta=5, reason="task_complete"),
+        models.Badge(userId=test_user.id, code="first_task"),
+    ])
+    db_session.commit()
+
+    changes = SyncService.get_family_changes_since(db_session, test_family.id, since)
+
+    assert [t["title"] for t in changes["tasks"]] == ["Fresh"]
+    assert changes["tasks"][0]["assignees"] == [test_user.id]
+    assert sorted(p["delta"] for p in changes["points"]) == [5, 10]
+    assert [b["code"] for b in changes["badges"]] == ["first_task"]
+    assert changes["events"] == []
+    assert changes["streaks"] == []
+
+    encoded = orjson.loads(SyncService.serialize_changes(changes))
+    assert encoded["tasks"][0]["updatedAt"] == changes["tasks"][0]["updatedAt"].isoformat()
+
+    stats = SyncService.get_sync_stats(db_session, test_family.id, since)
+    assert stats["by_entity"] == {k: len(v) for k, v in changes.items()}
+    assert stats["total_changes"] == 4
+
+    # Streaming in tiny batches produces the same document
+    streamed = b"".join(SyncService.iter_family_changes_json(
+        db_session, test_family.id, since, batch_size=1
+    ))
+    assert orjson.loads(streamed) == encoded
+
+
+def test_clean_old_sync_data_in_chunks(db_session, test_family, test_user):
+    """Old completed tasks and their logs are removed chunk by chunk"""
+    from unittest.mock import patch
+    from services.sync_service import SyncService
+
+    old = datetime.utcnow() - timedelta(days=120)
+    old_tasks = [
+        models.Task(familyId=test_family.id, title=f"Old {i}", category="cleaning",
+                    frequency="none", assignees=[], createdBy=test_user.id,
+                    status="done", completedAt=old)
+        for i in range(3)
+    ]
+    recent = models.Task(familyId=test_family.id, title="Recent", category="cleaning",
+                         frequency="none", assignees=[], createdBy=test_user.id,
+                         status="done", completedAt=datetime.utcnow())
+    db_session.add_all(old_tasks + [recent])
+    db_session.flush()
+    db_session.add_all(
+        [models.TaskLog(taskId=t.id, userId=test_user.id, action="completed", createdAt=old)
+         for t in old_tasks]
+        + [models.TaskLog(taskId=recent.id, userId=test_user.id, action="completed", createdAt=old)]
+    )
+    db_session.commit()
+
+    with patch("services.sync_service._CLEANUP_CHUNK_SIZE", 2):
+        deleted = SyncService.clean_old_sync_data(db_session)
+
+    assert deleted == 7  # 3 tasks + their 3 logs + 1 old log on a recent task
+    assert [t.title for t in db_session.query(models.Task).all()] == ["Recent"]
+    assert db_session.query(models.TaskLog).count() == 0
+
+
+def test_apply_batch_changes_rolls_back_failed_chunk(db_session, test_family, test_user):
+    """A chunk that fails to flush is discarded without losing other chunks"""
+    from unittest.mock import patch
+    from services.sync_service import SyncService
+
+    def create(title):
+        return {
+            "entity_type": "task",
+            "entity_id": str(uuid.uuid4()),
+            "action": "create",
+            "data": {"familyId": test_family.id, "title": title},
+            "client_timestamp": datetime.utcnow().isoformat()
+        }
+
+    # Third change violates NOT NULL on title when its chunk is flushed
+    changes = [create(f"Task {i}") for i in range(30)]
+    changes[2] = create(None)
+    user = {"sub": test_user.id}
+
+    with patch("services.sync_service._BATCH_CHUNK_SIZE", 2):
+        result = SyncService.apply_batch_changes(db_session, changes, user)
+
+    assert result["errors"] == 2
+    assert result["applied"] == 28
+    titles = {t.title for t in db_session.query(models.Task).all()}
+    assert len(titles) == 28
+    assert "Task 3" not in titles  # shared the failed chunk
+
+
+def test_resolve_conflict_auto_mixed_timestamps():
+    """LWW compares epoch-ms and ISO timestamps on the same scale"""
+    from services.sync_service import SyncService
+
+    server = {"status": "open", "updatedAt": "2025-11-10T12:00:00"}
+    newer_ms = int(datetime(2025, 11, 10, 12, 0, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+    result = SyncService.resolve_conflict_auto(
+        {"status": "open", "updatedAt_ms": newer_ms}, server, "task"
+    )
+    assert result["winner"] == "client"
+
+    result = SyncService.resolve_conflict_auto(
+        {"updatedAt": newer_ms - 2000}, server, "event"
+    )
+    assert result["winner"] == "server"
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
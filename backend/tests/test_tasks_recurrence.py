@@ -304,6 +304,21 @@ def test_rotation_round_robin(db, recurring_task_daily: models.Task, test_users:
     assert assignee3 == assignees_expected[0]
 
 
+def test_rotate_assignees_batch_round_robin(db, recurring_task_daily: models.Task, test_users: dict):
+    """Test batched round-robin matches per-occurrence rotation"""
+    fairness_engine = FairnessEngine(db)
+
+    today = date.today()
+    dates = [today + timedelta(days=i) for i in range(3)]
+
+    assignees = fairness_engine.rotate_assignees(recurring_task_daily, dates)
+
+    assert assignees == [test_users["teen"].id, test_users["child"].id, test_users["teen"].id]
+    db.refresh(recurring_task_daily)
+    assert recurring_task_daily.rotationState["index"] == 1
+    assert recurring_task_daily.rotationState["lastRotationDate"] == dates[-1].isoformat()
+
+
 def test_rotation_fairness_least_loaded(db, recurring_task_weekly: models.Task, test_users: dict):
     """Test fairness rotation selects least loaded user"""
     fairness_engine = FairnessEngine(db)
@@ -643,6 +658,29 @@ def test_skip_occurrence(db, recurring_task_daily: models.Task, test_users: dict
     assert success_again is False
 
 
+def test_skipped_occurrence_not_generated(db, recurring_task_daily: models.Task, test_users: dict):
+    """Test skipped dates are excluded from generation but reported as skipped"""
+    generator = TaskGenerator(db)
+
+    # Next weekday after tomorrow (rule is weekdays only)
+    skip_date = date.today() + timedelta(days=2)
+    while skip_date.weekday() >= 5:
+        skip_date += timedelta(days=1)
+    week_end = skip_date + timedelta(days=7)
+
+    assert generator.skip_task_occurrence(recurring_task_daily.id, skip_date, test_users["parent"].id)
+    assert recurring_task_daily.skippedDates == [skip_date.isoformat()]
+
+    generated = generator.generate_recurring_tasks(recurring_task_daily.familyId, date.today(), week_end)
+    assert generated
+    assert all(t.due.date() != skip_date for t in generated)
+
+    occurrences = generator.get_task_occurrences(recurring_task_daily.id, date.today(), week_end)
+    skipped = [o for o in occurrences if o["occurrence_date"] == skip_date.isoformat()]
+    assert skipped[0]["is_skipped"] is True
+    assert skipped[0]["is_generated"] is False
+
+
 def test_complete_series(db, recurring_task_daily: models.Task, test_users: dict):
     """Test completing entire recurring series"""
     generator = TaskGenerator(db)
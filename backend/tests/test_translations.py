@@ -80,6 +80,17 @@ class TestTranslationService:
         result = service.get('en', 'nonexistent.key')
         assert result == 'nonexistent.key'  # Returns key itself
 
+    def test_section_key_returns_key(self):
+        """Test that a key naming a section (not a leaf) returns the key"""
+        service = TranslationService()
+
+        assert service.get('nl', 'common') == 'common'
+        assert service.flat['en']['common.loading'] == ('Loading...', False)
+
+        # Flattened tables are read-only
+        with pytest.raises(TypeError):
+            service.flat['en']['common.loading'] = ('Changed', False)
+
     def test_get_all_translations(self):
         """Test getting all translations for a locale"""
         service = TranslationService()